@@ -4,18 +4,12 @@
 """
 
 import asyncio
-import aiohttp
-import json
 import os
 from typing import Optional
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL, MAX_RETRIES, MAX_TOKENS, TEMPERATURE
+from config import MAX_RETRIES
+from LLMClient import request_json, DeadlineExceeded, schema_max_tokens, stage_settings
 from pathlib import Path
 
-# DeepSeek API配置
-API_KEY = DEEPSEEK_API_KEY
-API_URL = DEEPSEEK_API_URL
-MODEL = DEEPSEEK_MODEL
-
 # 注意：不再使用Pydantic模型，直接返回JSON格式的列表
 
 # 系统提示词
@@ -72,6 +66,9 @@ You **MUST** output a JSON array with exactly 3 elements in this exact order:
 - Each abstract step must not exceed 35 English words
 - Output ONLY the JSON array, no other text"""
 
+# 输出上限：4个语步 × 35词，另加论文标题与作者列表
+OUTPUT_MAX_TOKENS = schema_max_tokens(items=4, words_per_item=35, title_words=3, extra_tokens=200)
+
 def extract_text_for_llm(md_content: str) -> str:
     """
     从markdown内容中提取前5000个字符用于LLM分析
@@ -90,97 +87,45 @@ def extract_text_for_llm(md_content: str) -> str:
     except Exception as e:
         return ""
 
-async def call_deepseek_api(text: str, max_retries: int = MAX_RETRIES) -> Optional[list]:
+async def call_deepseek_api(text: str, max_retries: int = MAX_RETRIES, deadline: Optional[float] = None) -> Optional[list]:
     """
     调用DeepSeek API进行学术文本分析
     
     Args:
         text: 要分析的文本
         max_retries: 最大重试次数
+        deadline: 截止时间（time.time()时间戳），None表示不限
     
     Returns:
         list: [标题, 作者列表, 摘要语步JSON] 或 None
-    """
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
     
+    Raises:
+        DeadlineExceeded: 截止时间已到
+    """
     user_prompt = USER_PROMPT_TEMPLATE.format(text=text)
     
-    payload = {
-        "model": MODEL,
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ],
-        "max_tokens": 800,
-        "temperature": TEMPERATURE  # 降低随机性，提高一致性
-    }
-    
-    for attempt in range(max_retries + 1):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(API_URL, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        if attempt < max_retries:
-                            await asyncio.sleep(1)  # 等待1秒后重试
-                            continue
-                        return None
-                    
-                    result = await response.json()
-                    
-                    # 提取回复内容
-                    if "choices" in result and len(result["choices"]) > 0:
-                        content = result["choices"][0]["message"]["content"].strip()
-                        
-                        # 尝试解析JSON
-                        try:
-                            # 清理可能的markdown代码块标记
-                            if content.startswith("```json"):
-                                content = content[7:]
-                            if content.endswith("```"):
-                                content = content[:-3]
-                            content = content.strip()
-                            
-                            # 解析JSON数组
-                            json_data = json.loads(content)
-                            
-                            # 验证返回的是列表且包含3个元素
-                            if isinstance(json_data, list) and len(json_data) == 3:
-                                return json_data
-                            else:
-                                if attempt < max_retries:
-                                    await asyncio.sleep(1)
-                                    continue
-                            
-                        except json.JSONDecodeError as e:
-                            if attempt < max_retries:
-                                await asyncio.sleep(1)
-                                continue
-                            
-                        except Exception as e:
-                            if attempt < max_retries:
-                                await asyncio.sleep(1)
-                                continue
-                    else:
-                        if attempt < max_retries:
-                            await asyncio.sleep(1)
-                            continue
-                        
-        except Exception as e:
-            if attempt < max_retries:
-                await asyncio.sleep(1)
-                continue
-    
-    return None
-
-async def analyze_abstract_steps(md_content: str) -> Optional[list]:
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+    
+    # 验证返回的是列表且包含3个元素
+    return await request_json(
+        messages,
+        validator=lambda json_data: isinstance(json_data, list) and len(json_data) == 3,
+        max_retries=max_retries,
+        deadline=deadline,
+        label="AbstractSteps",
+        **stage_settings('abstract', OUTPUT_MAX_TOKENS)
+    )
+
+async def analyze_abstract_steps(md_content: str, deadline: Optional[float] = None) -> Optional[list]:
     """
     分析markdown内容的学术信息
     
     Args:
         md_content: markdown内容字符串
+        deadline: 截止时间（time.time()时间戳），None表示不限
     
     Returns:
         list: [标题, 作者列表, 摘要语步JSON] 或 None
@@ -192,16 +137,17 @@ async def analyze_abstract_steps(md_content: str) -> Optional[list]:
         return None
     
     # 2. 调用LLM分析
-    result = await call_deepseek_api(analysis_text)
+    result = await call_deepseek_api(analysis_text, deadline=deadline)
     
     return result
 
-def analyze_abstract_steps_sync(md_content: str) -> Optional[list]:
+def analyze_abstract_steps_sync(md_content: str, deadline: Optional[float] = None) -> Optional[list]:
     """
     同步版本的学术信息分析函数，供外部应用调用
     
     Args:
         md_content: markdown内容字符串
+        deadline: 截止时间（time.time()时间戳），None表示不限；到期时抛出DeadlineExceeded
     
     Returns:
         list: [标题, 作者列表, 摘要语步JSON] 或 None
@@ -210,19 +156,22 @@ def analyze_abstract_steps_sync(md_content: str) -> Optional[list]:
     """
     try:
         # 运行异步分析
-        result = asyncio.run(analyze_abstract_steps(md_content))
+        result = asyncio.run(analyze_abstract_steps(md_content, deadline))
         return result
             
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return None
 
 
-def analyze_abstract_steps_from_content(md_content: str) -> Optional[dict]:
+def analyze_abstract_steps_from_content(md_content: str, deadline: Optional[float] = None) -> Optional[dict]:
     """
     从markdown内容分析学术信息并返回JSON对象
     
     Args:
         md_content: markdown内容字符串
+        deadline: 截止时间（time.time()时间戳），None表示不限；到期时抛出DeadlineExceeded
     
     Returns:
         dict: 包含abstract和metadata的JSON对象，格式如下：
@@ -242,7 +191,7 @@ def analyze_abstract_steps_from_content(md_content: str) -> Optional[dict]:
     """
     try:
         # 分析摘要语步
-        result = analyze_abstract_steps_sync(md_content)
+        result = analyze_abstract_steps_sync(md_content, deadline)
         
         if not result or len(result) != 3:
             return None
@@ -258,6 +207,8 @@ def analyze_abstract_steps_from_content(md_content: str) -> Optional[dict]:
             }
         }
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return None
 
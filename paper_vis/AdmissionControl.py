@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+准入控制与背压
+限制同时处理的论文数与按PDF估算的内存占用，超出部分进入有界队列，队列已满时拒绝（api_server返回429与Retry-After）
+
+功能：
+- count_pdf_pages / estimate_job_memory：由PDF字节数与页数估算单篇论文处理期间的内存占用
+- AdmissionController：在事件循环中按FairQueue的顺序准入任务；admit上下文管理器在退出时释放名额并唤醒队首
+
+核心特性：
+- 排队顺序：interactive严格优先于batch，类别内按租户权重公平，同一租户内按到达顺序（见FairScheduler）
+- 不插队：下一个应准入的任务因内存不足等待时，后面的小任务也不会越过它，避免大论文饿死
+- batch最多同时处理ADMISSION_BATCH_MAX_INFLIGHT篇，两个类别分别限制排队数
+- 单个估算超过内存预算的任务在没有其他任务运行时单独准入，不会永远等待
+- 排队期间任务被取消（如客户端断开连接）时立即退出队列，不占用名额
+- 排队时间不超过请求截止时间与ADMISSION_QUEUE_TIMEOUT，超出时返回503，客户端不会无限等待
+- Retry-After按队列位置与最近任务耗时的指数滑动平均估算
+- 限额按进程生效，多worker部署时每个worker各自准入
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from config import (
+    ADMISSION_BATCH_MAX_INFLIGHT, ADMISSION_BATCH_QUEUE_SIZE, ADMISSION_DEFAULT_JOB_SECONDS,
+    ADMISSION_MEMORY_BUDGET_MB, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT, JOB_MEMORY_BASE_MB, JOB_MEMORY_PER_PAGE_MB,
+    JOB_MEMORY_PER_PDF_MB, MAX_INFLIGHT_JOBS
+)
+from Cancellation import CancelToken, cancellable
+from FairScheduler import DEFAULT_JOB, PRIORITY_CLASSES, FairQueue, JobClass
+from Metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS, RESERVED_MEMORY_BYTES
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# 页对象（/Type /Page，不匹配页树节点/Pages）
+_PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+# 无法从字节中数出页数时（如页对象位于压缩对象流中）按每页约100KB估算
+_FALLBACK_BYTES_PER_PAGE = 100 * 1024
+# 任务耗时滑动平均的权重
+_DURATION_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """队列已满或排队超过截止时间，任务未被准入"""
+
+    def __init__(self, reason: str, retry_after: int):
+        """
+        Args:
+            reason: queue_full或queue_timeout
+            retry_after: 建议客户端重试的等待秒数
+        """
+        super().__init__(f"任务未被准入: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def count_pdf_pages(content: bytes) -> int:
+    """
+    粗略统计PDF页数（不解析PDF，只扫描页对象）
+
+    Args:
+        content: PDF文件内容
+
+    Returns:
+        页数，无法统计时按文件大小估算（至少为1）
+    """
+    pages = len(_PAGE_PATTERN.findall(content))
+    if pages:
+        return pages
+    return max(1, len(content) // _FALLBACK_BYTES_PER_PAGE)
+
+
+def estimate_job_memory(pdf_size: int, pages: int) -> int:
+    """
+    估算单篇论文处理期间的内存占用：固定开销（泳道进程池等）+ 每页解析结果 + 与PDF大小成比例的图片base64
+
+    Args:
+        pdf_size: PDF字节数
+        pages: 页数
+
+    Returns:
+        估算字节数
+    """
+    estimate_mb = JOB_MEMORY_BASE_MB + pages * JOB_MEMORY_PER_PAGE_MB + pdf_size / MB * JOB_MEMORY_PER_PDF_MB
+    return int(estimate_mb * MB)
+
+
+class _Waiter:
+    """排队中的任务"""
+
+    def __init__(self, memory: int, future: asyncio.Future):
+        self.memory = memory
+        self.future = future
+        self.enqueued = time.time()
+
+
+class AdmissionController:
+    """按处理中任务数与估算内存准入论文处理任务（只在同一个事件循环中使用）"""
+
+    def __init__(self, max_inflight: int = MAX_INFLIGHT_JOBS, memory_budget_mb: float = ADMISSION_MEMORY_BUDGET_MB,
+                 max_queue: int = ADMISSION_QUEUE_SIZE, default_job_seconds: float = ADMISSION_DEFAULT_JOB_SECONDS,
+                 batch_max_inflight: int = ADMISSION_BATCH_MAX_INFLIGHT, batch_max_queue: int = ADMISSION_BATCH_QUEUE_SIZE,
+                 weights: Optional[Dict[str, float]] = None, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        """
+        初始化准入控制
+
+        Args:
+            max_inflight: 同时处理的任务数上限
+            memory_budget_mb: 处理中任务的估算内存总和上限（MB）
+            max_queue: interactive排队任务数上限
+            default_job_seconds: 尚无完成记录时假定的单个任务耗时（秒）
+            batch_max_inflight: batch同时处理的任务数上限
+            batch_max_queue: batch排队任务数上限
+            weights: 租户权重，默认使用TENANT_WEIGHTS
+            queue_timeout: 单个任务最长排队秒数，0表示只受调用方传入的timeout约束
+        """
+        self.max_inflight = max(1, max_inflight)
+        self.memory_budget = int(memory_budget_mb * MB)
+        self.class_limits = {'interactive': self.max_inflight, 'batch': max(1, min(batch_max_inflight, self.max_inflight))}
+        self.queue_limits = {'interactive': max(0, max_queue), 'batch': max(0, batch_max_queue)}
+        self.inflight = {priority: 0 for priority in PRIORITY_CLASSES}
+        self.reserved = 0
+        self.job_seconds = default_job_seconds
+        self.queue_timeout = queue_timeout if queue_timeout > 0 else None
+        self._queue = FairQueue(weights)
+
+    def _is_open(self, priority: str) -> bool:
+        """类别当前是否还有处理名额"""
+        return sum(self.inflight.values()) < self.max_inflight and self.inflight[priority] < self.class_limits[priority]
+
+    def _fits(self, memory: int) -> bool:
+        """估算内存是否在预算内（没有任务运行时总是准入）"""
+        return not sum(self.inflight.values()) or self.reserved + memory <= self.memory_budget
+
+    def _wake(self):
+        """按排队顺序准入可以运行的任务"""
+        while True:
+            candidate = self._queue.first(self._is_open)
+            if candidate is None or not self._fits(candidate[2].memory):
+                return
+            priority, tenant, waiter = candidate
+            self._queue.pop(priority, tenant)
+            self.inflight[priority] += 1
+            self.reserved += waiter.memory
+            RESERVED_MEMORY_BYTES.set(self.reserved)
+            waiter.future.set_result(None)
+
+    def retry_after(self, priority: str = 'interactive') -> int:
+        """
+        估算该类别新到任务需要等待的秒数
+
+        Args:
+            priority: 优先级类别
+
+        Returns:
+            秒数（至少为1）
+        """
+        ahead = self._queue.count('interactive') if priority == 'interactive' else self._queue.count()
+        return max(1, math.ceil(self.job_seconds * (ahead + 1) / self.class_limits[priority]))
+
+    async def acquire(self, memory: int, timeout: Optional[float] = None, job: JobClass = DEFAULT_JOB):
+        """
+        等待准入
+
+        Args:
+            memory: 任务的估算内存（字节）
+            timeout: 最长排队秒数（如距请求截止时间的剩余秒数），同时不超过queue_timeout
+            job: 任务的优先级类别与租户
+
+        Raises:
+            AdmissionRejected: 队列已满（queue_full）或排队超时（queue_timeout）
+        """
+        priority = job.priority
+        if self.queue_timeout is not None:
+            timeout = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        if self._queue.count(priority) >= self.queue_limits[priority]:
+            ADMISSION_REJECTIONS.labels(priority, 'queue_full').inc()
+            raise AdmissionRejected('queue_full', self.retry_after(priority))
+
+        waiter = _Waiter(memory, asyncio.get_running_loop().create_future())
+        self._queue.push(priority, job.tenant, waiter)
+        self._wake()
+        if not waiter.future.done():
+            logger.info(f"⏳ 任务排队（{priority}/{job.tenant}，该类别第 {self._queue.count(priority)} 位，"
+                        f"估算内存 {memory / MB:.0f}MB）")
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except BaseException as e:
+            if waiter.future.done():
+                # 等待被取消的同时恰好被准入：归还名额
+                self.release(memory, job=job)
+            else:
+                waiter.future.cancel()
+                self._queue.remove(priority, job.tenant, waiter)
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_REJECTIONS.labels(priority, 'queue_timeout').inc()
+                raise AdmissionRejected('queue_timeout', self.retry_after(priority)) from None
+            raise
+        ADMISSION_WAIT_SECONDS.labels(priority).observe(time.time() - waiter.enqueued)
+
+    def release(self, memory: int, duration: Optional[float] = None, job: JobClass = DEFAULT_JOB):
+        """
+        释放名额并唤醒排队任务
+
+        Args:
+            memory: 准入时的估算内存
+            duration: 任务耗时（秒），用于更新Retry-After估算
+            job: 准入时的任务类别
+        """
+        self.inflight[job.priority] -= 1
+        self.reserved -= memory
+        RESERVED_MEMORY_BYTES.set(self.reserved)
+        if duration is not None:
+            self.job_seconds += _DURATION_ALPHA * (duration - self.job_seconds)
+        self._wake()
+
+    @asynccontextmanager
+    async def admit(self, memory: int, timeout: Optional[float] = None, job: JobClass = DEFAULT_JOB,
+                    cancel: Optional[CancelToken] = None) -> AsyncIterator[None]:
+        """
+        在准入名额内执行任务
+
+        Args:
+            memory: 任务的估算内存（字节）
+            timeout: 最长排队秒数
+            job: 任务的优先级类别与租户
+            cancel: 取消信号，排队期间触发时退出队列
+
+        Raises:
+            AdmissionRejected: 未被准入
+            Cancelled: 排队期间被取消
+        """
+        await cancellable(self.acquire(memory, timeout, job), cancel, "准入排队")
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.release(memory, time.time() - start, job)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前准入状态"""
+        return {
+            'inflight': dict(self.inflight),
+            'max_inflight': self.max_inflight,
+            'class_limits': dict(self.class_limits),
+            'reserved_mb': round(self.reserved / MB, 1),
+            'memory_budget_mb': round(self.memory_budget / MB, 1),
+            'queued': self._queue.by_tenant(),
+            'queue_limits': dict(self.queue_limits),
+            'queue_timeout': self.queue_timeout,
+            'queued_mb': round(sum(waiter.memory for p in PRIORITY_CLASSES for waiter in self._queue.items(p)) / MB, 1),
+            'job_seconds': round(self.job_seconds, 2),
+            'retry_after': {priority: self.retry_after(priority) for priority in PRIORITY_CLASSES}
+        }
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截止时间与取消
+论文处理被放弃（超过截止时间或客户端断开连接）时，各层共用的异常与取消信号
+
+功能：
+- DeadlineExceeded：截止时间已到，调用被放弃（LLMClient按此重新导出）
+- Cancelled：处理已被取消；是DeadlineExceeded的子类，各层已有的“截止时间到达即停止、不再重试”路径同样适用
+- CancelToken：可跨线程触发的取消信号，触发时执行已登记的回调（唤醒阶段调度器、取消进行中的LLM协程、
+  取消排队中的进程池任务、终止泳道进程等）
+- cancel_scope / current_cancel：通过上下文变量绑定到当前论文，阶段线程与协程自动继承
+- cancellable：等待协程，取消信号触发时在其所在的事件循环中取消它并抛出Cancelled
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    """截止时间已到，调用被放弃"""
+
+
+class Cancelled(DeadlineExceeded):
+    """论文处理已被取消（如客户端断开连接），按截止时间已到处理：立即停止，不再重试"""
+
+
+class CancelToken:
+    """单篇论文的取消信号（线程安全）"""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], Any]] = {}
+        self._ids = itertools.count()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "客户端已断开连接"):
+        """
+        触发取消并执行已登记的回调（只生效一次）
+
+        Args:
+            reason: 取消原因
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        logger.info(f"🛑 取消处理: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"取消回调异常: {e}")
+
+    def add_callback(self, callback: Callable[[], Any]) -> Optional[int]:
+        """
+        登记取消时执行的回调；已取消时立即执行
+
+        Args:
+            callback: 回调（在触发取消的线程中执行，不应阻塞）
+
+        Returns:
+            用于remove_callback的句柄，已取消时返回None
+        """
+        with self._lock:
+            if not self._event.is_set():
+                handle = next(self._ids)
+                self._callbacks[handle] = callback
+                return handle
+        callback()
+        return None
+
+    def remove_callback(self, handle: Optional[int]):
+        """移除已登记的回调"""
+        if handle is not None:
+            with self._lock:
+                self._callbacks.pop(handle, None)
+
+    def raise_if_cancelled(self, label: str = "处理"):
+        """
+        已取消时抛出Cancelled
+
+        Raises:
+            Cancelled: 已取消
+        """
+        if self._event.is_set():
+            raise Cancelled(f"{label} 已取消: {self.reason}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待取消，返回是否已取消"""
+        return self._event.wait(timeout)
+
+
+_current_cancel: ContextVar[Optional[CancelToken]] = ContextVar('cancel_token', default=None)
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """
+    在当前上下文中绑定取消信号，作用域内的LLM调用与阶段（含继承上下文的阶段线程）据此停止
+
+    Args:
+        token: 取消信号
+    """
+    reset = _current_cancel.set(token)
+    try:
+        yield token
+    finally:
+        _current_cancel.reset(reset)
+
+
+def current_cancel() -> Optional[CancelToken]:
+    """当前上下文的取消信号（未绑定时为None）"""
+    return _current_cancel.get()
+
+
+async def cancellable(awaitable: Awaitable[Any], token: Optional[CancelToken], label: str = "处理") -> Any:
+    """
+    等待协程；取消信号触发时（可在任意线程）取消它并抛出Cancelled
+
+    Args:
+        awaitable: 协程
+        token: 取消信号，None时直接等待
+        label: 日志标签
+
+    Returns:
+        协程结果
+
+    Raises:
+        Cancelled: 已取消
+    """
+    if token is None:
+        return await awaitable
+    if token.cancelled:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        token.raise_if_cancelled(label)
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(awaitable)
+
+    def cancel_task():
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    handle = token.add_callback(cancel_task)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if token.cancelled:
+            raise Cancelled(f"{label} 已取消: {token.reason}") from None
+        raise
+    finally:
+        token.remove_callback(handle)
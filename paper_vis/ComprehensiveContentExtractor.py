@@ -11,13 +11,19 @@
 4. 返回按泳道组织的完整内容字典
 """
 
+import logging
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 from NormalizeHeadings import HeadingNormalizer
 from TitleMappingLLM import TitleMappingLLM
 from extractContentByHeading import ContentExtractor
+from DocumentModel import DocumentModel
+from LLMClient import DeadlineExceeded
+from Tracing import span
 import json
 
+logger = logging.getLogger(__name__)
+
 class ComprehensiveContentExtractor:
     """综合内容提取器"""
     
@@ -40,48 +46,46 @@ class ComprehensiveContentExtractor:
         """
         try:
             # 步骤1: 获取清洗后的一级标题列表
-            print("步骤1: 获取清洗后的一级标题列表...")
+            logger.info("步骤1: 获取清洗后的一级标题列表...")
             h1_headings = self.heading_normalizer.process_markdown_file(markdown_file_path)
             
             if not h1_headings:
-                print("错误: 未能提取到一级标题")
+                logger.error("未能提取到一级标题")
                 return {}
             
-            print(f"提取到 {len(h1_headings)} 个一级标题:")
+            logger.info(f"提取到 {len(h1_headings)} 个一级标题:")
             for i, heading in enumerate(h1_headings, 1):
-                print(f"  {i}. {heading}")
-            print()
+                logger.info(f"  {i}. {heading}")
             
             # 步骤2: 将标题映射到四个标准泳道
-            print("步骤2: 将标题映射到四个标准泳道...")
+            logger.info("步骤2: 将标题映射到四个标准泳道...")
             mapping_result = self.title_mapper.map_titles(h1_headings)
             
             if not mapping_result:
-                print("错误: 标题映射失败")
+                logger.error("标题映射失败")
                 return {}
             
-            print("映射结果:")
+            logger.info("映射结果:")
             for lane, titles in mapping_result.items():
-                print(f"  {lane}: {titles}")
-            print()
+                logger.info(f"  {lane}: {titles}")
             
             # 步骤3: 根据映射结果提取具体内容
-            print("步骤3: 提取各泳道的具体内容...")
+            logger.info("步骤3: 提取各泳道的具体内容...")
             final_result = {}
             
             for lane_name, mapped_titles in mapping_result.items():
-                print(f"处理泳道: {lane_name}")
+                logger.info(f"处理泳道: {lane_name}")
                 lane_content = ""
                 
                 for title in mapped_titles:
-                    print(f"  提取标题: {title}")
+                    logger.info(f"  提取标题: {title}")
                     content = self.content_extractor.extractContentByHeading(
                         h1_headings, markdown_file_path, title
                     )
                     
                     # 检查是否提取成功
                     if content.startswith("错误："):
-                        print(f"    警告: {content}")
+                        logger.warning(f"    警告: {content}")
                         continue
                     
                     # 拼接内容
@@ -90,13 +94,12 @@ class ComprehensiveContentExtractor:
                     else:
                         lane_content = content
                     
-                    print(f"    成功提取 {len(content)} 个字符")
+                    logger.info(f"    成功提取 {len(content)} 个字符")
                 
                 final_result[lane_name] = lane_content
-                print(f"  泳道 '{lane_name}' 总内容长度: {len(lane_content)} 字符")
-                print()
+                logger.info(f"  泳道 '{lane_name}' 总内容长度: {len(lane_content)} 字符")
             
-            print("=== 综合内容提取完成 ===")
+            logger.info("=== 综合内容提取完成 ===")
             
             # 如果提供了输出文件夹，生成origin_text.json文件
             if output_folder:
@@ -104,14 +107,14 @@ class ComprehensiveContentExtractor:
                 try:
                     with open(origin_text_path, 'w', encoding='utf-8') as f:
                         json.dump(final_result, f, ensure_ascii=False, indent=2)
-                    print(f"✓ 生成origin_text.json: {origin_text_path}")
+                    logger.info(f"✓ 生成origin_text.json: {origin_text_path}")
                 except Exception as e:
-                    print(f"❌ 生成origin_text.json失败: {e}")
+                    logger.error(f"❌ 生成origin_text.json失败: {e}")
             
             return final_result
             
         except Exception as e:
-            print(f"综合内容提取过程中发生异常: {e}")
+            logger.error(f"综合内容提取过程中发生异常: {e}")
             return {}
 
     def extract_comprehensive_content_from_string(self, markdown_content: str) -> Dict[str, str]:
@@ -124,70 +127,151 @@ class ComprehensiveContentExtractor:
         Returns:
             Dict[str, str]: 按四个标准泳道组织的完整内容字典
         """
+        return self.extract_lane_sections_from_string(markdown_content).get('content', {})
+
+    def extract_lane_sections_from_string(self, markdown_content: str) -> Dict[str, any]:
+        """
+        从Markdown内容字符串中提取综合内容，并返回各泳道章节在原文中的字符区间
+        
+        Args:
+            markdown_content: Markdown内容字符串
+        
+        Returns:
+            Dict[str, any]: 同extract_lane_sections_from_document
+        """
+        return self.extract_lane_sections_from_document(DocumentModel(markdown_content))
+
+    def extract_lane_sections_from_document(self, document: DocumentModel, deadline: Optional[float] = None) -> Dict[str, any]:
+        """
+        基于文档模型提取综合内容，直接复用其一级标题与章节区间索引，不再按标题逐个重新切分Markdown
+        （依次执行document_headings、map_lane_titles与slice_lane_sections，阶段依赖图中三者为独立阶段）
+        
+        Args:
+            document: 文档模型
+            deadline: 标题映射LLM调用的截止时间（time.time()时间戳），到期时抛出DeadlineExceeded
+        
+        Returns:
+            Dict[str, any]: {
+                'content': 按四个标准泳道组织的完整内容字典,
+                'sections': [{'lane', 'heading', 'start', 'end'}, ...] 按start排序的泳道章节区间
+            }
+        """
         try:
-            # 步骤1: 获取清洗后的一级标题列表
-            print("步骤1: 获取清洗后的一级标题列表...")
-            h1_headings = self.heading_normalizer.process_markdown_content(markdown_content)
-            
+            h1_headings = self.document_headings(document)
             if not h1_headings:
-                print("错误: 未能提取到一级标题")
-                return {}
-            
-            print(f"提取到 {len(h1_headings)} 个一级标题:")
-            for i, heading in enumerate(h1_headings, 1):
-                print(f"  {i}. {heading}")
-            print()
-            
-            # 步骤2: 将标题映射到四个标准泳道
-            print("步骤2: 将标题映射到四个标准泳道...")
-            mapping_result = self.title_mapper.map_titles(h1_headings)
+                return {'content': {}, 'sections': []}
             
+            mapping_result = self.map_lane_titles(h1_headings, deadline)
             if not mapping_result:
-                print("错误: 标题映射失败")
-                return {}
+                return {'content': {}, 'sections': []}
             
-            print("映射结果:")
-            for lane, titles in mapping_result.items():
-                print(f"  {lane}: {titles}")
-            print()
-            
-            # 步骤3: 根据映射结果提取具体内容
-            print("步骤3: 提取各泳道的具体内容...")
-            final_result = {}
+            return self.slice_lane_sections(document, mapping_result)
             
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"综合内容提取过程中发生异常: {e}")
+            return {'content': {}, 'sections': []}
+    
+    def document_headings(self, document: DocumentModel) -> List[str]:
+        """
+        步骤1: 获取清洗后的一级标题列表（已在文档模型中构建）
+        
+        Args:
+            document: 文档模型
+        
+        Returns:
+            List[str]: 一级标题列表，未提取到时为空
+        """
+        logger.info("步骤1: 获取清洗后的一级标题列表...")
+        h1_headings = document.h1_headings
+        
+        if not h1_headings:
+            logger.error("未能提取到一级标题")
+            return []
+        
+        logger.info(f"提取到 {len(h1_headings)} 个一级标题:")
+        for i, heading in enumerate(h1_headings, 1):
+            logger.info(f"  {i}. {heading}")
+        return h1_headings
+    
+    def map_lane_titles(self, h1_headings: List[str], deadline: Optional[float] = None) -> Dict[str, List[str]]:
+        """
+        步骤2: 将标题映射到四个标准泳道（标题映射LLM）
+        
+        Args:
+            h1_headings: 一级标题列表
+            deadline: 截止时间（time.time()时间戳），到期时抛出DeadlineExceeded
+        
+        Returns:
+            Dict[str, List[str]]: {泳道: [标题, ...]}，映射失败时为空
+        """
+        logger.info("步骤2: 将标题映射到四个标准泳道...")
+        mapping_result = self.title_mapper.map_titles(h1_headings, deadline=deadline)
+        
+        if not mapping_result:
+            logger.error("标题映射失败")
+            return {}
+        
+        logger.info("映射结果:")
+        for lane, titles in mapping_result.items():
+            logger.info(f"  {lane}: {titles}")
+        return mapping_result
+    
+    def slice_lane_sections(self, document: DocumentModel, mapping_result: Dict[str, List[str]]) -> Dict[str, any]:
+        """
+        步骤3: 根据映射结果从章节索引中切出各泳道的具体内容
+        
+        Args:
+            document: 文档模型
+            mapping_result: 标题映射结果
+        
+        Returns:
+            Dict[str, any]: {'content': 按泳道组织的内容, 'sections': 按start排序的泳道章节区间}
+        """
+        logger.info("步骤3: 提取各泳道的具体内容...")
+        h1_headings = document.h1_headings
+        final_result = {}
+        sections = []
+        
+        with span('slice_lane_sections', 'cpu'):
             for lane_name, mapped_titles in mapping_result.items():
-                print(f"处理泳道: {lane_name}")
+                logger.info(f"处理泳道: {lane_name}")
                 lane_content = ""
-                
+            
                 for title in mapped_titles:
-                    print(f"  提取标题: {title}")
-                    content = self.content_extractor.extractContentByHeadingFromContent(
-                        h1_headings, markdown_content, title
-                    )
-                    
+                    logger.info(f"  提取标题: {title}")
+                    heading_idx = self.content_extractor._findHeadingIndex(h1_headings, title)
+                    section = document.section_for_heading(heading_idx) if heading_idx != -1 else None
+                
                     # 检查是否提取成功
-                    if content.startswith("错误："):
-                        print(f"    警告: {content}")
+                    if section is None:
+                        logger.warning(f"    警告: 未找到标题 '{title}' 对应的章节")
                         continue
-                    
+                
+                    content = document.section_text(heading_idx)
+                    sections.append({
+                        'lane': lane_name,
+                        'heading': section['heading'],
+                        'start': section['start'],
+                        'end': section['end']
+                    })
+                
                     # 拼接内容
                     if lane_content:
                         lane_content += "\n\n" + content
                     else:
                         lane_content = content
-                    
-                    print(f"    成功提取 {len(content)} 个字符")
                 
-                final_result[lane_name] = lane_content
-                print(f"  泳道 '{lane_name}' 总内容长度: {len(lane_content)} 字符")
-                print()
+                    logger.info(f"    成功提取 {len(content)} 个字符")
             
-            print("=== 综合内容提取完成 ===")
-            return final_result
-            
-        except Exception as e:
-            print(f"综合内容提取过程中发生异常: {e}")
-            return {}
+                final_result[lane_name] = lane_content
+                logger.info(f"  泳道 '{lane_name}' 总内容长度: {len(lane_content)} 字符")
+        
+            sections.sort(key=lambda s: s['start'])
+        
+        logger.info("=== 综合内容提取完成 ===")
+        return {'content': final_result, 'sections': sections}
     
     def extract_content_with_summary(self, markdown_file_path: str) -> Dict[str, any]:
         """
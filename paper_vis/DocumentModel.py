@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+归一化文档模型
+PDF解析完成后一次性构建，供LaneExtractor、DataMerger、FigureTextMatchingPipeline和FigureMapGenerator共享
+
+功能：
+- 将content_list归一化为使用__slots__的块记录（页码、类型、文本、标题、bbox、Markdown偏移）
+- 一次线性归并定位每个图表在md_content中的偏移
+- 构建一次Markdown一级标题及其章节区间索引
+- 文本块的句子切分偏移按块缓存，供引用提取等阶段复用
+
+核心特性：
+- 各阶段直接读取块记录，不再各自遍历、过滤或复制content_list
+- DataMerger将匹配到的bbox信息直接写入块记录，避免逐条dict复制
+- 块记录保留原始content_list条目的引用，可按需还原为merged_data格式
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from NormalizeHeadings import HeadingNormalizer
+from extractContentByHeading import ContentExtractor
+from SentenceSegmenter import SentenceSegmenter
+
+_segmenter = SentenceSegmenter()
+
+
+class DocumentBlock:
+    """content_list中单个块的归一化记录"""
+
+    __slots__ = (
+        'index', 'type', 'page_idx', 'text', 'text_level',
+        'caption', 'img_path', 'figure_id', 'has_table_body', 'md_offset',
+        'bbox', 'first_span_bbox', 'middle_type', 'middle_content',
+        'match_confidence', 'match_method', 'type_matched', 'source',
+        '_sentence_spans'
+    )
+
+    def __init__(self, index: int, item):
+        """
+        初始化块记录
+
+        Args:
+            index: 块在content_list中的序号
+            item: content_list中的原始条目（dict或字符串）
+        """
+        self.index = index
+        self.source = item
+        self.md_offset = None
+        self.bbox = None
+        self.first_span_bbox = None
+        self.middle_type = None
+        self.middle_content = None
+        self.match_confidence = 0.0
+        self.match_method = 'no_match'
+        self.type_matched = False
+        self._sentence_spans = None
+
+        if isinstance(item, str):
+            self.type = 'text'
+            self.page_idx = 0
+            self.text = item
+            self.text_level = None
+            self.caption = ''
+            self.img_path = ''
+            self.figure_id = ''
+            self.has_table_body = False
+            return
+
+        self.type = item.get('type')
+        self.page_idx = _normalize_page_idx(item.get('page_idx', 0))
+        self.text = item.get('text', '') or ''
+        self.text_level = item.get('text_level')
+        self.img_path = item.get('img_path', '') or ''
+        self.figure_id = os.path.splitext(os.path.basename(self.img_path))[0] if self.img_path else ''
+        self.has_table_body = bool(item.get('table_body'))
+
+        # 不同解析器版本的图片标题字段分别为image_caption和img_caption
+        if self.type == 'image':
+            caption = item.get('image_caption') or item.get('img_caption') or ''
+        elif self.type == 'table':
+            caption = item.get('table_caption') or ''
+        else:
+            caption = ''
+        if isinstance(caption, list):
+            caption = ' '.join(caption)
+        self.caption = caption
+
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """
+        获取文本的句子切分偏移（首次调用时切分并缓存在块记录上）
+
+        Returns:
+            List[Tuple[int, int]]: 每个句子在text中的 (start, end)
+        """
+        if self._sentence_spans is None:
+            self._sentence_spans = _segmenter.split_spans(self.text)
+        return self._sentence_spans
+
+    def sentences(self) -> List[str]:
+        """
+        获取文本的句子列表（基于缓存的句子偏移）
+
+        Returns:
+            List[str]: 句子列表
+        """
+        return [self.text[start:end] for start, end in self.sentence_spans()]
+
+    def apply_match(self, bbox_info: Optional[Dict]):
+        """
+        写入DataMerger匹配到的middle位置信息
+
+        Args:
+            bbox_info: _find_matching_bbox的返回结果，未匹配时为None
+        """
+        if not bbox_info:
+            return
+        self.bbox = bbox_info.get('bbox')
+        self.first_span_bbox = bbox_info.get('first_span_bbox')
+        self.middle_type = bbox_info.get('middle_type')
+        self.middle_content = bbox_info.get('middle_content')
+        self.match_confidence = bbox_info.get('match_confidence', 0.0)
+        self.match_method = bbox_info.get('match_method', 'no_match')
+        self.type_matched = bbox_info.get('type_matched', False)
+
+    def to_merged_item(self) -> Dict:
+        """
+        还原为DataMerger.merge_data输出的dict格式
+
+        Returns:
+            Dict: 原始字段 + middle位置信息
+        """
+        if isinstance(self.source, str):
+            merged_item = {'type': 'text', 'text': self.source, 'page_idx': 0}
+        else:
+            merged_item = dict(self.source)
+
+        merged_item.update({
+            'bbox': self.bbox,
+            'middle_type': self.middle_type,
+            'match_confidence': self.match_confidence,
+            'match_method': self.match_method
+        })
+        if self.match_method != 'no_match':
+            merged_item.update({
+                'first_span_bbox': self.first_span_bbox,
+                'middle_content': self.middle_content,
+                'type_matched': self.type_matched
+            })
+        return merged_item
+
+
+class DocumentModel:
+    """归一化文档模型：块记录 + Markdown章节索引"""
+
+    def __init__(self, md_content: str, content_list: Optional[List] = None):
+        """
+        构建文档模型
+
+        Args:
+            md_content: Markdown内容字符串
+            content_list: content_list数据（阅读顺序），可为空
+        """
+        self.md_content = md_content or ''
+
+        # 块记录及按类型预先分好的视图
+        self.blocks: List[DocumentBlock] = [DocumentBlock(i, item) for i, item in enumerate(content_list or [])]
+        self.text_blocks: List[DocumentBlock] = [b for b in self.blocks if b.type == 'text' and b.text]
+        self.figure_blocks: List[DocumentBlock] = [b for b in self.blocks if b.type in ('image', 'table')]
+
+        # Markdown一级标题及章节区间索引
+        self.h1_headings: List[str] = HeadingNormalizer().process_markdown_content(self.md_content) if self.md_content else []
+        self.sections: List[Dict] = ContentExtractor().buildSectionIndexFromContent(self.h1_headings, self.md_content) if self.h1_headings else []
+        self._section_by_index = {section['index']: section for section in self.sections}
+
+        self._locate_figures()
+
+    def _locate_figures(self):
+        """
+        一次线性归并定位每个图表在md_content中的字符偏移，写入块记录的md_offset
+
+        图片在md_content中渲染为 ![](img_path)，可按路径精确定位；
+        表格通常渲染为 <table> HTML，按阅读顺序与content_list中的表格一一对应。
+        """
+        # 单次扫描收集图片链接与表格的出现位置
+        link_offsets = {}
+        table_offsets = []
+        for match in re.finditer(r'!\[[^\]]*\]\(([^)\s]+)\)|<table', self.md_content):
+            if match.group(1) is not None:
+                link_offsets.setdefault(match.group(1), match.start())
+            else:
+                table_offsets.append(match.start())
+
+        table_cursor = 0
+        last_offset = 0
+        for block in self.figure_blocks:
+            if not block.img_path:
+                continue
+
+            offset = link_offsets.get(block.img_path)
+            if offset is None and block.type == 'table' and block.has_table_body:
+                # 跳过位于上一个图表之前的表格，保持归并单调前进
+                while table_cursor < len(table_offsets) and table_offsets[table_cursor] < last_offset:
+                    table_cursor += 1
+                if table_cursor < len(table_offsets):
+                    offset = table_offsets[table_cursor]
+                    table_cursor += 1
+
+            if offset is not None:
+                block.md_offset = offset
+                last_offset = offset
+
+    def figure_offsets(self) -> Dict[str, int]:
+        """
+        获取已定位图表的Markdown偏移
+
+        Returns:
+            Dict[str, int]: {figure_id: 偏移}
+        """
+        return {b.figure_id: b.md_offset for b in self.figure_blocks if b.md_offset is not None}
+
+    def section_for_heading(self, heading_index: int) -> Optional[Dict]:
+        """
+        获取一级标题对应的章节区间
+
+        Args:
+            heading_index: 标题在h1_headings中的序号
+
+        Returns:
+            Dict: {'index', 'heading', 'start', 'end'}，未找到返回None
+        """
+        return self._section_by_index.get(heading_index)
+
+    def section_text(self, heading_index: int) -> Optional[str]:
+        """
+        获取一级标题对应的章节文本（与extractContentByHeadingFromContent结果一致）
+
+        Args:
+            heading_index: 标题在h1_headings中的序号
+
+        Returns:
+            str: 章节文本，未找到返回None
+        """
+        section = self._section_by_index.get(heading_index)
+        if section is None:
+            return None
+        return self.md_content[section['start']:section['end']].strip()
+
+    def to_merged_data(self) -> List[Dict]:
+        """
+        还原为DataMerger.merge_data输出的merged_data格式（用于调试或落盘）
+
+        Returns:
+            List[Dict]: merged_data
+        """
+        return [block.to_merged_item() for block in self.blocks]
+
+
+def _normalize_page_idx(page_idx) -> int:
+    """将页码统一为整数（部分解析器版本输出字符串页码）"""
+    try:
+        return int(page_idx)
+    except (TypeError, ValueError):
+        return 0
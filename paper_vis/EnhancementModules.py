@@ -1,4 +1,6 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
+
+import numpy as np
 
 class EnhancementModules:
     @staticmethod
@@ -15,6 +17,73 @@ class EnhancementModules:
         else:
             return 0.3  # 远距离页面低权重
     
+    @staticmethod
+    def bboxes_to_array(bboxes: Sequence[Optional[Sequence[float]]]) -> np.ndarray:
+        """将bbox列表转换为(N, 4)浮点数组，缺失或不完整的bbox以NaN填充"""
+        array = np.full((len(bboxes), 4), np.nan, dtype=float)
+        for i, bbox in enumerate(bboxes):
+            if bbox and len(bbox) >= 4:
+                array[i] = bbox[:4]
+        return array
+    
+    @staticmethod
+    def score_position_batch(figure_pages: Sequence[int], figure_bboxes: np.ndarray,
+                             reference_pages: Sequence[int], reference_bboxes: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        批量计算所有图表-引用对的位置得分（与calculate_position_distance的分段权重一致）
+        
+        Args:
+            figure_pages: 图表页码，长度F
+            figure_bboxes: 图表bbox数组(F, 4)，缺失为NaN
+            reference_pages: 引用页码，长度R
+            reference_bboxes: 引用bbox数组(R, 4)，缺失为NaN
+            
+        Returns:
+            Dict: {
+                'page_distance': (F, R)整数页面距离,
+                'relation': (F, R)同页上下关系，1=引用在图表上方，-1=引用在图表下方，0=跨页或缺少bbox,
+                'weight': (F, R)位置权重
+            }
+        """
+        fig_pages = np.asarray(figure_pages, dtype=np.int64).reshape(-1, 1)
+        ref_pages = np.asarray(reference_pages, dtype=np.int64).reshape(1, -1)
+        page_distance = np.abs(fig_pages - ref_pages)
+        
+        # 分段权重：同页1.0，相邻页0.8，3页以内0.6，其余0.3
+        weight = np.select(
+            [page_distance == 0, page_distance == 1, page_distance <= 3],
+            [1.0, 0.8, 0.6],
+            default=0.3
+        )
+        
+        # 同页面内按bbox顶部y坐标判断上下关系（PDF坐标系：y越小越靠上）
+        fig_y = np.asarray(figure_bboxes, dtype=float).reshape(-1, 4)[:, 1:2]
+        ref_y = np.asarray(reference_bboxes, dtype=float).reshape(-1, 4)[:, 1].reshape(1, -1)
+        comparable = (page_distance == 0) & ~np.isnan(fig_y) & ~np.isnan(ref_y)
+        relation = np.where(comparable, np.where(ref_y < fig_y, 1, -1), 0).astype(np.int8)
+        
+        return {
+            'page_distance': page_distance,
+            'relation': relation,
+            'weight': weight
+        }
+    
+    @staticmethod
+    def rank_candidates(weights: np.ndarray, candidate_indices: np.ndarray) -> np.ndarray:
+        """
+        按权重降序排列候选引用，权重相同时保持原有顺序
+        
+        Args:
+            weights: 单个图表对所有引用的权重(R,)
+            candidate_indices: 候选引用下标
+            
+        Returns:
+            np.ndarray: 排序后的引用下标
+        """
+        candidate_indices = np.asarray(candidate_indices, dtype=np.int64)
+        order = np.argsort(-weights[candidate_indices], kind='stable')
+        return candidate_indices[order]
+    
     @staticmethod
     def extract_figure_number_from_caption(caption: str) -> Optional[str]:
         """从图表标题中提取编号"""
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+优先级类别与租户加权公平调度
+论文处理队列（AdmissionControl）与下游LLM并发名额共用的排队规则，避免批量重跑挤占交互请求
+
+功能：
+- JobClass / job_scope / current_job：论文处理任务的优先级类别（interactive、batch）与租户，
+  通过上下文变量绑定到当前论文，阶段线程与协程自动继承
+- tenant_id：由X-Tenant或API密钥（只保留哈希前缀）确定租户
+- FairQueue：类别之间严格优先，类别内按租户权重（TENANT_WEIGHTS）加权公平，同一租户内按到达顺序
+- LLMSlotScheduler：进程级LLM并发名额（LLM_MAX_CONCURRENCY），batch最多占用LLM_BATCH_MAX_SLOTS个名额，
+  其余名额留给interactive；可在多个线程各自的事件循环中使用
+
+核心特性：
+- 加权公平采用虚拟时间：租户每被取出一个任务，其虚拟时间前进1/权重，总是先取虚拟时间最小的租户；
+  重新变为活跃的租户从当前虚拟时钟起算，空闲期间不能积攒额度
+- batch可以占满空闲容量，但受名额上限约束，interactive到达时无需等待batch全部完成
+- LLM_MAX_CONCURRENCY为0时不限制LLM并发，名额获取没有额外开销
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from config import LLM_BATCH_MAX_SLOTS, LLM_MAX_CONCURRENCY, TENANT_WEIGHTS
+from Metrics import LLM_SLOT_WAIT_SECONDS
+
+# 优先级类别（按优先级从高到低）
+PRIORITY_CLASSES = ('interactive', 'batch')
+DEFAULT_TENANT = 'anonymous'
+
+
+class JobClass:
+    """论文处理任务的优先级类别与租户"""
+
+    def __init__(self, priority: str = 'interactive', tenant: str = DEFAULT_TENANT):
+        """
+        Args:
+            priority: interactive或batch
+            tenant: 租户标识
+
+        Raises:
+            ValueError: 未知的优先级类别
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"未知的优先级类别: {priority}")
+        self.priority = priority
+        self.tenant = tenant or DEFAULT_TENANT
+
+    def __repr__(self) -> str:
+        return f"JobClass({self.priority}, {self.tenant})"
+
+
+DEFAULT_JOB = JobClass()
+_current_job: ContextVar[JobClass] = ContextVar('job_class', default=DEFAULT_JOB)
+
+
+@contextmanager
+def job_scope(job: JobClass) -> Iterator[JobClass]:
+    """
+    在当前上下文中绑定任务类别，作用域内的LLM调用按该类别排队
+
+    Args:
+        job: 任务类别
+    """
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+
+def current_job() -> JobClass:
+    """当前上下文的任务类别（未绑定时为interactive/anonymous）"""
+    return _current_job.get()
+
+
+def tenant_id(tenant: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    """
+    确定租户标识：优先使用显式租户名，其次使用API密钥的哈希前缀（不记录密钥本身）
+
+    Args:
+        tenant: 显式租户名（X-Tenant）
+        api_key: API密钥（X-API-Key）
+
+    Returns:
+        租户标识
+    """
+    if tenant and tenant.strip():
+        return tenant.strip()
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+    return DEFAULT_TENANT
+
+
+class FairQueue:
+    """类别之间严格优先、类别内按租户加权公平的等待队列（不加锁，由使用方同步）"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            weights: 租户权重，未列出的租户权重为1，默认使用TENANT_WEIGHTS
+        """
+        self.weights = TENANT_WEIGHTS if weights is None else weights
+        self._queues: Dict[str, Dict[str, Deque[Any]]] = {priority: {} for priority in PRIORITY_CLASSES}
+        self._virtual: Dict[str, Dict[str, float]] = {priority: {} for priority in PRIORITY_CLASSES}
+        self._clock: Dict[str, float] = {priority: 0.0 for priority in PRIORITY_CLASSES}
+
+    def _weight(self, tenant: str) -> float:
+        return max(float(self.weights.get(tenant, 1.0)), 1e-6)
+
+    def push(self, priority: str, tenant: str, item: Any):
+        """将任务加入所属类别与租户的队尾"""
+        queues = self._queues[priority]
+        if tenant not in queues:
+            queues[tenant] = deque()
+            virtual = self._virtual[priority]
+            virtual[tenant] = max(virtual.get(tenant, 0.0), self._clock[priority])
+        queues[tenant].append(item)
+
+    def first(self, is_open: Callable[[str], bool] = lambda priority: True) -> Optional[Tuple[str, str, Any]]:
+        """
+        下一个应被取出的任务（不取出）：最高优先级的非空类别中虚拟时间最小的租户的队首任务
+
+        Args:
+            is_open: 类别当前是否可以取出任务；更高优先级类别有任务排队时，低优先级类别不会越过它
+
+        Returns:
+            (类别, 租户, 任务)，没有可取出的任务时返回None
+        """
+        for priority in PRIORITY_CLASSES:
+            queues = self._queues[priority]
+            if not queues:
+                continue
+            if not is_open(priority):
+                return None
+            tenant = min(queues, key=self._virtual[priority].__getitem__)
+            return priority, tenant, queues[tenant][0]
+        return None
+
+    def pop(self, priority: str, tenant: str) -> Any:
+        """取出租户的队首任务并推进其虚拟时间"""
+        queues = self._queues[priority]
+        item = queues[tenant].popleft()
+        if not queues[tenant]:
+            del queues[tenant]
+        self._clock[priority] = self._virtual[priority][tenant]
+        self._virtual[priority][tenant] += 1.0 / self._weight(tenant)
+        return item
+
+    def remove(self, priority: str, tenant: str, item: Any) -> bool:
+        """移除排队中的任务（等待被取消），返回是否找到"""
+        queue = self._queues[priority].get(tenant)
+        if queue is None or item not in queue:
+            return False
+        queue.remove(item)
+        if not queue:
+            del self._queues[priority][tenant]
+        return True
+
+    def count(self, priority: Optional[str] = None) -> int:
+        """排队任务数（指定类别或全部）"""
+        priorities = PRIORITY_CLASSES if priority is None else (priority,)
+        return sum(len(queue) for p in priorities for queue in self._queues[p].values())
+
+    def items(self, priority: str) -> Iterator[Any]:
+        """类别中所有排队任务"""
+        for queue in self._queues[priority].values():
+            yield from queue
+
+    def by_tenant(self) -> Dict[str, Dict[str, int]]:
+        """各类别中各租户的排队任务数"""
+        return {priority: {tenant: len(queue) for tenant, queue in self._queues[priority].items()}
+                for priority in PRIORITY_CLASSES}
+
+
+class _SlotWaiter:
+    """等待LLM名额的请求"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _set_granted(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMSlotScheduler:
+    """进程级LLM并发名额（线程安全，等待方可以在不同线程的事件循环中）"""
+
+    def __init__(self, max_slots: int = LLM_MAX_CONCURRENCY, batch_max_slots: int = LLM_BATCH_MAX_SLOTS,
+                 weights: Optional[Dict[str, float]] = None):
+        """
+        初始化名额调度
+
+        Args:
+            max_slots: 同时进行的LLM请求数上限，0表示不限
+            batch_max_slots: batch类别最多占用的名额数
+            weights: 租户权重，默认使用TENANT_WEIGHTS
+        """
+        self.max_slots = max(0, max_slots)
+        self.class_limits = {'interactive': self.max_slots, 'batch': max(1, min(batch_max_slots, self.max_slots))}
+        self.inflight = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._queue = FairQueue(weights)
+        self._lock = threading.Lock()
+
+    def _is_open(self, priority: str) -> bool:
+        return sum(self.inflight.values()) < self.max_slots and self.inflight[priority] < self.class_limits[priority]
+
+    def _wake(self):
+        """按优先级与公平顺序分配空闲名额（持有锁时调用）"""
+        while True:
+            candidate = self._queue.first(self._is_open)
+            if candidate is None:
+                return
+            priority, tenant, waiter = candidate
+            self._queue.pop(priority, tenant)
+            waiter.granted = True
+            self.inflight[priority] += 1
+            try:
+                waiter.loop.call_soon_threadsafe(_set_granted, waiter.future)
+            except RuntimeError:
+                # 等待方的事件循环已关闭，名额立即归还
+                waiter.granted = False
+                self.inflight[priority] -= 1
+
+    async def acquire(self, timeout: Optional[float] = None, job: Optional[JobClass] = None) -> float:
+        """
+        等待一个LLM名额
+
+        Args:
+            timeout: 最长等待秒数，None表示不限
+            job: 任务类别，默认使用当前上下文的类别
+
+        Returns:
+            等待秒数
+
+        Raises:
+            asyncio.TimeoutError: 等待超时
+        """
+        if not self.max_slots:
+            return 0.0
+        job = job or current_job()
+        start = time.time()
+        waiter = _SlotWaiter(asyncio.get_running_loop())
+        with self._lock:
+            self._queue.push(job.priority, job.tenant, waiter)
+            self._wake()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    # 等待被取消的同时恰好获得名额：归还
+                    self.inflight[job.priority] -= 1
+                    self._wake()
+                else:
+                    self._queue.remove(job.priority, job.tenant, waiter)
+            raise
+        waited = time.time() - start
+        LLM_SLOT_WAIT_SECONDS.labels(job.priority).observe(waited)
+        return waited
+
+    def release(self, job: Optional[JobClass] = None):
+        """
+        归还名额
+
+        Args:
+            job: 获取名额时的任务类别，默认使用当前上下文的类别
+        """
+        if not self.max_slots:
+            return
+        job = job or current_job()
+        with self._lock:
+            self.inflight[job.priority] -= 1
+            self._wake()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前名额占用与排队情况"""
+        with self._lock:
+            return {
+                'max_slots': self.max_slots,
+                'class_limits': dict(self.class_limits),
+                'inflight': dict(self.inflight),
+                'queued': self._queue.by_tenant()
+            }
+
+
+# 进程级LLM并发名额
+llm_slots = LLMSlotScheduler()
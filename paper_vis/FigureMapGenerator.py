@@ -8,24 +8,112 @@
 1. 使用ComprehensiveContentExtractor获取按泳道组织的原始文本内容
 2. 使用merge_data.py合并content_list.json和middle.json
 3. 使用FigureTextMatchingPipeline进行图表文本匹配
-4. 根据figure_caption在各泳道原始文本中的存在情况判断图表所属泳道
+4. 根据图表在原文中的位置判断其所属的一级章节及泳道（标题文本搜索作为后备）
 5. 生成最终的figure_map字典
 
+核心特性：
+- 数据合并与图表文本匹配为CPU密集型，通过match_figures_in_pool在常驻进程池中执行，
+  避免与其他阶段的线程争抢GIL；跨进程只传递精简后的middle数据，不传递figure_dict中的base64图片
+- 图表文本匹配不依赖泳道划分，可与标题映射并行；泳道归属（assign_figure_lanes）在泳道章节就绪后执行
+
 核心逻辑：
-- 只有原文中实际存在的图表才会被归类到相应泳道
-- 使用严格完整匹配：清理后的figure_caption必须在某个泳道的原始文本中完整出现
+- content_list与md_content均按阅读顺序排列，DocumentModel一次线性归并即可定位每个图表在md_content中的偏移
+- 图表偏移落在哪个泳道章节区间内，就归属哪个泳道
+- 无法按位置确定时，回退到严格完整匹配：清理后的figure_caption必须在某个泳道的原始文本中完整出现
 - 如果图表标题在多个泳道中都出现，选择第一个匹配的泳道
 - 不是所有图表都会被划分，取决于原文中是否提及
 """
 
+import logging
 import os
 import json
 import glob
 import re
-from typing import Dict, List, Optional
+import atexit
+import threading
+import time
+import multiprocessing
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
 from ComprehensiveContentExtractor import ComprehensiveContentExtractor
 from merge_data import DataMerger
 from FigureTextMatchingPipeline import FigureTextMatchingPipeline
+from DocumentModel import DocumentModel
+from config import FIGURE_POOL_WORKERS
+from Metrics import FIGURE_CPU_SECONDS, set_figure_pool_usage
+from Tracing import record_span, configure_logging
+from Cancellation import current_cancel
+
+logger = logging.getLogger(__name__)
+
+
+# 常驻图表进程池（进程级单例，跨请求复用）
+_figure_process_pool: Optional[ProcessPoolExecutor] = None
+_figure_process_pool_lock = threading.Lock()
+
+# 已提交到进程池且未完成的任务数（用于进程池利用率指标）
+_figure_pool_tasks = 0
+
+# 工作进程内复用的生成器实例
+_worker_generator = None
+
+
+def get_figure_process_pool() -> ProcessPoolExecutor:
+    """获取（必要时创建）常驻图表进程池"""
+    global _figure_process_pool
+    with _figure_process_pool_lock:
+        if _figure_process_pool is None:
+            # 使用spawn避免在多线程的服务进程中fork
+            _figure_process_pool = ProcessPoolExecutor(
+                max_workers=FIGURE_POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=configure_logging
+            )
+        return _figure_process_pool
+
+
+def shutdown_figure_process_pool():
+    """关闭常驻图表进程池"""
+    global _figure_process_pool
+    with _figure_process_pool_lock:
+        if _figure_process_pool is not None:
+            _figure_process_pool.shutdown(wait=False, cancel_futures=True)
+            _figure_process_pool = None
+
+
+def _reset_broken_figure_process_pool(pool: ProcessPoolExecutor):
+    """丢弃已损坏的进程池，下次调用时重建"""
+    global _figure_process_pool
+    with _figure_process_pool_lock:
+        if _figure_process_pool is pool:
+            _figure_process_pool = None
+
+
+atexit.register(shutdown_figure_process_pool)
+
+
+def _update_figure_pool_tasks(delta: int):
+    """更新进程池在途任务数并刷新利用率指标"""
+    global _figure_pool_tasks
+    with _figure_process_pool_lock:
+        _figure_pool_tasks += delta
+        set_figure_pool_usage(_figure_pool_tasks, FIGURE_POOL_WORKERS)
+
+
+def _match_figures_worker(payload: Dict) -> Tuple[Dict, float]:
+    """
+    进程池入口：在工作进程中执行CPU密集的数据合并与图表文本匹配阶段
+
+    Returns:
+        Tuple[Dict, float]: (匹配结果, 工作进程CPU时间)
+    """
+    global _worker_generator
+    cpu_start = time.process_time()
+    if _worker_generator is None:
+        _worker_generator = FigureMapGenerator()
+    result = _worker_generator.match_figures(payload['document'], payload['middle_data'])
+    return result, time.process_time() - cpu_start
 
 
 class FigureMapGenerator:
@@ -37,52 +125,195 @@ class FigureMapGenerator:
         self.data_merger = DataMerger()
         self.figure_pipeline = FigureTextMatchingPipeline()
     
-    def generate_figure_map(self, content_list: List[Dict], middle_data: Dict, figure_dict: Dict[str, str], content_by_lane: Dict[str, str]) -> Dict[str, List[Dict]]:
+    def generate_figure_map(self, content_list: List[Dict], middle_data: Dict, figure_dict: Dict[str, str], content_by_lane: Dict[str, str],
+                            md_content: Optional[str] = None, lane_sections: Optional[List[Dict]] = None,
+                            document: Optional[DocumentModel] = None) -> Dict[str, List[Dict]]:
         """
-        生成综合图表映射
+        生成综合图表映射（在当前进程中执行）
         
         Args:
             content_list: content_list数据
             middle_data: middle数据
             figure_dict: 图表字典 {file_name: base64_data}
             content_by_lane: 按泳道组织的内容
+            md_content: Markdown原文，与lane_sections同时提供时按位置归属泳道
+            lane_sections: 泳道章节区间 [{'lane', 'heading', 'start', 'end'}, ...]
+            document: 已构建的文档模型，提供时不再从content_list和md_content重新构建
         
         Returns:
             Dict[str, List[Dict]]: 按泳道组织的图表映射字典
         """
+        if document is None:
+            document = DocumentModel(md_content or '', content_list)
+        figure_map = self.build_lane_figure_map(
+            document, middle_data, content_by_lane, lane_sections=lane_sections
+        )
+        return self._attach_figure_base64(figure_map, figure_dict)
+    
+    def generate_figure_map_in_pool(self, content_list: List[Dict], middle_data: Dict, figure_dict: Dict[str, str], content_by_lane: Dict[str, str],
+                                    md_content: Optional[str] = None, lane_sections: Optional[List[Dict]] = None,
+                                    document: Optional[DocumentModel] = None) -> Dict[str, List[Dict]]:
+        """
+        生成综合图表映射，CPU密集阶段在常驻进程池中执行
+        
+        跨进程只传递文档模型和精简后的middle数据，泳道归属与base64图片回填在当前进程中完成。
+        进程池不可用时回退到当前进程执行。
+        
+        Args:
+            同generate_figure_map
+        
+        Returns:
+            Dict[str, List[Dict]]: 按泳道组织的图表映射字典
+        """
+        if document is None:
+            document = DocumentModel(md_content or '', content_list)
+        matching_result = self.match_figures_in_pool(document, middle_data)
+        figure_map = self.assign_figure_lanes(matching_result, document, content_by_lane, lane_sections)
+        return self._attach_figure_base64(figure_map, figure_dict)
+    
+    def match_figures_in_pool(self, document: DocumentModel, middle_data: Dict) -> Dict:
+        """
+        在常驻进程池中执行数据合并与图表文本匹配（不依赖泳道划分，可与标题映射并行）
+        
+        Args:
+            document: 文档模型
+            middle_data: middle数据
+        
+        Returns:
+            Dict: FigureTextMatchingPipeline的匹配结果
+        """
+        payload = {
+            'document': document,
+            'middle_data': DataMerger.compact_middle_data(middle_data)
+        }
+        
+        start = time.time()
+        pool = get_figure_process_pool()
+        _update_figure_pool_tasks(1)
+        # 论文被取消时撤回尚未开始执行的任务
+        token = current_cancel()
+        handle = None
         try:
-            print(f"=== 开始处理图表映射 ===")
+            future = pool.submit(_match_figures_worker, payload)
+            if token is not None:
+                handle = token.add_callback(future.cancel)
+            result, cpu_seconds = future.result()
+        except CancelledError:
+            if token is not None:
+                token.raise_if_cancelled("图表文本匹配")
+            raise
+        except BrokenProcessPool as e:
+            logger.warning(f"图表进程池不可用，回退到当前进程执行: {e}")
+            _reset_broken_figure_process_pool(pool)
+            result, cpu_seconds = _match_figures_worker(payload)
+        finally:
+            if token is not None:
+                token.remove_callback(handle)
+            _update_figure_pool_tasks(-1)
+        FIGURE_CPU_SECONDS.labels('matching').observe(cpu_seconds)
+        record_span('figure_matching', 'cpu', start, time.time(), cpu_seconds=cpu_seconds)
+        return result
+    
+    def build_lane_figure_map(self, document: DocumentModel, middle_data: Dict, content_by_lane: Dict[str, str],
+                              lane_sections: Optional[List[Dict]] = None) -> Dict[str, List[Dict]]:
+        """
+        执行图表映射的CPU密集阶段（数据合并、图表文本匹配、泳道归属），不填充base64数据
+        
+        Args:
+            document: 文档模型
+            middle_data: middle数据（可为DataMerger.compact_middle_data的精简结果）
+            content_by_lane: 按泳道组织的内容
+            lane_sections: 泳道章节区间 [{'lane', 'heading', 'start', 'end'}, ...]
+        
+        Returns:
+            Dict[str, List[Dict]]: 按泳道组织的图表映射字典（figure_base64为空）
+        """
+        matching_result = self.match_figures(document, middle_data)
+        return self.assign_figure_lanes(matching_result, document, content_by_lane, lane_sections)
+    
+    def match_figures(self, document: DocumentModel, middle_data: Dict) -> Dict:
+        """
+        数据合并与图表文本匹配
+        
+        Args:
+            document: 文档模型
+            middle_data: middle数据（可为DataMerger.compact_middle_data的精简结果）
+        
+        Returns:
+            Dict: FigureTextMatchingPipeline的匹配结果，异常时返回空字典
+        """
+        try:
+            logger.info(f"=== 开始处理图表映射 ===")
             
-            # 步骤1: 合并数据
-            print("步骤1: 合并content_list和middle数据...")
-            print(f"调试: content_list前3项类型: {[type(item) for item in content_list[:3]]}")
-            merged_data = self.data_merger.merge_data(content_list, middle_data)
+            # 步骤1: 合并数据（位置信息直接写入文档模型的块记录）
+            logger.info("步骤1: 合并content_list和middle数据...")
+            self.data_merger.merge_document(document, middle_data)
             
-            print(f"数据合并完成，共 {len(merged_data)} 条记录")
-            print()
+            logger.info(f"数据合并完成，共 {len(document.blocks)} 条记录")
             
             # 步骤2: 图表文本匹配
-            print("步骤2: 进行图表文本匹配...")
-            matching_result = self.figure_pipeline.process_merged_document(
-                merged_data, figure_dict, "document_id"
-            )
+            logger.info("步骤2: 进行图表文本匹配...")
+            matching_result = self.figure_pipeline.process_document(document, "document_id")
             
-            print("图表匹配完成")
-            print()
+            logger.info("图表匹配完成")
+            return matching_result
             
-            # 步骤3: 根据figure_caption在原始文本中的存在情况判断泳道并生成最终映射
-            print("步骤3: 生成最终图表映射...")
-            figure_map = self._generate_final_figure_map(matching_result, content_by_lane, figure_dict)
+        except Exception as e:
+            logger.error(f"图表文本匹配过程中发生异常: {e}")
+            return {}
+    
+    def assign_figure_lanes(self, matching_result: Dict, document: DocumentModel, content_by_lane: Dict[str, str],
+                            lane_sections: Optional[List[Dict]] = None) -> Dict[str, List[Dict]]:
+        """
+        按文档位置（或figure_caption文本搜索）判断泳道并生成最终映射，不填充base64数据
+        
+        Args:
+            matching_result: 图表匹配结果
+            document: 文档模型（提供图表在md_content中的偏移）
+            content_by_lane: 按泳道组织的内容
+            lane_sections: 泳道章节区间 [{'lane', 'heading', 'start', 'end'}, ...]
+        
+        Returns:
+            Dict[str, List[Dict]]: 按泳道组织的图表映射字典（figure_base64为空）
+        """
+        start, cpu_start = time.time(), time.thread_time()
+        try:
+            logger.info("步骤3: 生成最终图表映射...")
+            position_lanes = {}
+            if lane_sections:
+                figure_offsets = document.figure_offsets()
+                position_lanes = self._assign_lanes_by_position(figure_offsets, lane_sections)
+                logger.info(f"按位置定位 {len(figure_offsets)} 个图表，其中 {len(position_lanes)} 个落在泳道章节内")
+            figure_map = self._generate_final_figure_map(matching_result, content_by_lane, {}, position_lanes)
             
-            print("=== 图表映射生成完成 ===")
+            logger.info("=== 图表映射生成完成 ===")
+            cpu_seconds = time.thread_time() - cpu_start
+            FIGURE_CPU_SECONDS.labels('assign_lanes').observe(cpu_seconds)
+            record_span('assign_figure_lanes', 'cpu', start, time.time(), cpu_seconds=cpu_seconds)
             return figure_map
             
         except Exception as e:
-            print(f"生成图表映射过程中发生异常: {e}")
+            logger.error(f"生成图表映射过程中发生异常: {e}")
             return {}
     
+    def _attach_figure_base64(self, figure_map: Dict[str, List[Dict]], figure_dict: Dict[str, str]) -> Dict[str, List[Dict]]:
+        """
+        为图表映射回填figure_dict中的base64数据
+        
+        Args:
+            figure_map: 按泳道组织的图表映射字典
+            figure_dict: 图表字典 {file_name: base64_data}
+        
+        Returns:
+            Dict[str, List[Dict]]: 回填后的图表映射字典
+        """
+        for figures in figure_map.values():
+            for figure_data in figures:
+                figure_data['figure_base64'] = figure_dict.get(figure_data.get('figure_id', ''), '')
+        return figure_map
     
-    def _generate_final_figure_map(self, matching_result: Dict, content_by_lane: Dict[str, str], figure_dict: Dict[str, str]) -> Dict[str, List[Dict]]:
+    def _generate_final_figure_map(self, matching_result: Dict, content_by_lane: Dict[str, str], figure_dict: Dict[str, str],
+                                   position_lanes: Optional[Dict[str, str]] = None) -> Dict[str, List[Dict]]:
         """
         生成最终的图表映射
         
@@ -90,6 +321,7 @@ class FigureMapGenerator:
             matching_result: 图表匹配结果
             content_by_lane: 按泳道组织的内容
             figure_dict: 图表字典 {file_name: base64_data}
+            position_lanes: 按位置确定的泳道归属 {figure_id: 泳道名称}
         
         Returns:
             Dict[str, List[Dict]]: 最终的图表映射字典
@@ -102,7 +334,7 @@ class FigureMapGenerator:
         }
         
         if 'results' not in matching_result:
-            print("错误: 匹配结果中缺少results字段")
+            logger.error("匹配结果中缺少results字段")
             return figure_map
         
         for figure_info in matching_result['results']:
@@ -110,8 +342,10 @@ class FigureMapGenerator:
             figure_id = figure_info.get('figure_id', '')
             matches = figure_info.get('matches', [])
             
-            # 根据figure_caption和figure_id判断所属泳道
-            assigned_lane = self._determine_figure_lane(figure_caption, figure_id, content_by_lane)
+            # 优先使用位置归属，否则根据figure_caption和figure_id判断所属泳道
+            assigned_lane = (position_lanes or {}).get(figure_id)
+            if assigned_lane not in figure_map:
+                assigned_lane = self._determine_figure_lane(figure_caption, figure_id, content_by_lane)
             
             if assigned_lane:
                 # 提取reference_text列表
@@ -129,17 +363,48 @@ class FigureMapGenerator:
                 }
                 
                 figure_map[assigned_lane].append(figure_data)
-                print(f"图表 {figure_id} 分配到泳道: {assigned_lane}")
+                logger.info(f"图表 {figure_id} 分配到泳道: {assigned_lane}")
             else:
-                print(f"警告: 无法确定图表 {figure_id} 的泳道归属")
+                logger.warning(f"警告: 无法确定图表 {figure_id} 的泳道归属")
         
         # 打印统计信息
-        print("\n=== 图表映射统计 ===")
+        logger.info("=== 图表映射统计 ===")
         for lane, figures in figure_map.items():
-            print(f"{lane}: {len(figures)} 个图表")
+            logger.info(f"{lane}: {len(figures)} 个图表")
         
         return figure_map
     
+    def _assign_lanes_by_position(self, figure_offsets: Dict[str, int], lane_sections: List[Dict]) -> Dict[str, str]:
+        """
+        将图表偏移与泳道章节区间做一次有序归并，确定每个图表所在的泳道
+        
+        Args:
+            figure_offsets: {figure_id: 偏移}
+            lane_sections: 泳道章节区间 [{'lane', 'heading', 'start', 'end'}, ...]
+        
+        Returns:
+            Dict[str, str]: {figure_id: 泳道名称}，不在任何泳道章节内的图表不出现在结果中
+        """
+        sections = sorted(
+            (s for s in lane_sections if s.get('end', 0) > s.get('start', 0)),
+            key=lambda s: s['start']
+        )
+        figures: List[Tuple[int, str]] = sorted((offset, figure_id) for figure_id, offset in figure_offsets.items())
+        
+        assigned = {}
+        section_idx = 0
+        for offset, figure_id in figures:
+            while section_idx < len(sections) and sections[section_idx]['end'] <= offset:
+                section_idx += 1
+            if section_idx == len(sections):
+                break
+            section = sections[section_idx]
+            if section['start'] <= offset:
+                assigned[figure_id] = section['lane']
+                logger.info(f"   ✓ 图表 {figure_id} 位于章节 '{section['heading']}' -> {section['lane']}")
+        
+        return assigned
+    
     def _determine_figure_lane(self, figure_caption: str, figure_id: str, content_by_lane: Dict[str, str]) -> Optional[str]:
         """
         根据figure_caption和figure_id在原始文本中的存在情况确定图表所属的泳道
@@ -166,22 +431,22 @@ class FigureMapGenerator:
             
             # 检查figure_caption是否在该泳道的原始文本中出现
             if self._is_caption_in_content(caption_clean, lane_content):
-                print(f"   ✓ 在泳道 '{lane_name}' 中找到图表标题")
+                logger.info(f"   ✓ 在泳道 '{lane_name}' 中找到图表标题")
                 return lane_name
         
         # 如果标题匹配失败，尝试根据figure_id（文件名）匹配
-        print(f"   🔄 尝试根据文件名匹配: {figure_id}")
+        logger.debug(f"   🔄 尝试根据文件名匹配: {figure_id}")
         for lane_name, lane_content in content_by_lane.items():
             if not lane_content:
                 continue
             
             # 检查文件名是否在该泳道的原始文本中出现
             if figure_id.lower() in lane_content.lower():
-                print(f"   ✓ 在泳道 '{lane_name}' 中找到文件名")
+                logger.info(f"   ✓ 在泳道 '{lane_name}' 中找到文件名")
                 return lane_name
         
         # 如果文件名匹配也失败，尝试根据图表编号匹配
-        print(f"   🔄 尝试根据图表编号匹配")
+        logger.debug(f"   🔄 尝试根据图表编号匹配")
         import re
         number_match = re.search(r'(\d+)', figure_id)
         if number_match:
@@ -192,10 +457,10 @@ class FigureMapGenerator:
                 
                 # 检查图表编号是否在该泳道的原始文本中出现
                 if f"figure {figure_number}" in lane_content.lower() or f"table {figure_number}" in lane_content.lower():
-                    print(f"   ✓ 在泳道 '{lane_name}' 中找到图表编号 {figure_number}")
+                    logger.info(f"   ✓ 在泳道 '{lane_name}' 中找到图表编号 {figure_number}")
                     return lane_name
         
-        print(f"   ⚠️ 未在任何泳道的原始文本中找到图表标题或文件名")
+        logger.warning(f"   ⚠️ 未在任何泳道的原始文本中找到图表标题或文件名")
         return None
     
     def _clean_figure_caption(self, caption: str) -> str:
@@ -1,8 +1,12 @@
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from SentenceSegmenter import SentenceSegmenter
 
 class FigureReferenceExtractor:
     def __init__(self):
+        self.segmenter = SentenceSegmenter()
+        
         # 全面的图片引用模式 - 覆盖所有可能的变体
         self.figure_patterns = [
             # 基础英文模式
@@ -113,14 +117,25 @@ class FigureReferenceExtractor:
             r'\b(?:Based on|based on)\s+(?:Table|Tab\.|TABLE\.?|table|tab\.?)\s*(\d+)',
         ]
     
-    def extract_references(self, text: str) -> List[Dict]:
-        """提取文本中的图表引用 - 简化版本，只匹配明确编号"""
-        sentences = self._split_sentences(text)
+    def extract_references(self, text: str, sentence_spans: Optional[List[Tuple[int, int]]] = None) -> List[Dict]:
+        """
+        提取文本中的图表引用 - 简化版本，只匹配明确编号
+        
+        Args:
+            text: 文本块内容
+            sentence_spans: 预先切分好的句子偏移（如DocumentBlock缓存的结果），为空时现场切分
+            
+        Returns:
+            List[Dict]: 引用列表，sentence_start/sentence_end为句子在text中的偏移
+        """
+        if sentence_spans is None:
+            sentence_spans = self.segmenter.split_spans(text)
         references = []
         
-        for sent_idx, sentence in enumerate(sentences):
+        for sent_idx, (start, end) in enumerate(sentence_spans):
+            sentence = text[start:end]
             # 跳过太短的句子
-            if len(sentence.strip()) < 10:
+            if len(sentence) < 10:
                 continue
                 
             # 检查图片引用
@@ -129,8 +144,10 @@ class FigureReferenceExtractor:
                 for match in matches:
                     number = match.group(1)
                     references.append({
-                        'sentence': sentence.strip(),
+                        'sentence': sentence,
                         'sentence_idx': sent_idx,
+                        'sentence_start': start,
+                        'sentence_end': end,
                         'ref_type': 'figure',
                         'number': number,
                         'match_text': match.group()
@@ -142,8 +159,10 @@ class FigureReferenceExtractor:
                 for match in matches:
                     number = match.group(1)
                     references.append({
-                        'sentence': sentence.strip(),
+                        'sentence': sentence,
                         'sentence_idx': sent_idx,
+                        'sentence_start': start,
+                        'sentence_end': end,
                         'ref_type': 'table',
                         'number': number,
                         'match_text': match.group()
@@ -152,28 +171,5 @@ class FigureReferenceExtractor:
         return references
     
     def _split_sentences(self, text: str) -> List[str]:
-        """智能句子分割 - 避免在图表引用处错误分割"""
-        # 先保护图表引用，避免在Fig. Table.等处分割
-        protected_text = text
-        
-        # 保护常见的图表引用模式 - 替换句号避免分割
-        protection_patterns = [
-            (r'\b(Fig\.)\s*(\d+)', r'\1___SPACE___\2'),
-            (r'\b(Table\.)\s*(\d+)', r'\1___SPACE___\2'),
-            (r'\b(Tab\.)\s*(\d+)', r'\1___SPACE___\2'),
-        ]
-        
-        for pattern, replacement in protection_patterns:
-            protected_text = re.sub(pattern, replacement, protected_text, flags=re.IGNORECASE)
-        
-        # 现在进行句子分割
-        sentences = re.split(r'[.!?]\s+', protected_text)
-        
-        # 恢复保护的图表引用
-        restored_sentences = []
-        for sentence in sentences:
-            sentence = sentence.replace('___SPACE___', ' ')
-            if sentence.strip():
-                restored_sentences.append(sentence.strip())
-        
-        return restored_sentences
\ No newline at end of file
+        """智能句子分割 - 避免在图表引用及常见缩写处错误分割"""
+        return self.segmenter.split(text)
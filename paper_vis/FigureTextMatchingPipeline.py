@@ -1,31 +1,75 @@
+import logging
 from typing import List, Dict, Optional
+
+import numpy as np
+
 from FigureReferenceExtractor import FigureReferenceExtractor
 from EnhancementModules import EnhancementModules
 
+logger = logging.getLogger(__name__)
+
 class FigureTextMatchingPipeline:
     def __init__(self):
         self.extractor = FigureReferenceExtractor()
     
     def process_merged_document(self, merged_data: List[Dict], figure_dict: Dict[str, str], document_id: str = None) -> Dict:
         """处理合并后的文档数据，进行图表文本匹配"""
-        print("开始图表匹配处理...")
-        print(f"调试: merged_data前3项类型: {[type(item) for item in merged_data[:3]]}")
+        logger.info("开始图表匹配处理...")
+        logger.debug(f"调试: merged_data前3项类型: {[type(item) for item in merged_data[:3]]}")
         
         # 1. 从merged_data中提取图表信息（使用image_caption和table_caption字段）
         figures = self._extract_figures_from_merged_data(merged_data)
-        print(f"发现内容:\n  - 图片: {sum(1 for f in figures if f.get('type') == 'image')} 个")
-        print(f"  - 表格: {sum(1 for f in figures if f.get('type') == 'table')} 个")
-        print(f"  - 总计: {len(figures)} 个")
+        logger.info(f"发现内容:\n  - 图片: {sum(1 for f in figures if f.get('type') == 'image')} 个")
+        logger.info(f"  - 表格: {sum(1 for f in figures if f.get('type') == 'table')} 个")
+        logger.info(f"  - 总计: {len(figures)} 个")
         
         # 2. 从merged_data中提取引用（保留位置信息）
         references = self._extract_references_from_merged_data(merged_data)
-        print(f"提取到 {len(references)} 个引用")
+        logger.info(f"提取到 {len(references)} 个引用")
         
         
-        # 3. 为每个图表进行匹配
+        # 3. 批量计算位置得分，为每个图表进行匹配
         results = []
-        for fig in figures:
-            figure_matches = self._match_figure_with_references(fig, references)
+        for fig, figure_matches in zip(figures, self._match_figures_with_references(figures, references)):
+            results.append({
+                'figure_id': fig['figure_id'],
+                'figure_caption': fig['caption'],
+                'figure_type': fig['type'],
+                'page_idx': fig['page_idx'],
+                'matches': figure_matches
+            })
+        
+        return self._format_output(results, document_id)
+    
+    def process_document(self, document, document_id: str = None) -> Dict:
+        """处理文档模型（DocumentModel），进行图表文本匹配"""
+        logger.info("开始图表匹配处理（文档模型）...")
+        
+        # 1. 图表与文本块直接取自文档模型中预先分好的视图
+        figures = [
+            {
+                'figure_id': block.figure_id or 'unknown',
+                'caption': block.caption,
+                'type': block.type,
+                'page_idx': block.page_idx,
+                'bbox': block.bbox
+            }
+            for block in document.figure_blocks if block.caption
+        ]
+        logger.info(f"发现内容:\n  - 图片: {sum(1 for f in figures if f['type'] == 'image')} 个")
+        logger.info(f"  - 表格: {sum(1 for f in figures if f['type'] == 'table')} 个")
+        logger.info(f"  - 总计: {len(figures)} 个")
+        
+        # 2. 提取引用（保留位置信息）
+        logger.debug(f"🔍 从 {len(document.text_blocks)} 个文本块中提取引用")
+        references = self._collect_references(
+            (block.text, block.page_idx, block.bbox, block.sentence_spans()) for block in document.text_blocks
+        )
+        logger.info(f"提取到 {len(references)} 个引用")
+        
+        # 3. 批量计算位置得分，为每个图表进行匹配
+        results = []
+        for fig, figure_matches in zip(figures, self._match_figures_with_references(figures, references)):
             results.append({
                 'figure_id': fig['figure_id'],
                 'figure_caption': fig['caption'],
@@ -90,7 +134,7 @@ class FigureTextMatchingPipeline:
                 image_path = item.get('img_path', '')
                 figure_id = self._extract_id_from_path(image_path)
                 
-                print(f"📷 提取图片 - 路径: {image_path}, ID: {figure_id}")
+                logger.debug(f"📷 提取图片 - 路径: {image_path}, ID: {figure_id}")
                 
                 figures.append({
                     'figure_id': figure_id,
@@ -110,7 +154,7 @@ class FigureTextMatchingPipeline:
                 table_path = item.get('img_path', '')
                 table_id = self._extract_id_from_path(table_path)
                 
-                print(f"📋 提取表格 - 路径: {table_path}, ID: {table_id}")
+                logger.debug(f"📋 提取表格 - 路径: {table_path}, ID: {table_id}")
                 
                 figures.append({
                     'figure_id': table_id,
@@ -124,41 +168,33 @@ class FigureTextMatchingPipeline:
     
     def _extract_references_from_merged_data(self, merged_data: List[Dict]) -> List[Dict]:
         """从merged_data中提取引用，保留位置信息"""
-        references = []
-        
-        for item in merged_data:
-            # 只处理文本类型的数据
-            if item.get('type') == 'text' and item.get('text'):
-                text = item['text']
-                page_idx = item.get('page_idx', 0)
-                bbox = item.get('bbox')
-            else:
-                continue
-            
-            # 使用引用提取器找到引用
-            text_references = self.extractor.extract_references(text)
-            
-            # 为每个引用添加位置信息
-            for ref in text_references:
-                ref['page_idx'] = page_idx
-                ref['bbox'] = bbox
-                references.append(ref)
+        text_blocks = [item for item in merged_data if isinstance(item, dict) and item.get('type') == 'text' and item.get('text')]
+        logger.debug(f"🔍 从 {len(text_blocks)} 个文本块中提取引用")
         
-        text_blocks = [item for item in merged_data if isinstance(item, str) or (isinstance(item, dict) and item.get('type') == 'text')]
-        print(f"🔍 从 {len(text_blocks)} 个文本块中提取引用")
-        
-        # 去重：移除重复的引用
+        return self._collect_references(
+            (item['text'], item.get('page_idx', 0), item.get('bbox'), None) for item in text_blocks
+        )
+    
+    def _collect_references(self, text_items) -> List[Dict]:
+        """从(text, page_idx, bbox, sentence_spans)序列中提取引用并去重，sentence_spans为空时现场切分"""
         unique_references = []
         seen_refs = set()
         
-        for ref in references:
-            # 使用句子+编号+类型作为唯一键
-            ref_key = (ref['sentence'].strip(), ref['number'], ref['ref_type'])
-            if ref_key not in seen_refs:
+        for text, page_idx, bbox, sentence_spans in text_items:
+            # 使用引用提取器找到引用
+            for ref in self.extractor.extract_references(text, sentence_spans):
+                # 去重：使用句子+编号+类型作为唯一键
+                ref_key = (ref['sentence'].strip(), ref['number'], ref['ref_type'])
+                if ref_key in seen_refs:
+                    continue
                 seen_refs.add(ref_key)
+                
+                # 为每个引用添加位置信息
+                ref['page_idx'] = page_idx
+                ref['bbox'] = bbox
                 unique_references.append(ref)
         
-        print(f"📝 去重后剩余 {len(unique_references)} 个唯一引用")
+        logger.debug(f"📝 去重后剩余 {len(unique_references)} 个唯一引用")
         return unique_references
     
     def _extract_id_from_path(self, path: str) -> str:
@@ -173,82 +209,76 @@ class FigureTextMatchingPipeline:
     
     def _match_figure_with_references(self, figure: Dict, references: List[Dict]) -> List[Dict]:
         """为单个图表匹配相关引用 - 基于编号匹配"""
-        print(f"调试: figure类型: {type(figure)}, 内容: {figure}")
-        # 从标题中提取编号
-        figure_number = EnhancementModules.extract_figure_number_from_caption(figure['caption'])
-        figure_type = EnhancementModules.extract_figure_type_from_caption(figure['caption'])
-        
-        if not figure_number:
-            print(f"⚠️  无法从标题中提取编号: {figure['caption'][:50]}...")
+        return self._match_figures_with_references([figure], references)[0]
+    
+    def _match_figures_with_references(self, figures: List[Dict], references: List[Dict]) -> List[List[Dict]]:
+        """为所有图表匹配相关引用 - 编号/类型过滤后，位置权重一次性批量计算"""
+        if not figures:
             return []
         
-        print(f"🔍 匹配 {figure_type} {figure_number}: {figure['caption'][:50]}...")
-        
-        matches = []
-        seen_sentences = set()  # 用于去重
+        # 所有图表-引用对的页面距离、上下关系和权重一次算出
+        scores = EnhancementModules.score_position_batch(
+            [fig.get('page_idx', 0) for fig in figures],
+            EnhancementModules.bboxes_to_array([fig.get('bbox') for fig in figures]),
+            [ref.get('page_idx', 0) for ref in references],
+            EnhancementModules.bboxes_to_array([ref.get('bbox') for ref in references])
+        )
+        ref_numbers = np.array([ref['number'] for ref in references], dtype=object)
+        ref_types = np.array([ref['ref_type'] for ref in references], dtype=object)
         
-        for ref in references:
-            # 严格的编号和类型匹配
-            if (ref['number'] == figure_number and 
-                ref['ref_type'] == figure_type):
-                
-                # 去重：避免同一个句子被多次匹配
-                sentence_key = ref['sentence'].strip()
+        all_matches = []
+        for i, figure in enumerate(figures):
+            # 从标题中提取编号
+            figure_number = EnhancementModules.extract_figure_number_from_caption(figure['caption'])
+            figure_type = EnhancementModules.extract_figure_type_from_caption(figure['caption'])
+            
+            if not figure_number:
+                logger.warning(f"⚠️  无法从标题中提取编号: {figure['caption'][:50]}...")
+                all_matches.append([])
+                continue
+            
+            logger.debug(f"🔍 匹配 {figure_type} {figure_number}: {figure['caption'][:50]}...")
+            
+            # 严格的编号和类型匹配，按引用原始顺序去重：避免同一个句子被多次匹配
+            candidates = []
+            seen_sentences = set()
+            for j in np.flatnonzero((ref_numbers == figure_number) & (ref_types == figure_type)):
+                sentence_key = references[j]['sentence'].strip()
                 if sentence_key in seen_sentences:
                     continue
                 seen_sentences.add(sentence_key)
-                
-                # 计算位置权重（支持bbox上下方向判断）
-                position_weight = self._calculate_position_weight(figure, ref)
-                
+                candidates.append(j)
+            
+            # 按位置权重排序
+            weights = scores['weight'][i]
+            matches = []
+            for j in EnhancementModules.rank_candidates(weights, candidates):
+                ref = references[j]
                 matches.append({
                     'reference_text': ref['sentence'],
                     'match_text': ref['match_text'],
-                    'page_distance': abs(figure['page_idx'] - ref.get('page_idx', 0)),
-                    'position_weight': position_weight,
-                    'confidence_score': position_weight  # 简化的置信度分数
+                    'page_distance': int(scores['page_distance'][i, j]),
+                    'position_weight': float(weights[j]),
+                    'confidence_score': float(weights[j])  # 简化的置信度分数
                 })
+            
+            if candidates:
+                relation = scores['relation'][i, candidates]
+                logger.debug(f"   📍 同页引用: 上方 {int(np.sum(relation == 1))} 个, 下方 {int(np.sum(relation == -1))} 个")
+            logger.debug(f"   找到 {len(matches)} 个匹配")
+            all_matches.append(matches)
         
-        # 按位置权重排序
-        matches.sort(key=lambda x: x['position_weight'], reverse=True)
-        
-        print(f"   找到 {len(matches)} 个匹配")
-        return matches
+        return all_matches
     
     def _calculate_position_weight(self, figure: Dict, reference: Dict) -> float:
         """计算位置权重 - 支持同页面内的上下方向和跨页面距离"""
-        fig_page = figure.get('page_idx', 0)
-        ref_page = reference.get('page_idx', 0)
-        
-        # 跨页面的情况：使用页面距离权重
-        if fig_page != ref_page:
-            page_distance = abs(fig_page - ref_page)
-            if page_distance == 1:
-                return 0.8  # 相邻页高权重
-            elif page_distance <= 3:
-                return 0.6  # 近距离页面中等权重
-            else:
-                return 0.3  # 远距离页面低权重
-        
-        # 同页面的情况：使用bbox位置判断上下关系
-        fig_bbox = figure.get('bbox')
-        ref_bbox = reference.get('bbox')
-        
-        if fig_bbox and ref_bbox and len(fig_bbox) >= 4 and len(ref_bbox) >= 4:
-            # bbox格式: [x1, y1, x2, y2]
-            fig_y = fig_bbox[1]  # 图片的顶部y坐标
-            ref_y = ref_bbox[1]  # 引用文本的顶部y坐标
-            
-            # PDF坐标系：y坐标越小越靠上
-            if ref_y < fig_y:
-                print(f"   📍 引用在图片上方 (ref_y: {ref_y} < fig_y: {fig_y})")
-                return 1.0  # 图片上方的引用（预先引用）
-            else:
-                print(f"   📍 引用在图片下方 (ref_y: {ref_y} > fig_y: {fig_y})")
-                return 1.0  # 图片下方的引用（后续说明）
-        else:
-            print(f"   ⚠️ 缺少bbox信息，使用默认同页权重")
-            return 1.0  # 同页面但无法确定上下关系，给予最高权重
+        scores = EnhancementModules.score_position_batch(
+            [figure.get('page_idx', 0)],
+            EnhancementModules.bboxes_to_array([figure.get('bbox')]),
+            [reference.get('page_idx', 0)],
+            EnhancementModules.bboxes_to_array([reference.get('bbox')])
+        )
+        return float(scores['weight'][0, 0])
     
     def _format_output(self, results: List[Dict], document_id: str = None) -> Dict:
         """格式化输出结果"""
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+四大泳道合并调用
+将Context & Related Work、Methodology & Setup、Results & Analysis、Conclusion的文本放在一次请求中，
+要求返回以泳道名称为键的单个JSON对象，再用各泳道原有的校验函数逐一校验
+
+核心特性：
+- 四个泳道共用的系统提示词只发送一次，四次往返减少为一次
+- 只返回通过校验的泳道，未通过的泳道由调用方单独重新请求
+- 截止时间到达时抛出DeadlineExceeded
+"""
+
+import logging
+import asyncio
+from typing import Any, Dict, Optional
+
+from LLMClient import request_json, trim_key_points, DeadlineExceeded, stage_settings
+from ContextRelatedWork import SYSTEM_PROMPT, OUTPUT_MAX_TOKENS, validate_context_json
+from MethodologySetup import validate_methodology_json
+from ResultsAnalysis import validate_results_json
+from Conclusion import validate_conclusion_json
+from config import MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# 可合并的泳道及其校验函数
+FUSED_LANE_VALIDATORS = {
+    'Context & Related Work': validate_context_json,
+    'Methodology & Setup': validate_methodology_json,
+    'Results & Analysis': validate_results_json,
+    'Conclusion': validate_conclusion_json
+}
+
+FUSED_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+
+**[Multi-Lane Mode]**
+You will receive the section texts of several lanes of the SAME paper. Execute the task above independently for each lane,
+using only that lane's text. Output ONE JSON object whose keys are exactly the given lane names and whose values are the
+key-point JSON objects for those lanes."""
+
+FUSED_USER_PROMPT_TEMPLATE = """Please execute your multi-step reasoning task for each of the following lanes: {lane_names}.
+
+{sections}
+
+**[Expected JSON Structure Example]**
+{{
+  "{first_lane}": {{
+    "Dynamic Title 1": "The English summary corresponding to this title, not exceeding 60 words.",
+    "Dynamic Title 2": "The English summary corresponding to this title, not exceeding 60 words.",
+    "Dynamic Title 3": "The English summary corresponding to this title, not exceeding 60 words."
+  }}
+  // ... one entry per lane, 3 to 5 keys each
+}}"""
+
+SECTION_TEMPLATE = """**[Section Text for the {lane_name} Lane]**
+{text}"""
+
+
+def _trim_fused(result: Any) -> Any:
+    """逐泳道裁剪超长值与多余键"""
+    if not isinstance(result, dict):
+        return result
+    return {lane_name: trim_key_points(value) for lane_name, value in result.items()}
+
+
+def valid_fused_lanes(result: Any) -> Dict[str, Dict[str, str]]:
+    """
+    按各泳道的校验函数筛选合并结果
+
+    Args:
+        result: 合并调用返回的JSON对象
+
+    Returns:
+        通过校验的 {泳道名称: 关键点字典}
+    """
+    if not isinstance(result, dict):
+        return {}
+    return {
+        lane_name: value for lane_name, value in result.items()
+        if lane_name in FUSED_LANE_VALIDATORS and isinstance(value, dict) and FUSED_LANE_VALIDATORS[lane_name](value)
+    }
+
+
+async def call_fused_lanes(lane_texts: Dict[str, str], max_retries: int = MAX_RETRIES,
+                           deadline: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+    """
+    一次请求分析多个泳道
+
+    Args:
+        lane_texts: {泳道名称: 文本}，仅包含FUSED_LANE_VALIDATORS中的泳道
+        max_retries: 最大重试次数（没有任何泳道通过校验时重试）
+        deadline: 截止时间（time.time()时间戳），None表示不限
+
+    Returns:
+        通过校验的 {泳道名称: 关键点字典}，可能只包含部分泳道
+
+    Raises:
+        DeadlineExceeded: 截止时间已到
+    """
+    lane_names = list(lane_texts)
+    sections = '\n\n'.join(SECTION_TEMPLATE.format(lane_name=name, text=text) for name, text in lane_texts.items())
+    messages = [
+        {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+        {"role": "user", "content": FUSED_USER_PROMPT_TEMPLATE.format(
+            lane_names=', '.join(lane_names), sections=sections, first_lane=lane_names[0]
+        )}
+    ]
+
+    result = await request_json(
+        messages,
+        validator=lambda value: bool(valid_fused_lanes(value)),
+        max_retries=max_retries,
+        deadline=deadline,
+        label="Fused Lanes",
+        json_mode=True,
+        normalizer=_trim_fused,
+        max_keys=len(lane_names),
+        # 输出上限：每个泳道一份关键点schema
+        **stage_settings('fused_lanes', OUTPUT_MAX_TOKENS * len(lane_names))
+    )
+    return valid_fused_lanes(result)
+
+
+def analyze_fused_lanes_sync(lane_texts: Dict[str, str], max_retries: int = MAX_RETRIES,
+                             deadline: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+    """
+    同步版本的合并泳道分析函数
+
+    Args:
+        lane_texts: {泳道名称: 文本}
+        max_retries: 最大重试次数
+        deadline: 截止时间（time.time()时间戳），None表示不限
+
+    Returns:
+        通过校验的 {泳道名称: 关键点字典}，失败返回空字典
+
+    Raises:
+        DeadlineExceeded: 截止时间已到
+    """
+    try:
+        return asyncio.run(call_fused_lanes(lane_texts, max_retries, deadline))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.warning(f"合并泳道调用失败: {e}")
+        return {}
@@ -4,8 +4,8 @@
 基于PDF解析结果和泳道内容提取进行创新机会识别
 """
 
+import logging
 import json
-import requests
 import sys
 import os
 from typing import Dict, Any, Optional
@@ -13,7 +13,10 @@ from typing import Dict, Any, Optional
 # 添加functions目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'functions'))
 
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL, MAX_RETRIES, MAX_TOKENS, TEMPERATURE
+from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, MAX_RETRIES, LLM_HEDGING
+from LLMClient import request_json_sync, DeadlineExceeded, schema_max_tokens, stage_settings
+
+logger = logging.getLogger(__name__)
 
 class InnovationDiscovery:
     """学术创新机会发现类"""
@@ -22,10 +25,12 @@ class InnovationDiscovery:
         """初始化创新发现类"""
         self.api_key = DEEPSEEK_API_KEY
         self.api_url = DEEPSEEK_API_URL
-        self.model = DEEPSEEK_MODEL
+        # 输出上限：5个创新机会 ×（5词标题 + 120词描述）
+        settings = stage_settings('innovation', schema_max_tokens(items=5, words_per_item=120, title_words=5))
+        self.model = settings['model']
         self.max_retries = MAX_RETRIES
-        self.max_tokens = MAX_TOKENS
-        self.temperature = TEMPERATURE
+        self.max_tokens = settings['max_tokens']
+        self.temperature = settings['temperature']
 
     def _build_prompt_for_raw_texts(self, abstract_excerpt: str, conclusion_text: str) -> str:
         """构造面向两段原始文本的提示词（不依赖结构化输入）。"""
@@ -68,73 +73,48 @@ Formatting rules:
 """
 
 
-    def call_innovation_discovery_from_raw(self, abstract_excerpt: str, conclusion_text: str) -> Dict[str, Any]:
-        """调用创新机会发现API（使用两段原始文本）。"""
+    def call_innovation_discovery_from_raw(self, abstract_excerpt: str, conclusion_text: str,
+                                           deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """调用创新机会发现API（使用两段原始文本），deadline为截止时间（time.time()时间戳）。"""
         prompt = self._build_prompt_for_raw_texts(abstract_excerpt or "", conclusion_text or "")
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": self.max_tokens,
-            "temperature": self.temperature
-        }
-        
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.post(self.api_url, headers=headers, json=payload, timeout=30)
-                response.raise_for_status()
-                result = response.json()
-                content = result['choices'][0]['message']['content'].strip()
-
-                if content.startswith('```json'):
-                    content = content[7:]
-                if content.endswith('```'):
-                    content = content[:-3]
-                content = content.strip()
-                
-                return json.loads(content)
-            except requests.exceptions.RequestException as e:
-                print(f"API请求失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                if attempt == self.max_retries - 1:
-                    raise
-            except json.JSONDecodeError as e:
-                print(f"JSON解析失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                print(f"原始响应: {content}")
-                if attempt == self.max_retries - 1:
-                    raise
-            except Exception as e:
-                print(f"未知错误 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                if attempt == self.max_retries - 1:
-                    raise
-
-
-    def analyze_innovation_discovery_sync(self, input_bundle: str) -> Optional[Dict[str, Any]]:
+        return request_json_sync(
+            [{"role": "user", "content": prompt}],
+            validator=validate_innovation_json,
+            max_retries=self.max_retries - 1,
+            deadline=deadline,
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            label="Innovation Discovery",
+            hedge=LLM_HEDGING,
+            json_mode=True,
+            max_keys=5
+        )
+
+
+    def analyze_innovation_discovery_sync(self, input_bundle: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         同步分析入口：接收 LaneExtractor 传入的字符串（JSON），包含两段原始文本：
         - abstract_excerpt: 摘要前5000字符
         - conclusion_text: 结论原文
-        返回：符合 schema 的 JSON 对象；失败返回 None。
+        返回：符合 schema 的 JSON 对象；失败返回 None；截止时间已到时抛出 DeadlineExceeded。
         """
         try:
             data = json.loads(input_bundle) if input_bundle else {}
             abstract_excerpt = data.get('abstract_excerpt', '')
             conclusion_text = data.get('conclusion_text', '')
         except Exception as e:
-            print(f"输入解析失败: {e}")
+            logger.warning(f"输入解析失败: {e}")
             abstract_excerpt, conclusion_text = "", ""
 
         try:
-            result = self.call_innovation_discovery_from_raw(abstract_excerpt, conclusion_text)
-            return result if isinstance(result, dict) and len(result.keys()) >= 5 else None
+            result = self.call_innovation_discovery_from_raw(abstract_excerpt, conclusion_text, deadline)
+            return result if validate_innovation_json(result) else None
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"创新发现调用失败: {e}")
+            logger.warning(f"创新发现调用失败: {e}")
             return None
     
     def discover_innovation_opportunities(self, paper_excerpt: str, conclusion_text: str) -> Optional[Dict[str, Any]]:
@@ -150,26 +130,45 @@ Formatting rules:
         """
         try:
             result = self.call_innovation_discovery_from_raw(paper_excerpt, conclusion_text)
-            return result if isinstance(result, dict) and len(result.keys()) >= 5 else None
+            return result if validate_innovation_json(result) else None
         except Exception as e:
-            print(f"创新机会发现失败: {e}")
+            logger.warning(f"创新机会发现失败: {e}")
             return None
 
 
-def analyze_innovation_discovery_sync(input_bundle: str) -> Optional[Dict[str, Any]]:
+def validate_innovation_json(result: Any) -> bool:
+    """
+    验证创新机会JSON结果是否符合要求（至少5个创新机会）
+    
+    Args:
+        result: 要验证的结果
+    
+    Returns:
+        是否符合要求
+    """
+    return isinstance(result, dict) and len(result.keys()) >= 5
+
+
+def analyze_innovation_discovery_sync(input_bundle: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
     """
     独立的同步分析函数，供LaneExtractor调用
     
     Args:
         input_bundle: JSON字符串，包含abstract_excerpt和conclusion_text
+        deadline: 截止时间（time.time()时间戳），None表示不限
     
     Returns:
         创新机会字典，失败返回None
+    
+    Raises:
+        DeadlineExceeded: 截止时间已到
     """
     try:
         discovery = InnovationDiscovery()
-        return discovery.analyze_innovation_discovery_sync(input_bundle)
+        return discovery.analyze_innovation_discovery_sync(input_bundle, deadline)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        print(f"创新机会分析失败: {e}")
+        logger.warning(f"创新机会分析失败: {e}")
         return None
 
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+泳道输入压缩器
+在泳道文本送入LLM之前去除或缩写非正文内容，并按token预算保留信息量最高的段落
+
+功能：
+- 按可配置的规则处理非正文内容：行间公式、HTML表格、图片链接、数字引用与作者-年份引用列表、
+  行内LaTeX命令、重复空白
+- 离线估算token数（LLMClient.count_tokens，不依赖分词器）
+- 超出泳道预算时按段落打分（信息密度、数值结果、关键提示词、章节首段），
+  按原文顺序保留得分最高的段落，标题始终保留
+
+核心特性：
+- 规则以(名称, 正则, 替换)声明，可通过LANE_COMPACTION_RULES按名称启用
+- 预算默认LANE_TOKEN_BUDGET，可通过LANE_TOKEN_BUDGETS按泳道覆盖
+"""
+
+import math
+import re
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from LLMClient import count_tokens
+from config import LANE_COMPACTION_RULES, LANE_TOKEN_BUDGET, LANE_TOKEN_BUDGETS
+
+
+def _simplify_inline_math(match: re.Match) -> str:
+    """行内公式：简单表达式去掉LaTeX命令保留为纯文本，复杂表达式缩写为[math]"""
+    expression = match.group(1)
+    expression = re.sub(r'\\(?:mathrm|mathbf|mathit|text|operatorname)\s*\{([^{}]*)\}', r'\1', expression)
+    expression = expression.replace('{,}', ',').replace('~', ' ')
+    expression = re.sub(r'\\times', '×', expression)
+    expression = re.sub(r'\\(?:left|right)', '', expression)
+    expression = re.sub(r'\s+', ' ', expression).strip()
+    if '\\' in expression or len(expression) > 40:
+        return '[math]'
+    return expression
+
+
+# (规则名称, 正则, 替换字符串或函数)，按顺序应用
+DEFAULT_RULES: List[Tuple[str, str, Union[str, Callable[[re.Match], str]]]] = [
+    ('display_math', r'\$\$.*?\$\$', ' [equation] '),
+    ('html_table', r'<table>.*?</table>', ' [table] '),
+    ('image_link', r'!\[[^\]]*\]\([^)]*\)', ''),
+    ('numeric_citation', r'\s?\[\d+(?:\s*[,\u2013\-]\s*\d+)*\]', ''),
+    ('author_year_citation_list', r'\s?\((?:[^()]*?\b(?:19|20)\d{2}[a-z]?\s*;\s*)+[^()]*?\b(?:19|20)\d{2}[a-z]?\)', ''),
+    ('inline_math', r'\$([^$\n]{1,200})\$', _simplify_inline_math),
+    ('whitespace', r'[ \t]+', ' '),
+    ('blank_lines', r'\n\s*\n\s*', '\n\n'),
+]
+
+# 提示段落信息量的关键短语
+CUE_PHRASES = (
+    'we propose', 'we present', 'we introduce', 'our method', 'our approach', 'in this paper', 'in this work',
+    'results show', 'we find', 'we found', 'we observe', 'outperform', 'significant', 'improve',
+    'contribution', 'limitation', 'future work', 'in contrast', 'however', 'dataset', 'experiment'
+)
+
+STOPWORDS = {
+    'the', 'and', 'for', 'that', 'with', 'this', 'from', 'are', 'was', 'were', 'which', 'these', 'those',
+    'been', 'have', 'has', 'had', 'not', 'but', 'can', 'also', 'their', 'they', 'its', 'into', 'such',
+    'than', 'then', 'there', 'each', 'both', 'all', 'any', 'may', 'our', 'between', 'within', 'when'
+}
+
+
+class LaneCompactor:
+    """泳道输入压缩器"""
+
+    def __init__(self, rules: Optional[List[Tuple[str, str, Union[str, Callable[[re.Match], str]]]]] = None,
+                 enabled_rules: Optional[List[str]] = None, default_budget: int = LANE_TOKEN_BUDGET,
+                 budgets: Optional[Dict[str, int]] = None):
+        """
+        初始化压缩器
+
+        Args:
+            rules: 规则列表 [(名称, 正则, 替换)]，默认DEFAULT_RULES
+            enabled_rules: 启用的规则名称，默认LANE_COMPACTION_RULES（为空时全部启用）
+            default_budget: 默认泳道token预算
+            budgets: 按泳道名称覆盖的token预算，默认LANE_TOKEN_BUDGETS
+        """
+        enabled = set(enabled_rules if enabled_rules is not None else LANE_COMPACTION_RULES)
+        self.rules = [
+            (name, re.compile(pattern, re.S), replacement)
+            for name, pattern, replacement in (rules or DEFAULT_RULES)
+            if not enabled or name in enabled
+        ]
+        self.default_budget = default_budget
+        self.budgets = dict(LANE_TOKEN_BUDGETS if budgets is None else budgets)
+
+    def budget_for(self, lane_name: str) -> int:
+        """获取泳道的token预算"""
+        return self.budgets.get(lane_name, self.default_budget)
+
+    def apply_rules(self, text: str) -> str:
+        """
+        按规则去除或缩写非正文内容
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            处理后的文本
+        """
+        for _, pattern, replacement in self.rules:
+            text = pattern.sub(replacement, text)
+        return text.strip()
+
+    def compact(self, text: str, lane_name: str, budget: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+        """
+        压缩泳道文本：应用规则后按预算保留信息量最高的段落
+
+        Args:
+            text: 泳道原始文本
+            lane_name: 泳道名称（用于确定预算）
+            budget: token预算，默认按泳道配置
+
+        Returns:
+            Tuple[str, Dict[str, int]]: (压缩后的文本, {'original_tokens', 'compacted_tokens', 'budget', 'dropped_paragraphs'})
+        """
+        budget = budget or self.budget_for(lane_name)
+        original_tokens = count_tokens(text)
+        compacted = self.apply_rules(text)
+        compacted, dropped = self._fit_budget(compacted, budget)
+        stats = {
+            'original_tokens': original_tokens,
+            'compacted_tokens': count_tokens(compacted),
+            'budget': budget,
+            'dropped_paragraphs': dropped
+        }
+        return compacted, stats
+
+    def _fit_budget(self, text: str, budget: int) -> Tuple[str, int]:
+        """
+        超出预算时按段落得分保留内容，保持原文顺序
+
+        Args:
+            text: 已应用规则的文本
+            budget: token预算
+
+        Returns:
+            Tuple[str, int]: (文本, 丢弃的段落数)
+        """
+        paragraphs = [paragraph.strip() for paragraph in text.split('\n\n') if paragraph.strip()]
+        tokens = [count_tokens(paragraph) for paragraph in paragraphs]
+        if sum(tokens) <= budget:
+            return text, 0
+
+        headings = [paragraph.startswith('#') for paragraph in paragraphs]
+        remaining = budget - sum(count for count, heading in zip(tokens, headings) if heading)
+
+        # 章节首段（紧跟标题或全文第一段）额外加分
+        candidates = []
+        for index, paragraph in enumerate(paragraphs):
+            if headings[index]:
+                continue
+            first_in_section = index == 0 or headings[index - 1]
+            candidates.append((self._score_paragraph(paragraph, tokens[index], first_in_section), index))
+
+        keep = set(index for index, heading in enumerate(headings) if heading)
+        for _, index in sorted(candidates, key=lambda item: (-item[0], item[1])):
+            if tokens[index] <= remaining:
+                keep.add(index)
+                remaining -= tokens[index]
+
+        kept_text = [paragraphs[index] for index in sorted(keep)]
+        if len(keep) == sum(headings) and candidates:
+            # 没有完整段落能放入预算时截断得分最高的段落
+            best = max(candidates)[1]
+            kept_text.append(self._truncate(paragraphs[best], max(remaining, 0)))
+            keep.add(best)
+
+        return '\n\n'.join(kept_text), len(paragraphs) - len(keep)
+
+    def _score_paragraph(self, paragraph: str, tokens: int, first_in_section: bool) -> float:
+        """
+        段落信息量得分：不同实词数相对长度的密度，加上数值结果、关键提示词与章节首段的加分
+
+        Args:
+            paragraph: 段落文本
+            tokens: 段落token数
+            first_in_section: 是否为章节首段
+
+        Returns:
+            得分（越高越优先保留）
+        """
+        words = [word for word in re.findall(r'[a-z]{3,}', paragraph.lower()) if word not in STOPWORDS]
+        if not words:
+            return 0.0
+        score = len(set(words)) / math.sqrt(max(tokens, 1))
+        if re.search(r'\d+(?:\.\d+)?\s*%|\bp\s*[<=]\s*0?\.\d+|\d+\.\d+', paragraph):
+            score += 1.0
+        lowered = paragraph.lower()
+        score += 0.5 * min(3, sum(1 for phrase in CUE_PHRASES if phrase in lowered))
+        if first_in_section:
+            score += 1.0
+        return score
+
+    @staticmethod
+    def _truncate(paragraph: str, budget: int) -> str:
+        """按单词截断段落，使其估算token数不超过预算"""
+        words = paragraph.split()
+        kept, used = [], 0
+        for word in words:
+            cost = count_tokens(word)
+            if used + cost > budget:
+                break
+            kept.append(word)
+            used += cost
+        return ' '.join(kept)
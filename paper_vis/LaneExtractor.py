@@ -15,24 +15,65 @@
 - 处理PDF文件，不依赖md文件
 - 返回JSON对象，不生成磁盘文件
 - 五大泳道：传统四大泳道 + Innovation Discovery
+- 送入LLM前由LaneCompactor压缩泳道文本（去除非正文内容并按token预算保留段落）
+- 可选合并调用模式（LANE_FUSED_MODE）：短论文的四个传统泳道一次请求完成，未通过校验的泳道单独重新请求
+- 当前论文被取消时多进程抽取立即停止等待、撤回尚未开始的泳道，并通过跨进程事件取消工作进程中进行中的LLM请求
 """
 
+import logging
 import os
 import json
 import multiprocessing
+import threading
 from typing import Dict, List, Optional, Tuple
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 import time
 
 # 导入必要的模块
 from pdf_parse import PDFParserClient
 from ComprehensiveContentExtractor import ComprehensiveContentExtractor
+from DocumentModel import DocumentModel
 from ContextRelatedWork import analyze_context_related_work_sync
 from MethodologySetup import analyze_methodology_setup_sync
 from ResultsAnalysis import analyze_results_analysis_sync
 from Conclusion import analyze_conclusion_sync
 from AbstractSteps import extract_text_for_llm
 from InnovationDiscovery import analyze_innovation_discovery_sync
+from LLMClient import DeadlineExceeded, remaining_time
+from Cancellation import CancelToken, cancel_scope, current_cancel
+from LaneCompactor import LaneCompactor
+from Tracing import span
+from FusedLanes import FUSED_LANE_VALIDATORS, analyze_fused_lanes_sync
+from config import LANE_FUSED_MODE, LANE_FUSED_MAX_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# 泳道工作进程中的取消信号（父进程的论文被取消时由监听线程触发）
+_worker_cancel: Optional[CancelToken] = None
+
+
+def _init_lane_worker(cancel_event):
+    """
+    泳道工作进程初始化：监听父进程的取消事件，触发本进程的取消信号
+
+    Args:
+        cancel_event: 父进程创建的multiprocessing.Event
+    """
+    global _worker_cancel
+    _worker_cancel = CancelToken()
+
+    def watch():
+        cancel_event.wait()
+        _worker_cancel.cancel()
+
+    threading.Thread(target=watch, name='lane_cancel', daemon=True).start()
+
+
+def _extract_lane_in_worker(extractor: 'LaneExtractor', lane_name: str, extraction_func, content: str,
+                            deadline: Optional[float] = None) -> Tuple[List[Dict], Optional[Dict[str, int]]]:
+    """在工作进程中抽取单个泳道，LLM请求绑定本进程的取消信号"""
+    with cancel_scope(_worker_cancel):
+        return extractor._extract_lane(lane_name, extraction_func, content, deadline)
 
 
 class LaneExtractor:
@@ -42,6 +83,13 @@ class LaneExtractor:
         """初始化抽取器"""
         self.content_extractor = ComprehensiveContentExtractor()
         self.pdf_parser = PDFParserClient()
+        self.compactor = LaneCompactor()
+        
+        # 最近一次抽取中各泳道的压缩统计 {泳道名称: {'original_tokens', 'compacted_tokens', ...}}
+        self.compaction_info: Dict[str, Dict[str, int]] = {}
+        
+        # 最近一次抽取中超过截止时间的泳道
+        self.timed_out_lanes: List[str] = []
         
         # 五大抽取模块的映射
         self.extraction_modules = {
@@ -62,83 +110,143 @@ class LaneExtractor:
         Returns:
             包含五大泳道抽取结果的字典
         """
-        print("=== 五大泳道抽取器启动 ===")
-        print(f"目标PDF文件: {pdf_path}")
+        logger.info("=== 五大泳道抽取器启动 ===")
+        logger.info(f"目标PDF文件: {pdf_path}")
         
         # 步骤1: 解析PDF文件获取markdown内容
         md_content = self._parse_pdf_to_markdown(pdf_path)
         if not md_content:
-            print("❌ 未能从PDF文件中解析出markdown内容")
+            logger.error("❌ 未能从PDF文件中解析出markdown内容")
             return {}
         
-        print(f"✅ PDF解析成功，markdown内容长度: {len(md_content)} 字符")
+        logger.info(f"✅ PDF解析成功，markdown内容长度: {len(md_content)} 字符")
         
         # 步骤2: 提取四个传统泳道的原始文本内容
         lane_contents = self._extract_traditional_lane_contents(md_content)
         if not lane_contents:
-            print("❌ 未能从markdown内容中提取到传统泳道内容")
+            logger.error("❌ 未能从markdown内容中提取到传统泳道内容")
             return {}
         
         # 步骤3: 准备 Innovation Discovery 所需的两段输入
-        try:
-            abstract_excerpt = extract_text_for_llm(md_content) or ""
-        except Exception:
-            abstract_excerpt = ""
-        conclusion_text = lane_contents.get('Conclusion', '') or ""
-        lane_contents['Innovation Discovery'] = json.dumps({
-            'abstract_excerpt': abstract_excerpt,
-            'conclusion_text': conclusion_text
-        }, ensure_ascii=False)
+        lane_contents['Innovation Discovery'] = self.build_innovation_input(md_content, lane_contents)
 
         # 步骤4: 多进程并行抽取五大泳道
-        print("开始多进程并行抽取五大泳道...")
+        logger.info("开始多进程并行抽取五大泳道...")
         extraction_results = self._parallel_extract_lanes(lane_contents)
         
-        print("=== 五大泳道抽取完成 ===")
+        logger.info("=== 五大泳道抽取完成 ===")
         return extraction_results
     
-    def extract_lanes_from_content(self, md_content: str) -> Dict[str, List[Dict]]:
+    def extract_lanes_from_content(self, md_content: str, document: Optional[DocumentModel] = None,
+                                   deadline: Optional[float] = None) -> Dict[str, List[Dict]]:
         """
         从markdown内容提取五大泳道的内容并返回JSON对象（用于API模式）
         
         Args:
             md_content: markdown内容字符串
+            document: 已构建的文档模型，提供时直接复用其章节索引
+            deadline: 截止时间（time.time()时间戳），到期时未完成的泳道记入timed_out_lanes
         
         Returns:
             包含五大泳道抽取结果的字典
         """
-        print("=== 五大泳道抽取器启动（内容模式） ===")
-        print(f"markdown内容长度: {len(md_content)} 字符")
+        logger.info("=== 五大泳道抽取器启动（内容模式） ===")
+        logger.info(f"markdown内容长度: {len(md_content)} 字符")
         
         if not md_content:
-            print("❌ 未能从PDF文件中解析出markdown内容")
+            logger.error("❌ 未能从PDF文件中解析出markdown内容")
             return {}
         
-        print(f"✅ Markdown内容获取成功，长度: {len(md_content)} 字符")
+        logger.info(f"✅ Markdown内容获取成功，长度: {len(md_content)} 字符")
         
         # 步骤1: 提取四个传统泳道的原始文本内容
-        lane_contents = self._extract_traditional_lane_contents(md_content)
+        lane_contents = self._extract_traditional_lane_contents(md_content, document, deadline)
         if not lane_contents:
-            print("❌ 未能从markdown内容中提取到传统泳道内容")
+            logger.error("❌ 未能从markdown内容中提取到传统泳道内容")
             return {}
         
         # 步骤2: 准备 Innovation Discovery 所需的两段输入
+        lane_contents['Innovation Discovery'] = self.build_innovation_input(md_content, lane_contents)
+
+        # 步骤3: 合并调用模式下先一次请求四个传统泳道，其余泳道再多进程并行抽取
+        fused_results = {}
+        if LANE_FUSED_MODE:
+            try:
+                fused_results = self.extract_fused_lanes(lane_contents, deadline)
+            except DeadlineExceeded:
+                logger.warning("  ⏰ 合并调用超过截止时间")
+        remaining_contents = {name: content for name, content in lane_contents.items() if name not in fused_results}
+        logger.info("开始多进程并行抽取五大泳道...")
+        extraction_results = self._parallel_extract_lanes(remaining_contents, deadline)
+        extraction_results.update(fused_results)
+        
+        logger.info("=== 五大泳道抽取完成（内容模式） ===")
+        return extraction_results
+    
+    def build_innovation_input(self, md_content: str, lane_contents: Dict[str, str]) -> str:
+        """
+        构建 Innovation Discovery 所需的输入（摘要片段 + 结论原文的JSON字符串）
+        
+        Args:
+            md_content: markdown内容字符串
+            lane_contents: 按泳道名称组织的原始文本内容
+        
+        Returns:
+            str: JSON字符串 {'abstract_excerpt', 'conclusion_text'}
+        """
         try:
-            abstract_excerpt = extract_text_for_llm(md_content) or ""
+            abstract_excerpt = self.compactor.apply_rules(extract_text_for_llm(md_content) or "")
         except Exception:
             abstract_excerpt = ""
-        conclusion_text = lane_contents.get('Conclusion', '') or ""
-        lane_contents['Innovation Discovery'] = json.dumps({
+        conclusion_text, stats = self.compactor.compact(lane_contents.get('Conclusion', '') or "", 'Innovation Discovery')
+        self.compaction_info['Innovation Discovery'] = stats
+        return json.dumps({
             'abstract_excerpt': abstract_excerpt,
             'conclusion_text': conclusion_text
         }, ensure_ascii=False)
-
-        # 步骤3: 多进程并行抽取五大泳道
-        print("开始多进程并行抽取五大泳道...")
-        extraction_results = self._parallel_extract_lanes(lane_contents)
+    
+    def extract_fused_lanes(self, lane_contents: Dict[str, str], deadline: Optional[float] = None) -> Dict[str, List[Dict]]:
+        """
+        一次请求抽取四个传统泳道（压缩后总token超过LANE_FUSED_MAX_TOKENS时不合并）
         
-        print("=== 五大泳道抽取完成（内容模式） ===")
-        return extraction_results
+        Args:
+            lane_contents: 按泳道名称组织的原始文本内容
+            deadline: 截止时间（time.time()时间戳），到期时抛出DeadlineExceeded
+        
+        Returns:
+            通过校验的泳道抽取结果 {泳道名称: [关键点字典]}，未通过或未合并的泳道不出现
+        """
+        lane_texts = {}
+        for lane_name in FUSED_LANE_VALIDATORS:
+            content = lane_contents.get(lane_name, '')
+            if content and content.strip():
+                lane_texts[lane_name], self.compaction_info[lane_name] = self.compactor.compact(content, lane_name)
+        
+        total_tokens = sum(self.compaction_info[lane_name]['compacted_tokens'] for lane_name in lane_texts)
+        if len(lane_texts) < 2 or total_tokens > LANE_FUSED_MAX_TOKENS:
+            logger.info(f"  ⚠ 不使用合并调用: {len(lane_texts)} 个泳道, {total_tokens} tokens")
+            return {}
+        
+        logger.info(f"  🔗 合并调用 {len(lane_texts)} 个泳道（{total_tokens} tokens）")
+        results = analyze_fused_lanes_sync(lane_texts, deadline=deadline)
+        failed = [lane_name for lane_name in lane_texts if lane_name not in results]
+        if failed:
+            logger.warning(f"  ⚠ 合并调用中未通过校验的泳道将单独请求: {', '.join(failed)}")
+        return {lane_name: [result] for lane_name, result in results.items()}
+    
+    def extract_single_lane(self, lane_name: str, content: str, deadline: Optional[float] = None) -> List[Dict]:
+        """
+        在当前进程中抽取单个泳道（供阶段调度器按泳道独立调度）
+        
+        Args:
+            lane_name: 泳道名称
+            content: 原始文本内容
+            deadline: 截止时间（time.time()时间戳），到期时抛出DeadlineExceeded
+        
+        Returns:
+            抽取结果列表
+        """
+        return self._extract_single_lane(lane_name, self.extraction_modules[lane_name], content, deadline)
     
     def _parse_pdf_to_markdown(self, pdf_path: str) -> Optional[str]:
         """
@@ -150,8 +258,8 @@ class LaneExtractor:
         Returns:
             markdown内容字符串，如果解析失败返回None
         """
-        print("步骤1: 解析PDF文件...")
-        print(f"  处理文件: {os.path.basename(pdf_path)}")
+        logger.info("步骤1: 解析PDF文件...")
+        logger.info(f"  处理文件: {os.path.basename(pdf_path)}")
         
         try:
             # 调用PDF解析器
@@ -159,62 +267,72 @@ class LaneExtractor:
             
             if pdf_result and 'md_content' in pdf_result:
                 md_content = pdf_result['md_content']
-                print(f"  ✅ PDF解析成功")
-                print(f"    - 文件名: {pdf_result.get('filename', 'N/A')}")
-                print(f"    - 版本: {pdf_result.get('version', 'N/A')}")
-                print(f"    - 后端: {pdf_result.get('backend', 'N/A')}")
-                print(f"    - Markdown内容长度: {len(md_content)} 字符")
+                logger.info(f"  ✅ PDF解析成功")
+                logger.info(f"    - 文件名: {pdf_result.get('filename', 'N/A')}")
+                logger.info(f"    - 版本: {pdf_result.get('version', 'N/A')}")
+                logger.info(f"    - 后端: {pdf_result.get('backend', 'N/A')}")
+                logger.info(f"    - Markdown内容长度: {len(md_content)} 字符")
                 return md_content
             else:
-                print(f"  ❌ PDF解析结果中缺少md_content字段")
+                logger.error(f"  ❌ PDF解析结果中缺少md_content字段")
                 return None
                 
         except Exception as e:
-            print(f"  ❌ PDF解析失败: {e}")
+            logger.error(f"  ❌ PDF解析失败: {e}")
             return None
     
-    def _extract_traditional_lane_contents(self, md_content: str) -> Dict[str, str]:
+    def _extract_traditional_lane_contents(self, md_content: str, document: Optional[DocumentModel] = None,
+                                           deadline: Optional[float] = None) -> Dict[str, str]:
         """
         从markdown内容中提取四个传统泳道的原始文本内容
         
         Args:
             md_content: markdown内容字符串
+            document: 已构建的文档模型，未提供时从md_content构建
+            deadline: 标题映射的截止时间（time.time()时间戳）
         
         Returns:
             按泳道名称组织的原始文本内容字典
         """
-        print("步骤2: 提取传统泳道原始文本内容...")
+        logger.info("步骤2: 提取传统泳道原始文本内容...")
         
         try:
-            # 调用ComprehensiveContentExtractor的字符串版本获取泳道内容
-            lane_contents = self.content_extractor.extract_comprehensive_content_from_string(md_content)
+            # 基于文档模型的章节索引获取泳道内容
+            if document is None:
+                document = DocumentModel(md_content)
+            lane_contents = self.content_extractor.extract_lane_sections_from_document(document, deadline).get('content', {})
             
             if lane_contents:
                 for lane_name, content in lane_contents.items():
                     if content and content.strip():
-                        print(f"    ✓ {lane_name}: {len(content)} 字符")
+                        logger.info(f"    ✓ {lane_name}: {len(content)} 字符")
                     else:
-                        print(f"    ⚠ {lane_name}: 内容为空")
+                        logger.warning(f"    ⚠ {lane_name}: 内容为空")
                 return lane_contents
             else:
-                print(f"    ❌ 未能提取到任何传统泳道内容")
+                logger.error(f"    ❌ 未能提取到任何传统泳道内容")
                 return {}
                 
+        except DeadlineExceeded:
+            logger.warning("    ⏰ 标题映射超过截止时间")
+            return {}
         except Exception as e:
-            print(f"    ❌ 处理markdown内容失败: {e}")
+            logger.error(f"    ❌ 处理markdown内容失败: {e}")
             return {}
     
-    def _parallel_extract_lanes(self, lane_contents: Dict[str, str]) -> Dict[str, List[Dict]]:
+    def _parallel_extract_lanes(self, lane_contents: Dict[str, str], deadline: Optional[float] = None) -> Dict[str, List[Dict]]:
         """
         多进程并行抽取五大泳道的内容
         
         Args:
             lane_contents: 按泳道名称组织的原始文本内容
+            deadline: 截止时间（time.time()时间戳），到期时不再等待未完成的泳道
         
         Returns:
-            抽取结果字典
+            抽取结果字典（超时的泳道不出现在结果中，记入self.timed_out_lanes）
         """
-        print("步骤3: 多进程并行抽取五大泳道...")
+        logger.info("步骤3: 多进程并行抽取五大泳道...")
+        self.timed_out_lanes = []
         
         # 准备任务参数
         tasks = []
@@ -222,65 +340,136 @@ class LaneExtractor:
             if content and content.strip():
                 extraction_func = self.extraction_modules[lane_name]
                 tasks.append((lane_name, extraction_func, content))
-                print(f"  ✓ 准备任务: {lane_name}")
+                logger.info(f"  ✓ 准备任务: {lane_name}")
             else:
-                print(f"  ⚠ 跳过空内容: {lane_name}")
+                logger.warning(f"  ⚠ 跳过空内容: {lane_name}")
         
         if not tasks:
-            print("❌ 没有有效的抽取任务")
+            logger.error("❌ 没有有效的抽取任务")
             return {}
         
         # 多进程并行执行
         extraction_results = {}
         start_time = time.time()
         
-        with ProcessPoolExecutor(max_workers=5) as executor:
+        # 取消时设置跨进程事件，工作进程中进行中的LLM请求随之取消
+        cancel_event = multiprocessing.Event()
+        executor = ProcessPoolExecutor(max_workers=5, initializer=_init_lane_worker, initargs=(cancel_event,))
+        # 取消信号触发时完成该future，唤醒等待中的收集循环
+        cancelled = Future()
+        token = current_cancel()
+        cancel_handle = None
+        if token is not None:
+            def on_cancel():
+                cancel_event.set()
+                if not cancelled.done():
+                    cancelled.set_result(None)
+            cancel_handle = token.add_callback(on_cancel)
+        try:
             # 提交所有任务
             future_to_lane = {}
             for lane_name, extraction_func, content in tasks:
-                future = executor.submit(self._extract_single_lane, lane_name, extraction_func, content)
+                future = executor.submit(_extract_lane_in_worker, self, lane_name, extraction_func, content, deadline)
                 future_to_lane[future] = lane_name
             
-            # 收集结果
+            # 收集结果（压缩统计在工作进程中产生，随结果返回后在此合并）
             completed_count = 0
-            for future in as_completed(future_to_lane):
-                lane_name = future_to_lane[future]
-                try:
-                    result = future.result()
-                    extraction_results[lane_name] = result
-                    completed_count += 1
-                    print(f"  ✓ 完成 {lane_name} ({completed_count}/{len(tasks)})")
-                except Exception as e:
-                    print(f"  ❌ {lane_name} 抽取失败: {e}")
-                    extraction_results[lane_name] = []
+            pending = set(future_to_lane)
+            while pending and not cancelled.done():
+                timeout = remaining_time(deadline)
+                done, pending = wait(pending | {cancelled}, timeout=None if timeout is None else max(0.0, timeout),
+                                     return_when=FIRST_COMPLETED)
+                pending.discard(cancelled)
+                if not done:
+                    for future in pending:
+                        logger.warning(f"  ⏰ {future_to_lane[future]} 超过截止时间")
+                        self.timed_out_lanes.append(future_to_lane[future])
+                    break
+                for future in done:
+                    if future is cancelled:
+                        continue
+                    lane_name = future_to_lane[future]
+                    try:
+                        result, stats = future.result()
+                        extraction_results[lane_name] = result
+                        if stats:
+                            self.compaction_info[lane_name] = stats
+                        completed_count += 1
+                        logger.info(f"  ✓ 完成 {lane_name} ({completed_count}/{len(tasks)})")
+                    except DeadlineExceeded:
+                        logger.warning(f"  ⏰ {lane_name} 超过截止时间")
+                        self.timed_out_lanes.append(lane_name)
+                    except Exception as e:
+                        logger.error(f"  ❌ {lane_name} 抽取失败: {e}")
+                        extraction_results[lane_name] = []
+        finally:
+            if token is not None:
+                token.remove_callback(cancel_handle)
+            # 截止时间已到或已取消时撤回尚未开始的泳道，不等待进行中的进程（取消时其LLM请求已由事件取消，超时时同样受截止时间约束）
+            executor.shutdown(wait=not self.timed_out_lanes and not cancelled.done(), cancel_futures=True)
+        if token is not None:
+            token.raise_if_cancelled("泳道抽取")
         
         end_time = time.time()
-        print(f"多进程抽取完成，耗时: {end_time - start_time:.2f}秒")
-        print()
+        logger.info(f"多进程抽取完成，耗时: {end_time - start_time:.2f}秒")
         
         return extraction_results
     
-    def _extract_single_lane(self, lane_name: str, extraction_func, content: str) -> List[Dict]:
+    def _extract_single_lane(self, lane_name: str, extraction_func, content: str, deadline: Optional[float] = None) -> List[Dict]:
         """
-        抽取单个泳道的内容（用于多进程调用）
+        在当前进程中抽取单个泳道的内容，并记录压缩统计
         
         Args:
             lane_name: 泳道名称
             extraction_func: 抽取函数
             content: 原始文本内容
+            deadline: 截止时间（time.time()时间戳）
         
         Returns:
             抽取结果列表
+        
+        Raises:
+            DeadlineExceeded: 截止时间已到
+        """
+        result, stats = self._extract_lane(lane_name, extraction_func, content, deadline)
+        if stats:
+            self.compaction_info[lane_name] = stats
+        return result
+    
+    def _extract_lane(self, lane_name: str, extraction_func, content: str,
+                      deadline: Optional[float] = None) -> Tuple[List[Dict], Optional[Dict[str, int]]]:
+        """
+        抽取单个泳道的内容（用于多进程调用，压缩统计随结果返回，由父进程合并）
+        
+        Args:
+            lane_name: 泳道名称
+            extraction_func: 抽取函数
+            content: 原始文本内容
+            deadline: 截止时间（time.time()时间戳）
+        
+        Returns:
+            Tuple[List[Dict], Optional[Dict[str, int]]]: (抽取结果列表, 压缩统计)，Innovation Discovery的压缩统计为None
+        
+        Raises:
+            DeadlineExceeded: 截止时间已到
         """
+        stats = None
         try:
-            result = extraction_func(content)
+            # Innovation Discovery的输入是已压缩的JSON字符串，其余泳道在此压缩
+            if lane_name != 'Innovation Discovery':
+                with span('compact', 'cpu', lane=lane_name):
+                    content, stats = self.compactor.compact(content, lane_name)
+                logger.info(f"  🗜️ {lane_name}: {stats['original_tokens']} → {stats['compacted_tokens']} tokens")
+            result = extraction_func(content, deadline=deadline)
             if result:
-                return [result]  # 包装为列表以保持一致性
+                return [result], stats  # 包装为列表以保持一致性
             else:
-                return []
+                return [], stats
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"进程内错误 - {lane_name}: {e}")
-            return []
+            logger.error(f"进程内错误 - {lane_name}: {e}")
+            return [], stats
     
 
 
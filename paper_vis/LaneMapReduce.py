@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+超长泳道的Map-Reduce总结
+泳道文本超过LANE_MAP_REDUCE_THRESHOLD（估算token）时自动启用，否则直接调用泳道模块的分析函数
+
+流程：
+1. 按子标题与段落边界将泳道文本切分为不超过LANE_MAP_CHUNK_TOKENS的块（超长段落按句切分）
+2. Map：并发总结各块为要点（并发数LANE_MAP_CONCURRENCY）
+3. Reduce：将各块要点拼接后交给泳道模块原有的分析函数，得到符合validate_*_json的3-5个关键点
+
+核心特性：
+- 长论文的延迟取决于块的并发度而不是总长度
+- 全部Map调用失败时回退为对原文的单次调用
+- 截止时间到达时抛出DeadlineExceeded
+"""
+
+import logging
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from LLMClient import request_json, count_tokens, DeadlineExceeded, schema_max_tokens, stage_settings
+from SentenceSegmenter import SentenceSegmenter
+from config import LANE_MAP_REDUCE_THRESHOLD, LANE_MAP_CHUNK_TOKENS, LANE_MAP_CONCURRENCY, MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+_segmenter = SentenceSegmenter()
+
+MAP_SYSTEM_PROMPT = """You are an expert academic reader. You receive ONE excerpt of the "{lane_name}" part of a scientific paper.
+Extract the facts from this excerpt that matter for summarizing that part of the paper: problems, methods, settings,
+datasets, quantitative results, comparisons, limitations and claims. Keep numbers, names and units exactly as written.
+Do not add information that is not in the excerpt.
+
+Output ONLY a JSON object of the form {{"notes": ["...", "..."]}} with at most 8 notes, each under 40 English words."""
+
+# 输出上限：8条要点 × 40词
+MAP_OUTPUT_MAX_TOKENS = schema_max_tokens(items=8, words_per_item=40)
+
+MAP_USER_PROMPT_TEMPLATE = """Excerpt {index} of {total}:
+
+{text}"""
+
+
+def validate_map_notes(result: Any) -> bool:
+    """校验Map结果：{"notes": [非空字符串, ...]}"""
+    return (
+        isinstance(result, dict)
+        and isinstance(result.get('notes'), list)
+        and any(isinstance(note, str) and note.strip() for note in result['notes'])
+    )
+
+
+def split_lane_text(text: str, chunk_tokens: int = LANE_MAP_CHUNK_TOKENS) -> List[str]:
+    """
+    按子标题与段落边界切分泳道文本
+
+    Args:
+        text: 泳道文本
+        chunk_tokens: 每块的估算token上限
+
+    Returns:
+        文本块列表
+    """
+    units = []
+    for paragraph in text.split('\n\n'):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= chunk_tokens:
+            units.append((paragraph, tokens))
+            continue
+        # 超长段落按句切分
+        for start, end in _segmenter.split_spans(paragraph):
+            sentence = paragraph[start:end]
+            units.append((sentence, count_tokens(sentence)))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit, tokens in units:
+        # 已有半块内容时在子标题处换块，使块尽量对应完整的子章节
+        heading_break = unit.startswith('#') and current_tokens >= chunk_tokens // 2
+        if current and (current_tokens + tokens > chunk_tokens or heading_break):
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+async def _summarize_chunk(lane_name: str, chunk: str, index: int, total: int, semaphore: asyncio.Semaphore,
+                           max_retries: int, deadline: Optional[float]) -> Optional[List[str]]:
+    """
+    Map：总结单个文本块为要点列表
+
+    Returns:
+        要点列表，失败返回None
+
+    Raises:
+        DeadlineExceeded: 截止时间已到
+    """
+    messages = [
+        {"role": "system", "content": MAP_SYSTEM_PROMPT.format(lane_name=lane_name)},
+        {"role": "user", "content": MAP_USER_PROMPT_TEMPLATE.format(index=index, total=total, text=chunk)}
+    ]
+    async with semaphore:
+        result = await request_json(
+            messages,
+            validator=validate_map_notes,
+            max_retries=max_retries,
+            deadline=deadline,
+            label=f"{lane_name} Map",
+            json_mode=True,
+            **stage_settings('lane_map', MAP_OUTPUT_MAX_TOKENS)
+        )
+    if not result:
+        return None
+    return [note.strip() for note in result['notes'] if isinstance(note, str) and note.strip()]
+
+
+async def map_reduce_lane(text: str, lane_name: str,
+                          reduce_func: Callable[[str, int, Optional[float]], Awaitable[Optional[Dict[str, str]]]],
+                          max_retries: int = MAX_RETRIES, deadline: Optional[float] = None,
+                          threshold: int = LANE_MAP_REDUCE_THRESHOLD) -> Optional[Dict[str, str]]:
+    """
+    分析泳道文本，超过阈值时先并发总结各块再归约
+
+    Args:
+        text: 泳道文本
+        lane_name: 泳道名称
+        reduce_func: 泳道模块的分析函数 call_deepseek_api(text, max_retries, deadline)
+        max_retries: 最大重试次数
+        deadline: 截止时间（time.time()时间戳），None表示不限
+        threshold: 启用Map-Reduce的估算token阈值
+
+    Returns:
+        泳道关键点字典，失败返回None
+
+    Raises:
+        DeadlineExceeded: 截止时间已到
+    """
+    tokens = count_tokens(text)
+    if tokens <= threshold:
+        return await reduce_func(text, max_retries, deadline)
+
+    chunks = split_lane_text(text)
+    if len(chunks) < 2:
+        return await reduce_func(text, max_retries, deadline)
+
+    logger.info(f"🧩 {lane_name}: {tokens} tokens 超过阈值 {threshold}，切分为 {len(chunks)} 块并发总结")
+    semaphore = asyncio.Semaphore(max(1, LANE_MAP_CONCURRENCY))
+    results = await asyncio.gather(
+        *[_summarize_chunk(lane_name, chunk, index + 1, len(chunks), semaphore, max_retries, deadline)
+          for index, chunk in enumerate(chunks)],
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, DeadlineExceeded):
+            raise result
+
+    parts = []
+    for index, notes in enumerate(results):
+        if isinstance(notes, list) and notes:
+            parts.append(f"Part {index + 1}:\n" + '\n'.join(f"- {note}" for note in notes))
+        elif isinstance(notes, Exception):
+            logger.error(f"  ❌ {lane_name} 第{index + 1}块总结异常: {notes}")
+
+    if not parts:
+        logger.warning(f"  ⚠ {lane_name} 所有块总结失败，回退为单次调用")
+        return await reduce_func(text, max_retries, deadline)
+
+    logger.info(f"  ✓ {lane_name}: {len(parts)}/{len(chunks)} 块总结完成，开始归约")
+    return await reduce_func('\n\n'.join(parts), max_retries, deadline)
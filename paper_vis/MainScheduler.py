@@ -6,7 +6,7 @@
 
 功能流程：
 1. PDF解析：使用PDFParserClient解析PDF文件
-2. 并行处理：AbstractSteps + LaneExtractor + FigureMapGenerator
+2. 并行处理：按阶段依赖图（StageGraph）调度摘要语步、标题映射、泳道抽取与图表映射
 3. 数据整合：生成包含所有信息的超大JSON对象
 
 输入：PDF文件路径
@@ -19,33 +19,103 @@
 
 核心特性：
 - 端到端处理，从PDF到最终JSON
-- 智能并发处理，避免重复计算
+- 智能并发处理，避免重复计算：每个阶段在输入就绪后立即启动，并记录关键路径
 - 完整的错误处理和状态监控
 - 内存优化，避免重复数据存储
+- 请求级追踪：阶段、LLM请求与CPU子步骤记录为span，trace_id写入processing_info，
+  设置TRACE_EXPORT_DIR时导出Chrome trace JSON（processing_info.trace_file）
+- 按请求开启的性能剖析（profile=True）：按阶段采样调用栈并记录内存峰值，写入PROFILE_DIR/<trace_id>
+  （processing_info.profile）
+- 任务类别（priority、tenant）绑定到阶段依赖图，LLM请求按类别与租户公平地获取并发名额
+- 可取消（CancelToken，如客户端断开连接）：解析请求不再等待，阶段依赖图立即停止，进行中的LLM请求被取消，
+  返回cancelled为True的错误结果
 """
 
+import argparse
+import functools
+import logging
 import os
 import json
 import time
 from typing import Dict, List, Optional, Any
-from concurrent.futures import ThreadPoolExecutor
-import threading
 
 # 导入必要的模块
 from pdf_parse import PDFParserClient
 from AbstractSteps import analyze_abstract_steps_from_content
 from LaneExtractor import LaneExtractor
 from FigureMapGenerator import FigureMapGenerator
+from DocumentModel import DocumentModel
+from ComprehensiveContentExtractor import ComprehensiveContentExtractor
+from StageGraph import Stage, StageGraphExecutor
+from config import STAGE_RETRIES, STAGE_TIMEOUT, PAPER_DEADLINE_SECONDS, LANE_FUSED_MODE, TRACE_EXPORT_DIR, PROFILE_DIR
+from FusedLanes import FUSED_LANE_VALIDATORS
+from LLMClient import DeadlineExceeded, remaining_time, LLMCallStats, call_stats_scope
+from Metrics import PARSE_SECONDS, observe_stages, track_paper
+from Tracing import Tracer, trace_scope, span, configure_logging
+from Profiling import RequestProfiler, profile_scope
+from FairScheduler import JobClass, job_scope
+from Cancellation import CancelToken, cancel_scope
+
+logger = logging.getLogger(__name__)
+
+
+def traced_paper(func):
+    """在论文级追踪中执行处理入口，结束后按TRACE_EXPORT_DIR导出Chrome trace JSON"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with trace_scope(self.tracer), span('paper', 'paper'):
+            result = func(self, *args, **kwargs)
+        if TRACE_EXPORT_DIR:
+            try:
+                trace_file = self.tracer.export(TRACE_EXPORT_DIR)
+                result.setdefault('processing_info', {})['trace_file'] = trace_file
+                logger.info(f"🧵 追踪已导出: {trace_file}")
+            except OSError as e:
+                logger.warning(f"追踪导出失败: {e}")
+        return result
+    return wrapper
+
+
+def profiled_paper(func):
+    """开启剖析时在剖析器中执行处理入口，结果写入PROFILE_DIR/<trace_id>并记录到processing_info.profile"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not self.profile:
+            return func(self, *args, **kwargs)
+        profiler = RequestProfiler()
+        with profile_scope(profiler):
+            result = func(self, *args, **kwargs)
+        try:
+            profile = profiler.export(os.path.join(PROFILE_DIR, self.tracer.trace_id))
+            result.setdefault('processing_info', {})['profile'] = profile
+            logger.info(f"🔬 剖析结果已写入: {profile['dir']}")
+        except OSError as e:
+            logger.warning(f"剖析结果写入失败: {e}")
+        return result
+    return wrapper
 
 
 class MainScheduler:
     """综合主调度器 - 完整论文处理系统"""
     
-    def __init__(self):
-        """初始化调度器"""
+    def __init__(self, profile: bool = False, job: Optional[JobClass] = None, cancel: Optional[CancelToken] = None):
+        """
+        初始化调度器
+        
+        Args:
+            profile: 是否对本次处理进行性能剖析（按阶段采样调用栈与内存峰值）
+            job: 任务的优先级类别与租户，默认interactive/anonymous
+            cancel: 取消信号，触发时尽快停止处理（默认不会被触发）
+        """
+        self.profile = profile
+        self.job = job or JobClass()
+        self.cancel_token = cancel or CancelToken()
         self.pdf_parser = PDFParserClient()
         self.lane_extractor = LaneExtractor()
         self.figure_generator = FigureMapGenerator()
+        self.deadline = None  # 单篇论文截止时间（time.time()时间戳）
+        self.llm_stats = LLMCallStats()  # 单篇论文的LLM调用统计（重试、本地修复、纠正提示、对冲等）
+        self.tracer = Tracer()  # 单篇论文的追踪记录
         
         # 处理状态跟踪
         self.processing_info = {
@@ -56,105 +126,121 @@ class MainScheduler:
             'errors': []
         }
     
-    def process_uploaded_pdf(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+    @track_paper
+    @traced_paper
+    @profiled_paper
+    def process_uploaded_pdf(self, file_content: bytes, filename: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """
         处理上传的PDF文件流，生成包含所有信息的超大JSON对象
         
         Args:
             file_content: PDF文件内容（字节流）
             filename: 文件名
+            deadline: 截止时间（time.time()时间戳），api_server按请求到达时间传入；
+                      在API之外调用时默认为当前时间加PAPER_DEADLINE_SECONDS
         
         Returns:
             Dict[str, Any]: 包含所有处理结果的超大JSON对象
         """
-        print("=" * 80)
-        print("🚀 综合主调度器启动（上传文件模式）")
-        print(f"📄 目标PDF文件: {filename}")
-        print("=" * 80)
+        logger.info("🚀 综合主调度器启动（上传文件模式）")
+        logger.info(f"📄 目标PDF文件: {filename}")
         
         self.processing_info['start_time'] = time.time()
+        self.deadline = deadline or self.processing_info['start_time'] + PAPER_DEADLINE_SECONDS
         
         try:
             # 步骤1: PDF解析（直接使用文件内容）
-            print("\n📋 步骤1: PDF文件解析（上传模式）")
-            pdf_result = self._parse_uploaded_pdf(file_content, filename)
+            logger.info("📋 步骤1: PDF文件解析（上传模式）")
+            with PARSE_SECONDS.time(), span('pdf_parsing'):
+                pdf_result = self._parse_uploaded_pdf(file_content, filename)
+            if self.cancel_token.cancelled:
+                return self._create_cancelled_result()
             if not pdf_result:
                 return self._create_error_result("PDF解析失败")
             
             # 步骤2: 并行处理所有任务
-            print("\n⚡ 步骤2: 并行处理所有任务")
+            logger.info("⚡ 步骤2: 并行处理所有任务")
             parallel_results = self._execute_parallel_processing(pdf_result)
+            if self.cancel_token.cancelled:
+                return self._create_cancelled_result()
             if not parallel_results['success']:
                 return self._create_error_result(f"并行处理失败: {parallel_results['error']}")
             
             # 步骤3: 生成最终超大JSON对象
-            print("\n🎯 步骤3: 生成最终超大JSON对象")
-            final_result = self._generate_final_json(pdf_result, parallel_results)
+            logger.info("🎯 步骤3: 生成最终超大JSON对象")
+            with span('final_json', 'cpu'):
+                final_result = self._generate_final_json(pdf_result, parallel_results)
             
             self.processing_info['end_time'] = time.time()
             self.processing_info['total_time'] = self.processing_info['end_time'] - self.processing_info['start_time']
             
-            print("=" * 80)
-            print("🎉 综合处理完成")
-            print(f"⏱️ 总耗时: {self.processing_info['total_time']:.2f}秒")
-            print(f"📊 处理步骤: {len(self.processing_info['steps_completed'])}")
-            print("=" * 80)
+            logger.info("🎉 综合处理完成")
+            logger.info(f"⏱️ 总耗时: {self.processing_info['total_time']:.2f}秒")
+            logger.info(f"📊 处理步骤: {len(self.processing_info['steps_completed'])}")
             
             return final_result
             
         except Exception as e:
             self.processing_info['errors'].append(str(e))
-            print(f"❌ 综合处理失败: {e}")
+            logger.error(f"❌ 综合处理失败: {e}")
             return self._create_error_result(f"处理异常: {e}")
 
-    def process_pdf_file(self, pdf_path: str) -> Dict[str, Any]:
+    @track_paper
+    @traced_paper
+    @profiled_paper
+    def process_pdf_file(self, pdf_path: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """
         处理PDF文件，生成包含所有信息的超大JSON对象
         
         Args:
             pdf_path: PDF文件路径
+            deadline: 截止时间（time.time()时间戳），api_server按请求到达时间传入；
+                      在API之外调用时默认为当前时间加PAPER_DEADLINE_SECONDS
         
         Returns:
             Dict[str, Any]: 包含所有处理结果的超大JSON对象
         """
-        print("=" * 80)
-        print("🚀 综合主调度器启动")
-        print(f"📄 目标PDF文件: {pdf_path}")
-        print("=" * 80)
+        logger.info("🚀 综合主调度器启动")
+        logger.info(f"📄 目标PDF文件: {pdf_path}")
         
         self.processing_info['start_time'] = time.time()
+        self.deadline = deadline or self.processing_info['start_time'] + PAPER_DEADLINE_SECONDS
         
         try:
             # 步骤1: PDF解析
-            print("\n📋 步骤1: PDF文件解析")
-            pdf_result = self._parse_pdf_file(pdf_path)
+            logger.info("📋 步骤1: PDF文件解析")
+            with PARSE_SECONDS.time(), span('pdf_parsing'):
+                pdf_result = self._parse_pdf_file(pdf_path)
+            if self.cancel_token.cancelled:
+                return self._create_cancelled_result()
             if not pdf_result:
                 return self._create_error_result("PDF解析失败")
             
             # 步骤2: 并行处理所有任务
-            print("\n⚡ 步骤2: 并行处理所有任务")
+            logger.info("⚡ 步骤2: 并行处理所有任务")
             parallel_results = self._execute_parallel_processing(pdf_result)
+            if self.cancel_token.cancelled:
+                return self._create_cancelled_result()
             if not parallel_results['success']:
                 return self._create_error_result(f"并行处理失败: {parallel_results['error']}")
             
             # 步骤3: 生成最终超大JSON对象
-            print("\n🎯 步骤3: 生成最终超大JSON对象")
-            final_result = self._generate_final_json(pdf_result, parallel_results)
+            logger.info("🎯 步骤3: 生成最终超大JSON对象")
+            with span('final_json', 'cpu'):
+                final_result = self._generate_final_json(pdf_result, parallel_results)
             
             self.processing_info['end_time'] = time.time()
             self.processing_info['total_time'] = self.processing_info['end_time'] - self.processing_info['start_time']
             
-            print("=" * 80)
-            print("🎉 综合处理完成")
-            print(f"⏱️ 总耗时: {self.processing_info['total_time']:.2f}秒")
-            print(f"📊 处理步骤: {len(self.processing_info['steps_completed'])}")
-            print("=" * 80)
+            logger.info("🎉 综合处理完成")
+            logger.info(f"⏱️ 总耗时: {self.processing_info['total_time']:.2f}秒")
+            logger.info(f"📊 处理步骤: {len(self.processing_info['steps_completed'])}")
             
             return final_result
             
         except Exception as e:
             self.processing_info['errors'].append(str(e))
-            print(f"❌ 综合处理失败: {e}")
+            logger.error(f"❌ 综合处理失败: {e}")
             return self._create_error_result(f"处理异常: {e}")
     
     def _parse_uploaded_pdf(self, file_content: bytes, filename: str) -> Optional[Dict[str, Any]]:
@@ -169,14 +255,15 @@ class MainScheduler:
             Dict[str, Any]: PDF解析结果，包含md_content, middle_json, content_list, figure_dict
         """
         try:
-            print(f"📄 开始解析上传的PDF文件: {filename}")
+            logger.info(f"📄 开始解析上传的PDF文件: {filename}")
             
             # 使用PDFParserClient解析上传的PDF文件
             # 需要修改PDFParserClient来支持文件流
-            pdf_result = self.pdf_parser.upload_pdf_from_content(file_content, filename)
+            pdf_result = self.pdf_parser.upload_pdf_from_content(file_content, filename, timeout=remaining_time(self.deadline),
+                                                                 cancel=self.cancel_token)
             
             if not pdf_result:
-                print("❌ PDF解析失败")
+                logger.error("❌ PDF解析失败")
                 return None
             
             # 提取关键字段
@@ -185,23 +272,27 @@ class MainScheduler:
             content_list_str = pdf_result.get('content_list', '[]')
             figure_dict = pdf_result.get('figure_dict', {})
             
-            print(f"✅ PDF解析完成")
-            print(f"   - Markdown内容长度: {len(md_content)} 字符")
-            print(f"   - Middle JSON长度: {len(middle_json_str)} 字符")
-            print(f"   - Content List长度: {len(content_list_str)} 字符")
-            print(f"   - 图表数量: {len(figure_dict)}")
+            logger.info(f"✅ PDF解析完成")
+            logger.info(f"   - Markdown内容长度: {len(md_content)} 字符")
+            logger.info(f"   - Middle JSON长度: {len(middle_json_str)} 字符")
+            logger.info(f"   - Content List长度: {len(content_list_str)} 字符")
+            logger.info(f"   - 图表数量: {len(figure_dict)}")
             
             # 解析JSON数据
             try:
                 middle_data = json.loads(middle_json_str)
                 content_list = json.loads(content_list_str)
-                print(f"✅ JSON解析完成")
-                print(f"   - Middle数据页数: {len(middle_data.get('pdf_info', []))}")
-                print(f"   - Content List记录数: {len(content_list)}")
+                logger.info(f"✅ JSON解析完成")
+                logger.info(f"   - Middle数据页数: {len(middle_data.get('pdf_info', []))}")
+                logger.info(f"   - Content List记录数: {len(content_list)}")
             except json.JSONDecodeError as e:
-                print(f"❌ JSON解析失败: {e}")
+                logger.error(f"❌ JSON解析失败: {e}")
                 return None
             
+            # 构建一次归一化文档模型，供后续各阶段共享
+            with span('document_model', 'cpu'):
+                document = DocumentModel(md_content, content_list)
+            
             self.processing_info['steps_completed'].append('pdf_parsing')
             
             return {
@@ -209,6 +300,7 @@ class MainScheduler:
                 'middle_data': middle_data,
                 'content_list': content_list,
                 'figure_dict': figure_dict,
+                'document': document,
                 'pdf_path': filename,  # 使用文件名作为标识
                 'pdf_info': {
                     'filename': pdf_result.get('filename', filename),
@@ -218,7 +310,7 @@ class MainScheduler:
             }
             
         except Exception as e:
-            print(f"❌ PDF解析异常: {e}")
+            logger.error(f"❌ PDF解析异常: {e}")
             self.processing_info['errors'].append(f"PDF解析异常: {e}")
             return None
 
@@ -233,13 +325,13 @@ class MainScheduler:
             Dict[str, Any]: PDF解析结果，包含md_content, middle_json, content_list, figure_dict
         """
         try:
-            print(f"📄 开始解析PDF文件: {os.path.basename(pdf_path)}")
+            logger.info(f"📄 开始解析PDF文件: {os.path.basename(pdf_path)}")
             
             # 使用PDFParserClient解析PDF
-            pdf_result = self.pdf_parser.upload_pdf(pdf_path)
+            pdf_result = self.pdf_parser.upload_pdf(pdf_path, timeout=remaining_time(self.deadline), cancel=self.cancel_token)
             
             if not pdf_result:
-                print("❌ PDF解析失败")
+                logger.error("❌ PDF解析失败")
                 return None
             
             # 提取关键字段
@@ -248,23 +340,27 @@ class MainScheduler:
             content_list_str = pdf_result.get('content_list', '[]')
             figure_dict = pdf_result.get('figure_dict', {})
             
-            print(f"✅ PDF解析完成")
-            print(f"   - Markdown内容长度: {len(md_content)} 字符")
-            print(f"   - Middle JSON长度: {len(middle_json_str)} 字符")
-            print(f"   - Content List长度: {len(content_list_str)} 字符")
-            print(f"   - 图表数量: {len(figure_dict)}")
+            logger.info(f"✅ PDF解析完成")
+            logger.info(f"   - Markdown内容长度: {len(md_content)} 字符")
+            logger.info(f"   - Middle JSON长度: {len(middle_json_str)} 字符")
+            logger.info(f"   - Content List长度: {len(content_list_str)} 字符")
+            logger.info(f"   - 图表数量: {len(figure_dict)}")
             
             # 解析JSON数据
             try:
                 middle_data = json.loads(middle_json_str)
                 content_list = json.loads(content_list_str)
-                print(f"✅ JSON解析完成")
-                print(f"   - Middle数据页数: {len(middle_data.get('pdf_info', []))}")
-                print(f"   - Content List记录数: {len(content_list)}")
+                logger.info(f"✅ JSON解析完成")
+                logger.info(f"   - Middle数据页数: {len(middle_data.get('pdf_info', []))}")
+                logger.info(f"   - Content List记录数: {len(content_list)}")
             except json.JSONDecodeError as e:
-                print(f"❌ JSON解析失败: {e}")
+                logger.error(f"❌ JSON解析失败: {e}")
                 return None
             
+            # 构建一次归一化文档模型，供后续各阶段共享
+            with span('document_model', 'cpu'):
+                document = DocumentModel(md_content, content_list)
+            
             self.processing_info['steps_completed'].append('pdf_parsing')
             
             return {
@@ -272,6 +368,7 @@ class MainScheduler:
                 'middle_data': middle_data,
                 'content_list': content_list,
                 'figure_dict': figure_dict,
+                'document': document,
                 'pdf_path': pdf_path,  # 添加PDF路径，供LaneExtractor使用
                 'pdf_info': {
                     'filename': pdf_result.get('filename', ''),
@@ -281,13 +378,13 @@ class MainScheduler:
             }
             
         except Exception as e:
-            print(f"❌ PDF解析异常: {e}")
+            logger.error(f"❌ PDF解析异常: {e}")
             self.processing_info['errors'].append(f"PDF解析异常: {e}")
             return None
     
     def _execute_parallel_processing(self, pdf_result: Dict[str, Any]) -> Dict[str, Any]:
         """
-        并行执行所有处理任务
+        按阶段依赖图并行执行所有处理任务
         
         Args:
             pdf_result: PDF解析结果
@@ -295,7 +392,7 @@ class MainScheduler:
         Returns:
             Dict[str, Any]: 并行处理结果
         """
-        print("🔄 启动线程池并行执行所有任务...")
+        logger.info("🔄 启动阶段依赖图调度所有任务...")
         
         results = {
             'success': False,
@@ -306,169 +403,230 @@ class MainScheduler:
         }
         
         try:
-            # 使用线程池并行执行三个主要任务
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                # 提交任务
-                abstract_future = executor.submit(
-                    self._execute_abstract_steps, pdf_result['md_content']
-                )
-                lane_future = executor.submit(
-                    self._execute_lane_extraction, pdf_result
-                )
-                figure_map_future = executor.submit(
-                    self._execute_figure_mapping, pdf_result
-                )
-                
-                # 收集结果
-                abstract_result = abstract_future.result()
-                lane_result = lane_future.result()
-                figure_map_result = figure_map_future.result()
-                
-                results['abstract_result'] = abstract_result
-                results['lane_result'] = lane_result
-                results['figure_map_result'] = figure_map_result
-                
-                # 检查所有任务是否成功
-                success_count = sum([
-                    1 if abstract_result else 0,
-                    1 if lane_result else 0,
-                    1 if figure_map_result else 0
-                ])
-                
-                results['success'] = success_count >= 2  # 至少2个任务成功
-                
-                if not results['success']:
-                    failed_tasks = []
-                    if not abstract_result:
-                        failed_tasks.append("AbstractSteps")
-                    if not lane_result:
-                        failed_tasks.append("LaneExtraction")
-                    if not figure_map_result:
-                        failed_tasks.append("FigureMapping")
-                    results['error'] = f"任务执行失败: {', '.join(failed_tasks)}"
+            with call_stats_scope(self.llm_stats), job_scope(self.job), cancel_scope(self.cancel_token):
+                graph_result = StageGraphExecutor(self._build_stage_graph(pdf_result)).run(deadline=self.deadline,
+                                                                                          cancel=self.cancel_token)
+            outputs = graph_result['outputs']
+            
+            # 按泳道顺序收集各泳道抽取结果（内容为空的泳道不出现在结果中）
+            lane_result = {}
+            for lane_name in self.lane_extractor.extraction_modules:
+                lane_output = outputs.get(f"lane:{lane_name}")
+                if lane_output is not None:
+                    lane_result[lane_name] = lane_output
+            
+            abstract_result = outputs.get('abstract')
+            figure_map_result = outputs.get('figure_map')
+            
+            if lane_result:
+                logger.info("✅ 泳道内容提取成功")
+                for lane_name, lane_results in lane_result.items():
+                    logger.info(f"   - {lane_name}: {len(lane_results)} 个结果")
+                self.processing_info['steps_completed'].append('lane_extraction')
+            else:
+                lane_result = None
+            
+            results['abstract_result'] = abstract_result
+            results['lane_result'] = lane_result
+            results['figure_map_result'] = figure_map_result
+            
+            # 记录阶段耗时与关键路径
+            self.processing_info['stages'] = graph_result['stages']
+            observe_stages(graph_result['stages'])
+            self.processing_info['critical_path'] = graph_result['critical_path']
+            self.processing_info['critical_path_time'] = graph_result['critical_path_time']
+            self.processing_info['timed_out'] = graph_result['timed_out']
+            self.processing_info['llm_calls'] = self.llm_stats.summary()
+            # 阶段记录附带该阶段的LLM用量（token、请求与重试次数、校验失败、延迟）
+            for stage_name, llm_usage in self.processing_info['llm_calls']['by_stage'].items():
+                if stage_name in graph_result['stages']:
+                    graph_result['stages'][stage_name]['llm'] = llm_usage
+            self.processing_info['lane_compaction'] = dict(self.lane_extractor.compaction_info)
+            for stage_name, record in graph_result['stages'].items():
+                if record['status'] in ('failed', 'timed_out'):
+                    self.processing_info['errors'].append(f"阶段 {stage_name} {record['status']}: {record['error']}")
+            if graph_result['timed_out']:
+                logger.warning(f"⏰ 超过截止时间，返回部分结果，超时阶段: {', '.join(graph_result['timed_out'])}")
+            
+            # 检查所有任务是否成功
+            success_count = sum([
+                1 if abstract_result else 0,
+                1 if lane_result else 0,
+                1 if figure_map_result else 0
+            ])
+            
+            # 至少2个任务成功；截止时间到达时只要有任务完成即返回部分结果
+            results['success'] = success_count >= 2 or (bool(graph_result['timed_out']) and success_count >= 1)
+            
+            if not results['success']:
+                failed_tasks = []
+                if not abstract_result:
+                    failed_tasks.append("AbstractSteps")
+                if not lane_result:
+                    failed_tasks.append("LaneExtraction")
+                if not figure_map_result:
+                    failed_tasks.append("FigureMapping")
+                results['error'] = f"任务执行失败: {', '.join(failed_tasks)}"
                 
         except Exception as e:
             results['error'] = f"并行执行异常: {e}"
-            print(f"❌ 并行执行失败: {e}")
+            logger.error(f"❌ 并行执行失败: {e}")
             self.processing_info['errors'].append(f"并行执行异常: {e}")
         
         return results
     
-    def _execute_abstract_steps(self, md_content: str) -> Optional[Dict[str, Any]]:
+    def _build_stage_graph(self, pdf_result: Dict[str, Any]) -> List[Stage]:
         """
-        执行AbstractSteps分析
+        构建论文处理的阶段依赖图
         
-        Args:
-            md_content: markdown内容
+        依赖关系：
+        - 解析 → {摘要语步, 一级标题, 数据合并与图表文本匹配}
+        - 一级标题 → 标题映射 → 泳道切分 → {四个泳道LLM, Innovation Discovery}
+        - 合并调用模式下：泳道切分 → 四泳道合并调用 → 四个泳道LLM（只重新请求未通过校验的泳道）
+        - {泳道切分, 图表文本匹配} → 图表泳道归属
         
-        Returns:
-            Dict[str, Any]: 分析结果，包含metadata和abstract
-        """
-        try:
-            print("📝 开始执行AbstractSteps分析...")
-            
-            # 使用analyze_abstract_steps_from_content进行分析
-            result = analyze_abstract_steps_from_content(md_content)
-            
-            if result:
-                print("✅ AbstractSteps分析成功")
-                print(f"   - 标题: {result.get('metadata', {}).get('title', 'N/A')}")
-                print(f"   - 作者数量: {len(result.get('metadata', {}).get('authors', []))}")
-                print(f"   - 摘要语步: {len(result.get('abstract', {}))}")
-                self.processing_info['steps_completed'].append('abstract_analysis')
-                return result
-            else:
-                print("❌ AbstractSteps分析失败")
-                return None
-                
-        except Exception as e:
-            print(f"❌ AbstractSteps分析异常: {e}")
-            self.processing_info['errors'].append(f"AbstractSteps分析异常: {e}")
-            return None
-    
-    def _execute_lane_extraction(self, pdf_result: Dict[str, Any]) -> Optional[Dict[str, List[Dict]]]:
-        """
-        执行泳道内容提取
+        一级标题与章节索引在解析后构建文档模型时已经生成（图表文本匹配同样依赖），headings阶段只取出并校验；
+        数据合并与引用提取在同一次进程池调用中完成，避免文档模型在进程间往返两次
         
         Args:
-            pdf_result: PDF解析结果，包含md_content等字段
+            pdf_result: PDF解析结果
         
         Returns:
-            Dict[str, List[Dict]]: 五大泳道抽取结果
+            List[Stage]: 阶段列表
         """
-        try:
-            print("🏊 开始执行泳道内容提取...")
-            
-            # 从PDF结果中获取markdown内容
-            md_content = pdf_result.get('md_content', '')
-            if not md_content:
-                print("❌ 未能从PDF文件中解析出markdown内容")
-                return None
-            
-            # 使用LaneExtractor进行完整的五大泳道抽取（基于内容）
-            lane_result = self.lane_extractor.extract_lanes_from_content(md_content)
-            
-            if lane_result:
-                print("✅ 泳道内容提取成功")
-                for lane_name, lane_results in lane_result.items():
-                    print(f"   - {lane_name}: {len(lane_results)} 个结果")
-                self.processing_info['steps_completed'].append('lane_extraction')
-                return lane_result
-            else:
-                print("❌ 泳道内容提取失败")
-                return None
-                
-        except Exception as e:
-            print(f"❌ 泳道内容提取异常: {e}")
-            self.processing_info['errors'].append(f"泳道内容提取异常: {e}")
-            return None
+        md_content = pdf_result['md_content']
+        document = pdf_result.get('document') or DocumentModel(md_content, pdf_result['content_list'])
+        content_extractor = ComprehensiveContentExtractor()
+        
+        deadline = self.deadline
+        
+        def abstract_stage(inputs):
+            result = self._execute_abstract_steps(md_content, deadline)
+            if not result:
+                raise RuntimeError("AbstractSteps分析失败")
+            return result
+        
+        def headings_stage(inputs):
+            h1_headings = content_extractor.document_headings(document)
+            if not h1_headings:
+                raise RuntimeError("未能提取到一级标题")
+            return h1_headings
+        
+        def title_mapping_stage(inputs):
+            # 标题映射LLM只调用一次，映射结果同时决定泳道文本与图表归属所用的章节区间
+            mapping_result = content_extractor.map_lane_titles(inputs['headings'], deadline)
+            if not mapping_result:
+                raise RuntimeError("标题映射失败")
+            return mapping_result
+        
+        def lane_texts_stage(inputs):
+            lane_sections = content_extractor.slice_lane_sections(document, inputs['title_mapping'])
+            if not lane_sections.get('content'):
+                raise RuntimeError("无法获取泳道内容")
+            return lane_sections
+        
+        def figure_matching_stage(inputs):
+            # CPU密集阶段在常驻进程池中执行，避免与其他阶段的线程争抢GIL
+            matching_result = self.figure_generator.match_figures_in_pool(document, pdf_result['middle_data'])
+            if not matching_result:
+                raise RuntimeError("图表文本匹配失败")
+            return matching_result
+        
+        def fused_lanes_stage(inputs):
+            # 合并调用失败不影响各泳道单独请求，因此不抛出普通异常
+            try:
+                return self.lane_extractor.extract_fused_lanes(inputs['lane_texts']['content'], deadline)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ 合并泳道调用异常，改为逐泳道请求: {e}")
+                return {}
+        
+        def make_lane_stage(lane_name):
+            def lane_stage(inputs):
+                fused_results = inputs.get('lanes:fused') or {}
+                if lane_name in fused_results:
+                    return fused_results[lane_name]
+                lane_contents = inputs['lane_texts']['content']
+                if lane_name == 'Innovation Discovery':
+                    content = self.lane_extractor.build_innovation_input(md_content, lane_contents)
+                else:
+                    content = lane_contents.get(lane_name, '')
+                if not content or not content.strip():
+                    logger.warning(f"  ⚠ 跳过空内容: {lane_name}")
+                    return None
+                return self.lane_extractor.extract_single_lane(lane_name, content, deadline)
+            return lane_stage
+        
+        def figure_map_stage(inputs):
+            lane_sections = inputs['lane_texts']
+            figure_map = self.figure_generator.assign_figure_lanes(
+                inputs['figure_matching'], document,
+                lane_sections.get('content', {}), lane_sections.get('sections', [])
+            )
+            if not figure_map:
+                raise RuntimeError("图表映射生成失败")
+            with span('attach_figure_base64', 'cpu'):
+                figure_map = self.figure_generator._attach_figure_base64(figure_map, pdf_result['figure_dict'])
+            
+            logger.info("✅ 图表映射生成成功")
+            logger.info(f"   - 总图表数: {sum(len(figures) for figures in figure_map.values())}")
+            self.processing_info['steps_completed'].append('figure_mapping')
+            return figure_map
+        
+        stages = [
+            Stage('abstract', abstract_stage, retries=STAGE_RETRIES, timeout=STAGE_TIMEOUT),
+            Stage('headings', headings_stage),
+            Stage('title_mapping', title_mapping_stage, deps=['headings'], retries=STAGE_RETRIES, timeout=STAGE_TIMEOUT),
+            Stage('lane_texts', lane_texts_stage, deps=['title_mapping'], timeout=STAGE_TIMEOUT),
+            Stage('figure_matching', figure_matching_stage, retries=STAGE_RETRIES, timeout=STAGE_TIMEOUT),
+            Stage('figure_map', figure_map_stage, deps=['lane_texts', 'figure_matching'], timeout=STAGE_TIMEOUT)
+        ]
+        if LANE_FUSED_MODE:
+            stages.append(Stage('lanes:fused', fused_lanes_stage, deps=['lane_texts'], timeout=STAGE_TIMEOUT))
+        # 各泳道LLM模块内部已有重试，阶段层面不再重试
+        for lane_name in self.lane_extractor.extraction_modules:
+            deps = ['lane_texts', 'lanes:fused'] if LANE_FUSED_MODE and lane_name in FUSED_LANE_VALIDATORS else ['lane_texts']
+            stages.append(Stage(f"lane:{lane_name}", make_lane_stage(lane_name), deps=deps, timeout=STAGE_TIMEOUT))
+        
+        return stages
     
-    def _execute_figure_mapping(self, pdf_result: Dict[str, Any]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    def _execute_abstract_steps(self, md_content: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
-        执行图表映射生成
+        执行AbstractSteps分析
         
         Args:
-            pdf_result: PDF解析结果
+            md_content: markdown内容
+            deadline: 截止时间（time.time()时间戳），None表示不限
         
         Returns:
-            Dict[str, List[Dict[str, Any]]]: 图表映射结果
+            Dict[str, Any]: 分析结果，包含metadata和abstract
+        
+        Raises:
+            DeadlineExceeded: 截止时间已到
         """
         try:
-            print("🗺️ 开始执行图表映射生成...")
-            
-            # 首先需要获取泳道内容，因为FigureMapGenerator需要它
-            md_content = pdf_result['md_content']
-            from ComprehensiveContentExtractor import ComprehensiveContentExtractor
-            content_extractor = ComprehensiveContentExtractor()
-            lane_content = content_extractor.extract_comprehensive_content_from_string(md_content)
+            logger.info("📝 开始执行AbstractSteps分析...")
             
-            if not lane_content:
-                print("❌ 无法获取泳道内容，图表映射失败")
-                return None
-            
-            # 使用FigureMapGenerator生成图表映射
-            figure_map = self.figure_generator.generate_figure_map(
-                pdf_result['content_list'],
-                pdf_result['middle_data'],
-                pdf_result['figure_dict'],
-                lane_content
-            )
+            # 使用analyze_abstract_steps_from_content进行分析
+            result = analyze_abstract_steps_from_content(md_content, deadline)
             
-            if figure_map:
-                print("✅ 图表映射生成成功")
-                total_figures = sum(len(figures) for figures in figure_map.values())
-                print(f"   - 总图表数: {total_figures}")
-                for lane_name, figures in figure_map.items():
-                    print(f"   - {lane_name}: {len(figures)} 个图表")
-                self.processing_info['steps_completed'].append('figure_mapping')
-                return figure_map
+            if result:
+                logger.info("✅ AbstractSteps分析成功")
+                logger.info(f"   - 标题: {result.get('metadata', {}).get('title', 'N/A')}")
+                logger.info(f"   - 作者数量: {len(result.get('metadata', {}).get('authors', []))}")
+                logger.info(f"   - 摘要语步: {len(result.get('abstract', {}))}")
+                self.processing_info['steps_completed'].append('abstract_analysis')
+                return result
             else:
-                print("❌ 图表映射生成失败")
+                logger.error("❌ AbstractSteps分析失败")
                 return None
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"❌ 图表映射生成异常: {e}")
-            self.processing_info['errors'].append(f"图表映射生成异常: {e}")
+            logger.error(f"❌ AbstractSteps分析异常: {e}")
+            self.processing_info['errors'].append(f"AbstractSteps分析异常: {e}")
             return None
     
     def _generate_final_json(self, pdf_result: Dict[str, Any], parallel_results: Dict[str, Any]) -> Dict[str, Any]:
@@ -483,18 +641,22 @@ class MainScheduler:
             Dict[str, Any]: 最终的超大JSON对象
         """
         try:
-            print("🎯 开始生成最终超大JSON对象...")
+            logger.info("🎯 开始生成最终超大JSON对象...")
+            
+            # 超时或失败的阶段输出为None，按空结果处理
+            abstract_result = parallel_results.get('abstract_result') or {}
+            timed_out = self.processing_info.get('timed_out', [])
             
             # 构建最终的超大JSON对象
             final_result = {
                 # 论文元数据
-                'metadata': parallel_results.get('abstract_result', {}).get('metadata', {
+                'metadata': abstract_result.get('metadata', {
                     'title': '',
                     'authors': []
                 }),
                 
                 # 摘要语步
-                'abstract': parallel_results.get('abstract_result', {}).get('abstract', {
+                'abstract': abstract_result.get('abstract', {
                     'Background/Problem': '',
                     'Method/Approach': '',
                     'Result': '',
@@ -502,10 +664,14 @@ class MainScheduler:
                 }),
                 
                 # 五大泳道内容
-                'lanes': parallel_results.get('lane_result', {}),
+                'lanes': parallel_results.get('lane_result') or {},
                 
                 # 图表映射
-                'figure_map': parallel_results.get('figure_map_result', {}),
+                'figure_map': parallel_results.get('figure_map_result') or {},
+                
+                # 超过截止时间的阶段（如 'abstract'、'lane:Methodology & Setup'），结果不完整
+                'timed_out': timed_out,
+                'partial': bool(timed_out),
                 
                 # PDF信息
                 'pdf_info': pdf_result.get('pdf_info', {}),
@@ -515,6 +681,13 @@ class MainScheduler:
                     'total_time': self.processing_info['total_time'],
                     'steps_completed': self.processing_info['steps_completed'],
                     'errors': self.processing_info['errors'],
+                    'stages': self.processing_info.get('stages', {}),
+                    'critical_path': self.processing_info.get('critical_path', []),
+                    'critical_path_time': self.processing_info.get('critical_path_time', 0),
+                    'timed_out': timed_out,
+                    'llm_calls': self.processing_info.get('llm_calls', {}),
+                    'lane_compaction': self.processing_info.get('lane_compaction', {}),
+                    'trace_id': self.tracer.trace_id,
                     'success': len(self.processing_info['errors']) == 0
                 },
                 
@@ -526,11 +699,11 @@ class MainScheduler:
                 }
             }
             
-            print("✅ 最终超大JSON对象生成成功")
-            print(f"   - 元数据: {'✅' if final_result['metadata']['title'] else '❌'}")
-            print(f"   - 摘要语步: {'✅' if final_result['abstract'] else '❌'}")
-            print(f"   - 泳道内容: {'✅' if final_result['lanes'] else '❌'}")
-            print(f"   - 图表映射: {'✅' if final_result['figure_map'] else '❌'}")
+            logger.info("✅ 最终超大JSON对象生成成功")
+            logger.info(f"   - 元数据: {'✅' if final_result['metadata']['title'] else '❌'}")
+            logger.info(f"   - 摘要语步: {'✅' if final_result['abstract'] else '❌'}")
+            logger.info(f"   - 泳道内容: {'✅' if final_result['lanes'] else '❌'}")
+            logger.info(f"   - 图表映射: {'✅' if final_result['figure_map'] else '❌'}")
             
             self.processing_info['steps_completed'].append('final_json_generation')
             
@@ -541,10 +714,23 @@ class MainScheduler:
             return final_result
             
         except Exception as e:
-            print(f"❌ 最终JSON生成异常: {e}")
+            logger.error(f"❌ 最终JSON生成异常: {e}")
             self.processing_info['errors'].append(f"最终JSON生成异常: {e}")
             return self._create_error_result(f"最终JSON生成异常: {e}")
     
+    def _create_cancelled_result(self) -> Dict[str, Any]:
+        """
+        创建已取消的结果（客户端已不再等待，只用于日志、指标与后台任务）
+        
+        Returns:
+            Dict[str, Any]: cancelled为True的错误结果
+        """
+        logger.info(f"🛑 处理已取消: {self.cancel_token.reason}")
+        result = self._create_error_result(f"处理已取消: {self.cancel_token.reason}",
+                                           time.time() - self.processing_info['start_time'])
+        result['cancelled'] = True
+        return result
+    
     def _create_error_result(self, error_message: str, total_time: float = 0.0) -> Dict[str, Any]:
         """
         创建错误结果
@@ -564,6 +750,7 @@ class MainScheduler:
                 'total_time': total_time,
                 'steps_completed': self.processing_info['steps_completed'],
                 'errors': self.processing_info['errors'] + [error_message],
+                'trace_id': self.tracer.trace_id,
                 'success': False
             }
         }
@@ -571,10 +758,16 @@ class MainScheduler:
 
 def main():
     """主函数 - 测试综合主调度器"""
+    parser = argparse.ArgumentParser(description="综合主调度器测试")
+    parser.add_argument('pdf_path', nargs='?', default="/Users/xiaokong/Desktop/1701.06538v1.pdf", help="PDF文件路径")
+    parser.add_argument('--profile', action='store_true', help="按阶段采样调用栈与内存峰值，结果写入PROFILE_DIR")
+    args = parser.parse_args()
+    
+    configure_logging()
     print("=== 综合主调度器测试 ===")
     
     # 测试PDF文件路径（请根据实际情况修改）
-    test_pdf_path = "/Users/xiaokong/Desktop/1701.06538v1.pdf"
+    test_pdf_path = args.pdf_path
     
     # 检查PDF文件是否存在
     if not os.path.exists(test_pdf_path):
@@ -583,7 +776,7 @@ def main():
         return
     
     # 创建调度器
-    scheduler = MainScheduler()
+    scheduler = MainScheduler(profile=args.profile)
     
     # 执行处理
     print(f"🚀 开始处理PDF文件: {os.path.basename(test_pdf_path)}")
@@ -3,17 +3,15 @@ Methodology & Setup部分JSON总结生成系统
 从大段文本中动态提取3-5个关键点的JSON总结
 """
 
+import logging
 import asyncio
-import aiohttp
 import json
-import time
 from typing import Optional, Dict, Any
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL, MAX_RETRIES, MAX_TOKENS, TEMPERATURE
+from config import MAX_RETRIES, LLM_HEDGING
+from LLMClient import request_json, DeadlineExceeded, trim_key_points, describe_key_point_problems, schema_max_tokens, stage_settings
+from LaneMapReduce import map_reduce_lane
 
-# DeepSeek API配置
-API_KEY = DEEPSEEK_API_KEY
-API_URL = DEEPSEEK_API_URL
-MODEL = DEEPSEEK_MODEL
+logger = logging.getLogger(__name__)
 
 # 系统提示词
 SYSTEM_PROMPT = """You are a highly specialized cross-disciplinary academic structure analyst. Your sole mission is to execute an advanced multi-step reasoning task:
@@ -32,6 +30,9 @@ SYSTEM_PROMPT = """You are a highly specialized cross-disciplinary academic stru
 2.  You MUST NOT output any explanation, prelude, or text outside of the raw JSON object.
 3.  If a summary cannot be extracted, output **"N/A"** as the value for that key."""
 
+# 输出上限：5个关键点 ×（4词标题 + 60词摘要）
+OUTPUT_MAX_TOKENS = schema_max_tokens(items=5, words_per_item=60, title_words=4)
+
 # 用户提示词模板
 USER_PROMPT_TEMPLATE = """Please execute your multi-step reasoning task for the **Methodology & Setup** lane. Dynamically extract and summarize the core key points from the following section text.
 
@@ -49,82 +50,41 @@ Strictly output your result as a concise key-value JSON object:
   // ... maximum of 5 keys
 }}"""
 
-async def call_deepseek_api(text: str, max_retries: int = MAX_RETRIES) -> Optional[Dict[str, str]]:
+async def call_deepseek_api(text: str, max_retries: int = MAX_RETRIES, deadline: Optional[float] = None) -> Optional[Dict[str, str]]:
     """
     调用DeepSeek API分析文本并返回JSON格式的Methodology & Setup总结
     
     Args:
         text: 要分析的文本内容
         max_retries: 最大重试次数，默认2次
+        deadline: 截止时间（time.time()时间戳），None表示不限
         
     Returns:
         包含动态关键点的字典，如果失败返回None
+        
+    Raises:
+        DeadlineExceeded: 截止时间已到
     """
     user_prompt = USER_PROMPT_TEMPLATE.format(text=text)
     
-    payload = {
-        "model": MODEL,
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ],
-        "temperature": TEMPERATURE,
-        "max_tokens": MAX_TOKENS
-    }
-    
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    for attempt in range(max_retries + 1):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(API_URL, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result['choices'][0]['message']['content'].strip()
-                        
-                        # 尝试解析JSON
-                        try:
-                            # 清理可能的markdown代码块标记
-                            if content.startswith('```json'):
-                                content = content[7:]
-                            if content.endswith('```'):
-                                content = content[:-3]
-                            content = content.strip()
-                            
-                            json_result = json.loads(content)
-                            
-                            # 验证JSON结构
-                            if validate_methodology_json(json_result):
-                                return json_result
-                            else:
-                                print(f"警告：JSON结构不符合要求，尝试 {attempt + 1}/{max_retries + 1}")
-                                if attempt < max_retries:
-                                    await asyncio.sleep(1)
-                                    continue
-                                
-                        except json.JSONDecodeError as e:
-                            print(f"JSON解析失败，尝试 {attempt + 1}/{max_retries + 1}: {e}")
-                            print(f"原始响应: {content}")
-                            if attempt < max_retries:
-                                await asyncio.sleep(1)
-                                continue
-                    else:
-                        print(f"API请求失败，状态码: {response.status}")
-                        if attempt < max_retries:
-                            await asyncio.sleep(2)
-                            continue
-                            
-        except Exception as e:
-            print(f"请求异常，尝试 {attempt + 1}/{max_retries + 1}: {e}")
-            if attempt < max_retries:
-                await asyncio.sleep(2)
-                continue
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
     
-    print("所有重试尝试均失败")
-    return None
+    return await request_json(
+        messages,
+        validator=validate_methodology_json,
+        max_retries=max_retries,
+        deadline=deadline,
+        label="Methodology & Setup",
+        hedge=LLM_HEDGING,
+        json_mode=True,
+        normalizer=trim_key_points,
+        describe_problems=describe_key_point_problems,
+        max_keys=5,
+        **stage_settings('lane', OUTPUT_MAX_TOKENS)
+    )
 
 def validate_methodology_json(result: Dict[str, str]) -> bool:
     """
@@ -142,7 +102,7 @@ def validate_methodology_json(result: Dict[str, str]) -> bool:
     # 检查关键点数量（3-5个）
     key_count = len(result)
     if key_count < 3 or key_count > 5:
-        print(f"关键点数量不符合要求: {key_count} (要求: 3-5个)")
+        logger.info(f"关键点数量不符合要求: {key_count} (要求: 3-5个)")
         return False
     
     # 检查每个字段的值
@@ -153,32 +113,39 @@ def validate_methodology_json(result: Dict[str, str]) -> bool:
         # 检查标题长度（不超过4个英文单词）
         key_word_count = len(key.split())
         if key_word_count > 4:
-            print(f"标题超过4个单词限制: '{key}' ({key_word_count} 个单词)")
+            logger.info(f"标题超过4个单词限制: '{key}' ({key_word_count} 个单词)")
             return False
         
         # 检查摘要长度（不超过60个英文单词）
         value_word_count = len(value.split())
         if value_word_count > 60:
-            print(f"摘要超过60个单词限制: '{key}' ({value_word_count} 个单词)")
+            logger.info(f"摘要超过60个单词限制: '{key}' ({value_word_count} 个单词)")
             return False
     
     return True
 
-def analyze_methodology_setup_sync(text: str, max_retries: int = MAX_RETRIES) -> Optional[Dict[str, str]]:
+def analyze_methodology_setup_sync(text: str, max_retries: int = MAX_RETRIES, deadline: Optional[float] = None) -> Optional[Dict[str, str]]:
     """
     同步版本的Methodology & Setup分析函数
     
     Args:
         text: 要分析的文本内容
         max_retries: 最大重试次数，默认2次
+        deadline: 截止时间（time.time()时间戳），None表示不限
         
     Returns:
         包含动态关键点的字典，如果失败返回None
+        
+    Raises:
+        DeadlineExceeded: 截止时间已到（不视为普通失败，由调用方标记timed_out）
     """
     try:
-        return asyncio.run(call_deepseek_api(text, max_retries))
+        # 超长文本自动切块并发总结后归约
+        return asyncio.run(map_reduce_lane(text, "Methodology & Setup", call_deepseek_api, max_retries, deadline))
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        print(f"同步调用失败: {e}")
+        logger.warning(f"同步调用失败: {e}")
         return None
 
 def validate_json_output(result: Optional[Dict[str, str]]) -> bool:
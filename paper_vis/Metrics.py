@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus指标
+论文处理各阶段的延迟直方图、运行状态仪表与LLM用量计数器，由api_server的GET /metrics导出
+
+指标：
+- 直方图：PDF解析耗时、逐次LLM请求延迟（按调用标签）、阶段耗时、图表流程CPU时间、端到端耗时、准入排队时间、LLM名额等待时间（按优先级类别）
+- 仪表：处理中的论文数、等待处理的请求数、已准入任务的估算内存、图表进程池的任务数/工作进程数/利用率
+- 计数器：LLM请求、重试、上游429、失败、token与缓存命中token、论文处理结果、未被准入的请求、合并到进行中相同任务的请求、客户端断开后被放弃的任务
+
+核心特性：
+- 设置PROMETHEUS_MULTIPROC_DIR（启动前清空）时使用prometheus_client的多进程模式，
+  多个uvicorn worker与图表进程池写入同一目录，/metrics汇总所有进程
+- 仪表按多进程语义声明：计数类仪表（livesum）在进程间求和，利用率（liveall）按进程分别导出
+"""
+
+import functools
+import os
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# 秒级阶段（解析、LLM、端到端）的直方图分桶
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 90, 120, 180, 300, 600)
+# CPU阶段的直方图分桶
+CPU_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+PARSE_SECONDS = Histogram('paper_vis_parse_seconds', 'PDF解析耗时（秒）', buckets=LATENCY_BUCKETS)
+LLM_REQUEST_SECONDS = Histogram(
+    'paper_vis_llm_request_seconds', '单次LLM请求延迟（秒）', ['label', 'status'], buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram('paper_vis_stage_seconds', '阶段依赖图中各阶段耗时（秒）', ['stage', 'status'],
+                          buckets=LATENCY_BUCKETS)
+FIGURE_CPU_SECONDS = Histogram('paper_vis_figure_cpu_seconds', '图表流程CPU时间（秒）', ['step'], buckets=CPU_BUCKETS)
+END_TO_END_SECONDS = Histogram('paper_vis_end_to_end_seconds', '单篇论文端到端耗时（秒）', ['outcome'],
+                               buckets=LATENCY_BUCKETS)
+
+INFLIGHT_JOBS = Gauge('paper_vis_inflight_jobs', '处理中的论文数', multiprocess_mode='livesum')
+QUEUE_DEPTH = Gauge('paper_vis_queue_depth', '已到达但尚未开始处理的请求数', multiprocess_mode='livesum')
+FIGURE_POOL_TASKS = Gauge('paper_vis_figure_pool_tasks', '图表进程池中已提交未完成的任务数', multiprocess_mode='livesum')
+FIGURE_POOL_WORKERS = Gauge('paper_vis_figure_pool_workers', '图表进程池工作进程数', multiprocess_mode='livesum')
+FIGURE_POOL_UTILIZATION = Gauge('paper_vis_figure_pool_utilization', '图表进程池利用率（忙碌进程/工作进程）',
+                                multiprocess_mode='liveall')
+
+LLM_REQUESTS = Counter('paper_vis_llm_requests', 'LLM请求数', ['label', 'status'])
+LLM_RETRIES = Counter('paper_vis_llm_retries', 'LLM重试请求数（含纠正提示，不含对冲请求）', ['label'])
+LLM_RATE_LIMITED = Counter('paper_vis_llm_rate_limited', 'LLM上游返回429的请求数', ['label'])
+LLM_FAILURES = Counter('paper_vis_llm_failures', '失败的LLM请求数', ['label', 'reason'])
+LLM_TOKENS = Counter('paper_vis_llm_tokens', 'LLM token用量', ['label', 'kind'])
+LLM_CACHE_HIT_TOKENS = Counter('paper_vis_llm_cache_hit_tokens', 'LLM提示词缓存命中token数', ['label'])
+PAPERS = Counter('paper_vis_papers', '论文处理结果', ['outcome'])
+SINGLE_FLIGHT_SHARED = Counter('paper_vis_single_flight_shared', '合并到进行中相同任务的请求数', ['kind'])
+ABANDONED_JOBS = Counter('paper_vis_abandoned_jobs', '所有客户端断开后被取消或转入后台的任务数', ['action'])
+
+ADMISSION_WAIT_SECONDS = Histogram('paper_vis_admission_wait_seconds', '准入前的排队时间（秒）', ['priority'],
+                                   buckets=LATENCY_BUCKETS)
+ADMISSION_REJECTIONS = Counter('paper_vis_admission_rejections', '未被准入的请求数', ['priority', 'reason'])
+LLM_SLOT_WAIT_SECONDS = Histogram('paper_vis_llm_slot_wait_seconds', '等待LLM并发名额的时间（秒）', ['priority'],
+                                  buckets=CPU_BUCKETS)
+RESERVED_MEMORY_BYTES = Gauge('paper_vis_reserved_memory_bytes', '已准入任务的估算内存总和（字节）',
+                              multiprocess_mode='livesum')
+
+
+def observe_llm_call(call: Dict[str, Any]):
+    """
+    记录一次LLM请求
+
+    Args:
+        call: 逐次请求记录（见LLMClient.LLMCallStats.record_call）
+    """
+    label, status = call['label'], call['status']
+    LLM_REQUEST_SECONDS.labels(label, status).observe(call['latency'])
+    LLM_REQUESTS.labels(label, status).inc()
+    if call['attempt'] > 0 and not call['hedge']:
+        LLM_RETRIES.labels(label).inc()
+    if status == 'status_429':
+        LLM_RATE_LIMITED.labels(label).inc()
+    if status not in ('ok', 'cancelled'):
+        LLM_FAILURES.labels(label, status).inc()
+    LLM_TOKENS.labels(label, 'prompt').inc(call['prompt_tokens'])
+    LLM_TOKENS.labels(label, 'completion').inc(call['completion_tokens'])
+    LLM_CACHE_HIT_TOKENS.labels(label).inc(call['cache_hit_tokens'])
+
+
+def observe_stages(stages: Dict[str, Dict[str, Any]]):
+    """
+    记录阶段依赖图中已启动阶段的耗时
+
+    Args:
+        stages: StageGraphExecutor.run返回的阶段记录
+    """
+    for name, record in stages.items():
+        if record['start'] is not None and record['end'] is not None:
+            STAGE_SECONDS.labels(name, record['status']).observe(record['duration'])
+
+
+def set_figure_pool_usage(tasks: int, workers: int):
+    """
+    更新图表进程池仪表
+
+    Args:
+        tasks: 已提交未完成的任务数
+        workers: 工作进程数
+    """
+    FIGURE_POOL_TASKS.set(tasks)
+    FIGURE_POOL_WORKERS.set(workers)
+    FIGURE_POOL_UTILIZATION.set(min(tasks, workers) / workers if workers else 0.0)
+
+
+def track_paper(func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    装饰MainScheduler的论文处理入口：计入处理中的论文数，按结果（success、partial、failed、cancelled）记录端到端耗时
+
+    Args:
+        func: 返回最终JSON的处理函数
+
+    Returns:
+        装饰后的函数
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        outcome = 'error'
+        INFLIGHT_JOBS.inc()
+        try:
+            result = func(*args, **kwargs)
+            if result.get('cancelled'):
+                outcome = 'cancelled'
+            elif not result.get('success'):
+                outcome = 'failed'
+            else:
+                outcome = 'partial' if result.get('partial') else 'success'
+            return result
+        finally:
+            INFLIGHT_JOBS.dec()
+            END_TO_END_SECONDS.labels(outcome).observe(time.time() - start)
+            PAPERS.labels(outcome).inc()
+    return wrapper
+
+
+def metrics_payload() -> Tuple[bytes, str]:
+    """
+    生成Prometheus文本格式的指标
+
+    Returns:
+        Tuple[bytes, str]: (指标内容, Content-Type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """
+    多进程模式下清理已退出进程的live仪表数据（worker退出时调用）
+
+    Args:
+        pid: 进程ID
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单请求性能剖析
+仅对显式开启剖析的论文（/paper_vis?profile=true、X-Profile请求头或MainScheduler命令行--profile）
+按阶段采样调用栈并记录Python内存峰值，结果写入PROFILE_DIR并在processing_info.profile中给出路径
+
+功能：
+- 采样剖析：后台线程每PROFILE_SAMPLE_INTERVAL秒读取已登记线程的调用栈，按阶段累计
+  （阶段线程由StageGraph登记，主线程登记为paper）
+- 内存：tracemalloc记录每个阶段开始、结束时的已分配内存与阶段运行期间采样到的峰值
+- 导出：profile.json（各阶段采样数、自身/累计耗时最高的函数、内存）与每个阶段的折叠调用栈
+  （<阶段>.folded，可直接交给flamegraph.pl或speedscope）
+
+核心特性：
+- 采样而非cProfile：Python 3.12起同一时刻只能有一个cProfile剖析器，无法按阶段线程并发剖析
+- 未开启剖析时每个阶段只多一次上下文变量读取
+- tracemalloc是进程级的，剖析期间同进程其他请求的分配也会计入内存数字，且有一定开销
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from config import PROFILE_SAMPLE_INTERVAL
+
+# 折叠调用栈的最大深度
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(frame) -> str:
+    """调用栈帧的函数标签：函数名（文件名:首行号）"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold_stack(frame) -> str:
+    """将调用栈折叠为 根;...;叶 形式"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class RequestProfiler:
+    """单请求的采样剖析器"""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, trace_memory: bool = True):
+        """
+        初始化剖析器
+
+        Args:
+            interval: 采样间隔（秒）
+            trace_memory: 是否用tracemalloc记录内存
+        """
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._threads: Dict[int, str] = {}  # 线程ident -> 当前阶段
+        self._stacks: Dict[str, Counter] = {}  # 阶段 -> {折叠调用栈: 采样数}
+        self._memory: Dict[str, Dict[str, int]] = {}  # 阶段 -> {'start', 'end', 'peak'}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._owns_tracemalloc = False
+
+    def start(self):
+        """启动采样线程（必要时启动tracemalloc）"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._sampler = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """停止采样（由本剖析器启动的tracemalloc一并停止）"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    @staticmethod
+    def _traced_memory() -> Optional[int]:
+        """当前tracemalloc已分配字节数，未启用时返回None"""
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        将当前线程登记到阶段，区间内的采样与内存计入该阶段
+
+        Args:
+            name: 阶段名称
+        """
+        ident = threading.get_ident()
+        memory = self._traced_memory()
+        with self._lock:
+            previous = self._threads.get(ident)
+            self._threads[ident] = name
+            self._stacks.setdefault(name, Counter())
+            if memory is not None:
+                record = self._memory.setdefault(name, {'start': memory, 'end': memory, 'peak': memory})
+                record['peak'] = max(record['peak'], memory)
+        try:
+            yield
+        finally:
+            memory = self._traced_memory()
+            with self._lock:
+                if previous is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._threads[ident] = previous
+                if memory is not None and name in self._memory:
+                    self._memory[name]['end'] = memory
+                    self._memory[name]['peak'] = max(self._memory[name]['peak'], memory)
+
+    def _run(self):
+        """采样循环"""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            memory = self._traced_memory()
+            with self._lock:
+                for ident, name in self._threads.items():
+                    frame = frames.get(ident)
+                    if frame is None or ident == own:
+                        continue
+                    self._stacks[name][_fold_stack(frame)] += 1
+                    if memory is not None and name in self._memory:
+                        self._memory[name]['peak'] = max(self._memory[name]['peak'], memory)
+
+    def summary(self, top: int = 15) -> Dict[str, Any]:
+        """
+        汇总各阶段的采样结果
+
+        Args:
+            top: 每个阶段列出的函数数
+
+        Returns:
+            Dict[str, Any]: {阶段: {'samples', 'sampled_seconds', 'top_self', 'top_cumulative', 'memory'}}，
+                函数条目为 [函数标签, 采样占比]；memory为 {'start', 'end', 'peak'} 字节数
+        """
+        with self._lock:
+            stacks = {name: Counter(counter) for name, counter in self._stacks.items()}
+            memory = {name: dict(record) for name, record in self._memory.items()}
+
+        result = {}
+        for name, counter in stacks.items():
+            samples = sum(counter.values())
+            self_counts, cumulative_counts = Counter(), Counter()
+            for stack, count in counter.items():
+                frames = stack.split(';')
+                self_counts[frames[-1]] += count
+                for label in set(frames):
+                    cumulative_counts[label] += count
+            result[name] = {
+                'samples': samples,
+                'sampled_seconds': samples * self.interval,
+                'top_self': [[label, count / samples] for label, count in self_counts.most_common(top)] if samples else [],
+                'top_cumulative': [[label, count / samples] for label, count in cumulative_counts.most_common(top)] if samples else [],
+                'memory': memory.get(name)
+            }
+        return result
+
+    def export(self, directory: str) -> Dict[str, Any]:
+        """
+        写出profile.json与各阶段的折叠调用栈
+
+        Args:
+            directory: 输出目录
+
+        Returns:
+            Dict[str, Any]: {'dir': 输出目录, 'summary': 各阶段汇总}
+        """
+        os.makedirs(directory, exist_ok=True)
+        summary = self.summary()
+        with open(os.path.join(directory, 'profile.json'), 'w', encoding='utf-8') as f:
+            json.dump({'interval': self.interval, 'stages': summary}, f, ensure_ascii=False, indent=2)
+        with self._lock:
+            stacks = {name: Counter(counter) for name, counter in self._stacks.items()}
+        for name, counter in stacks.items():
+            filename = re.sub(r'[^\w.-]+', '_', name) + '.folded'
+            with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+                for stack, count in counter.most_common():
+                    f.write(f"{stack} {count}\n")
+        return {'dir': directory, 'summary': summary}
+
+
+_current_profiler: ContextVar[Optional[RequestProfiler]] = ContextVar('request_profiler', default=None)
+
+
+@contextmanager
+def profile_scope(profiler: RequestProfiler) -> Iterator[RequestProfiler]:
+    """
+    在当前上下文中绑定剖析器并启动采样，退出时停止
+
+    Args:
+        profiler: 剖析器
+    """
+    token = _current_profiler.set(profiler)
+    profiler.start()
+    try:
+        with profiler.stage('paper'):
+            yield profiler
+    finally:
+        profiler.stop()
+        _current_profiler.reset(token)
+
+
+def profiling_active() -> bool:
+    """当前上下文是否开启了剖析"""
+    return _current_profiler.get() is not None
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """
+    当前上下文开启剖析时将线程登记到阶段，否则不做任何事
+
+    Args:
+        name: 阶段名称
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
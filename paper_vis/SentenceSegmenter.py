@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+句子切分器
+单次扫描切分句子并返回原文偏移，供FigureReferenceExtractor、DocumentModel与LaneMapReduce共用
+
+功能：
+- split_spans：返回每个句子在原文中的 (start, end) 偏移
+- split：返回句子文本
+
+核心特性：
+- 线性时间：只在 [.!?] + 空白处检查边界，缩写判断只回看紧邻的单词
+- 不在图表/公式编号缩写（Fig. 3、Eq. 4等）与常见拉丁缩写（et al.、e.g.、i.e.、cf.、vs.）处切分
+- 句子不含句末分隔标点，首尾无空白
+"""
+
+import re
+from typing import List, Tuple
+
+
+class SentenceSegmenter:
+    """
+    线性时间句子切分器
+
+    在 [.!?] + 空白处切分句子，但不会在以下缩写处切分：
+    - 图表/公式编号前的缩写：Fig. 3、Figs. 2、Tab. 1、Table. 1、Eq. 4（后跟数字时）
+    - 常见拉丁缩写：et al.、e.g.、i.e.、cf.、vs.
+
+    切分结果为原文中的 (start, end) 偏移，句子文本为 text[start:end]，
+    不含句末分隔标点，首尾无空白（与原先 re.split 后 strip 的结果一致）。
+    """
+
+    # 仅在后跟数字时保护的编号缩写
+    NUMBERED_ABBREVIATIONS = {'fig', 'figs', 'tab', 'table', 'eq', 'eqs'}
+
+    # 任何情况下都不作为句末的缩写
+    ABBREVIATIONS = {'e.g', 'i.e', 'cf', 'vs'}
+
+    def __init__(self):
+        """初始化切分器"""
+        self._boundary_pattern = re.compile(r'[.!?]\s+')
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        切分句子并返回偏移
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            List[Tuple[int, int]]: 每个句子在原文中的 (start, end)
+        """
+        spans = []
+        if not text:
+            return spans
+
+        segment_start = 0
+        for match in self._boundary_pattern.finditer(text):
+            if text[match.start()] == '.' and self._is_abbreviation(text, match.start(), match.end()):
+                continue
+            self._append_span(text, segment_start, match.start(), spans)
+            segment_start = match.end()
+
+        self._append_span(text, segment_start, len(text), spans)
+        return spans
+
+    def split(self, text: str) -> List[str]:
+        """
+        切分句子并返回句子文本
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            List[str]: 句子列表
+        """
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def _is_abbreviation(self, text: str, dot_pos: int, next_pos: int) -> bool:
+        """判断dot_pos处的句点是否属于缩写（只回看紧邻的单词，整体仍为线性）"""
+        word_start = dot_pos
+        while word_start > 0 and (text[word_start - 1].isalpha() or text[word_start - 1] == '.'):
+            word_start -= 1
+        word = text[word_start:dot_pos].lower()
+
+        if word in self.ABBREVIATIONS:
+            return True
+        if word == 'al':
+            return text[max(0, word_start - 3):word_start].lower() == 'et '
+        if word in self.NUMBERED_ABBREVIATIONS:
+            return next_pos < len(text) and text[next_pos].isdigit()
+        return False
+
+    @staticmethod
+    def _append_span(text: str, start: int, end: int, spans: List[Tuple[int, int]]):
+        """去除首尾空白后追加非空句子区间"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进行中任务的合并（single-flight）
+相同的工作同时只执行一次，之后到达的相同请求等待进行中任务的结果，而不是重新执行
+
+功能：
+- TaskSingleFlight：事件循环内按键合并协程（api_server按PDF的SHA-256合并同时上传的同一篇论文）
+- SingleFlight：线程安全、可跨事件循环的合并（LLMClient合并同一时刻发出的相同提示词请求，
+  各阶段线程各自在asyncio.run中调用LLM）
+
+核心特性：
+- 只合并进行中的任务，完成后立即移除；只缓存转入后台的任务结果（DETACH_ON_DISCONNECT）
+- 领头任务以独立的asyncio任务执行，某个等待方被取消或断开连接不影响其他等待方
+- 所有等待方都断开连接后，任务默认经取消信号（CancelToken）停止，或转入后台继续执行并缓存结果，
+  次数按动作计入paper_vis_abandoned_jobs指标
+- 合并次数按类别计入paper_vis_single_flight_shared指标
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from Cancellation import CancelToken
+from config import DETACH_ON_DISCONNECT, DETACHED_RESULT_MAX, DETACHED_RESULT_TTL
+from Metrics import ABANDONED_JOBS, SINGLE_FLIGHT_SHARED
+
+logger = logging.getLogger(__name__)
+
+
+class Disconnected(Exception):
+    """等待方（客户端）已断开连接，不再等待任务结果"""
+
+
+class _Flight:
+    """进行中的任务及其等待方"""
+
+    def __init__(self, token: CancelToken):
+        self.token = token
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.detached = False
+
+
+class TaskSingleFlight:
+    """事件循环内按键合并进行中的协程（只在同一个事件循环中使用）"""
+
+    def __init__(self, kind: str, detach: bool = DETACH_ON_DISCONNECT, result_ttl: float = DETACHED_RESULT_TTL,
+                 max_results: int = DETACHED_RESULT_MAX):
+        """
+        Args:
+            kind: 合并类别（指标标签与日志）
+            detach: 所有等待方断开后是否转入后台继续执行（否则取消任务）
+            result_ttl: 后台任务结果的缓存秒数
+            max_results: 缓存的后台任务结果数上限
+        """
+        self.kind = kind
+        self.detach = detach
+        self.result_ttl = result_ttl
+        self.max_results = max(0, max_results)
+        self._flights: Dict[str, _Flight] = {}
+        self._results: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+
+    async def run(self, key: Optional[str], factory: Callable[[CancelToken], Awaitable[Any]],
+                  disconnected: Optional[Awaitable[Any]] = None) -> Any:
+        """
+        执行或加入进行中的相同任务
+
+        Args:
+            key: 合并键，None表示不合并
+            factory: 以取消信号为参数创建任务协程的函数（只在没有进行中的相同任务时调用）
+            disconnected: 等待方断开连接时完成的协程；所有等待方都断开后任务被取消或转入后台
+
+        Returns:
+            任务结果（领头任务抛出的异常同样传给所有等待方）
+
+        Raises:
+            Disconnected: 等待方在任务完成前断开连接
+        """
+        cached = self._cached(key)
+        if cached is not None:
+            SINGLE_FLIGHT_SHARED.labels(self.kind).inc()
+            logger.info(f"🔗 {self.kind} {key[-12:]} 已在后台处理完成，返回缓存结果")
+            if disconnected is not None and asyncio.iscoroutine(disconnected):
+                disconnected.close()
+            return cached
+
+        flight = self._flights.get(key) if key is not None else None
+        if flight is None:
+            flight = _Flight(CancelToken())
+            flight.task = asyncio.ensure_future(factory(flight.token))
+            flight.task.add_done_callback(lambda done: self._finished(key, flight))
+            if key is not None:
+                self._flights[key] = flight
+        else:
+            SINGLE_FLIGHT_SHARED.labels(self.kind).inc()
+            logger.info(f"🔗 {self.kind} {key[-12:]} 已在处理中，等待同一结果")
+
+        flight.waiters += 1
+        try:
+            if disconnected is None:
+                return await asyncio.shield(flight.task)
+            watch = asyncio.ensure_future(disconnected)
+            try:
+                # asyncio.wait不会取消任务本身，某个等待方离开不影响其他等待方
+                done, _ = await asyncio.wait({flight.task, watch}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                watch.cancel()
+            if flight.task in done:
+                return flight.task.result()
+            raise Disconnected(f"{self.kind} 等待方已断开连接")
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                self._abandon(key, flight)
+
+    def _abandon(self, key: Optional[str], flight: _Flight):
+        """所有等待方都已离开：取消任务，或在允许时转入后台继续执行"""
+        if self.detach and key is not None and self.max_results:
+            if not flight.detached:
+                flight.detached = True
+                ABANDONED_JOBS.labels('detached').inc()
+                logger.info(f"📦 {self.kind} {key[-12:]} 的等待方均已断开，转入后台继续处理，结果缓存 {self.result_ttl:.0f} 秒")
+            return
+        ABANDONED_JOBS.labels('cancelled').inc()
+        # 立即移除，之后到达的相同请求重新执行，不会加入已取消的任务
+        self._forget(key, flight)
+        flight.token.cancel()
+
+    def _finished(self, key: Optional[str], flight: _Flight):
+        self._forget(key, flight)
+        task = flight.task
+        if task.cancelled():
+            return
+        # 取出异常，避免无人等待时记录“Task exception was never retrieved”
+        if task.exception() is None and flight.detached and not flight.token.cancelled:
+            self._store(key, task.result())
+
+    def _forget(self, key: Optional[str], flight: _Flight):
+        if key is not None and self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _store(self, key: str, result: Any):
+        """缓存后台任务的结果（有界，超出时移除最早的结果）"""
+        self._results[key] = (time.time() + self.result_ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def _cached(self, key: Optional[str]) -> Any:
+        """未过期的后台任务结果，没有时返回None"""
+        if key is None or key not in self._results:
+            return None
+        expires, result = self._results[key]
+        if expires < time.time():
+            del self._results[key]
+            return None
+        return result
+
+    def inflight(self) -> int:
+        """进行中的任务数"""
+        return len(self._flights)
+
+
+class SingleFlight:
+    """线程安全的single-flight：同一键同时只有一个领头者执行，其余调用者等待其结果"""
+
+    def __init__(self, kind: str):
+        """
+        Args:
+            kind: 合并类别（指标标签与日志）
+        """
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+
+    def join(self, key: str) -> Tuple[bool, Future]:
+        """
+        加入键对应的进行中任务
+
+        Args:
+            key: 合并键
+
+        Returns:
+            Tuple[bool, Future]: (是否为领头者, 结果future)；领头者执行完毕后必须调用finish
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                SINGLE_FLIGHT_SHARED.labels(self.kind).inc()
+                return False, future
+            future = Future()
+            self._futures[key] = future
+            return True, future
+
+    def finish(self, key: str, future: Future, result: Any = None, exception: Optional[BaseException] = None):
+        """
+        领头者发布结果并移除键（之后到达的调用重新执行）
+
+        Args:
+            key: 合并键
+            future: join返回的future
+            result: 结果
+            exception: 异常（优先于result）
+        """
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
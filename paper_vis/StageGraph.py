@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阶段依赖图执行器
+以声明式的阶段依赖图驱动论文处理流程，每个阶段在其全部输入就绪后立即启动
+
+功能：
+- Stage声明阶段名称、执行函数、依赖阶段、重试次数与超时时间
+- StageGraphExecutor在线程池中按依赖关系调度阶段，上游阶段完成即提交下游阶段
+- 记录每个阶段的就绪、开始、结束时间与尝试次数，并计算关键路径
+
+核心特性：
+- 阶段函数接收 {依赖阶段名称: 输出} 字典，返回值即该阶段的输出
+- 阶段抛出异常时按retries重试；超时的尝试被放弃，不再重试：线程无法强制终止，
+  但每次尝试绑定独立的取消信号，放弃时触发，尝试内进行中的LLM请求与进程池任务随之停止，结果被丢弃
+- 阶段抛出TimeoutError（如LLM调用的DeadlineExceeded）时直接标记为timed_out，不再重试
+- 支持整图截止时间：到期时未完成的阶段全部标记为timed_out并立即返回已完成阶段的输出
+- 支持取消信号（CancelToken）：触发时立即唤醒调度循环，未完成的阶段标记为cancelled，不再启动新阶段
+- 任一依赖失败、超时或被跳过时，下游阶段被标记为skipped
+- 端到端耗时由真实关键路径决定，而不是最慢的粗粒度任务组
+- 阶段函数在调用run时的上下文副本中执行，继承上下文变量（如论文级LLM调用统计），
+  并通过current_stage标明当前阶段名称（LLM调用统计据此按阶段汇总），每次尝试记录为一个追踪span，
+  开启剖析时阶段线程的采样计入该阶段
+"""
+
+import logging
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from Cancellation import CancelToken, Cancelled, cancel_scope
+from Profiling import profile_stage
+from Tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 当前执行的阶段名称（仅在阶段函数内部有值）
+current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_stage', default=None)
+
+
+def _run_in_stage(name: str, attempt: int, func: Callable[[Dict[str, Any]], Any], inputs: Dict[str, Any],
+                  token: CancelToken) -> Any:
+    """在阶段上下文中执行阶段函数（绑定本次尝试的取消信号）"""
+    current_stage.set(name)
+    with span(name, 'stage', attempt=attempt), profile_stage(name), cancel_scope(token):
+        return func(inputs)
+
+
+class Stage:
+    """处理流程中的单个阶段"""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Optional[List[str]] = None,
+                 retries: int = 0, timeout: Optional[float] = None):
+        """
+        初始化阶段
+
+        Args:
+            name: 阶段名称（图内唯一）
+            func: 执行函数，接收 {依赖阶段名称: 输出} 字典
+            deps: 依赖的阶段名称列表
+            retries: 抛出异常后的重试次数
+            timeout: 单次尝试的超时时间（秒），None表示不限
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps or [])
+        self.retries = retries
+        self.timeout = timeout
+
+
+class StageGraphExecutor:
+    """阶段依赖图执行器"""
+
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None):
+        """
+        初始化执行器并校验依赖图
+
+        Args:
+            stages: 阶段列表
+            max_workers: 线程池大小，默认为阶段数（所有就绪阶段都能立即启动）
+        """
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"阶段名称重复: {stage.name}")
+            self.stages[stage.name] = stage
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"阶段 {stage.name} 依赖未知阶段: {dep}")
+        self._check_acyclic()
+
+        self.max_workers = max_workers or max(1, len(stages))
+
+    def _check_acyclic(self):
+        """校验依赖图无环"""
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"阶段依赖存在环: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def run(self, deadline: Optional[float] = None, cancel: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        执行整个阶段依赖图
+
+        Args:
+            deadline: 整图截止时间（time.time()时间戳），None表示不限
+            cancel: 取消信号，触发时放弃所有未完成的阶段
+
+        Returns:
+            Dict[str, Any]: {
+                'outputs': {阶段名称: 输出}（仅包含成功的阶段）,
+                'stages': {阶段名称: {'status', 'attempts', 'ready', 'start', 'end', 'duration', 'error'}},
+                'critical_path': 关键路径上的阶段名称列表,
+                'critical_path_time': 关键路径耗时（秒）,
+                'total_time': 图执行总耗时（秒）,
+                'timed_out': 超时的阶段名称列表,
+                'cancelled': 被取消的阶段名称列表
+            }
+            时间均为相对图开始执行的秒数
+        """
+        graph_start = time.time()
+        outputs: Dict[str, Any] = {}
+        records: Dict[str, Dict[str, Any]] = {
+            name: {'status': 'pending', 'attempts': 0, 'ready': None, 'start': None, 'end': None, 'duration': 0.0, 'error': None}
+            for name in self.stages
+        }
+        remaining_deps = {name: set(stage.deps) for name, stage in self.stages.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for name, stage in self.stages.items():
+            for dep in stage.deps:
+                dependents[dep].append(name)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+        running = {}  # future -> (阶段名称, 本次尝试的截止时间, 本次尝试的取消信号)
+
+        # 取消信号触发时完成该future，唤醒等待中的调度循环
+        cancelled = Future()
+        cancel_handle = None
+        if cancel is not None:
+            cancel_handle = cancel.add_callback(lambda: cancelled.done() or cancelled.set_result(None))
+
+        def now() -> float:
+            return time.time() - graph_start
+
+        def submit(name: str):
+            stage = self.stages[name]
+            record = records[name]
+            record['attempts'] += 1
+            if record['start'] is None:
+                record['start'] = now()
+            record['status'] = 'running'
+            inputs = {dep: outputs.get(dep) for dep in stage.deps}
+            token = CancelToken()
+            future = executor.submit(contextvars.copy_context().run, _run_in_stage, name, record['attempts'], stage.func,
+                                     inputs, token)
+            attempt_deadline = time.time() + stage.timeout if stage.timeout else None
+            running[future] = (name, attempt_deadline, token)
+            logger.info(f"▶️ 阶段启动: {name}" + (f"（第{record['attempts']}次尝试）" if record['attempts'] > 1 else ""))
+
+        def abandon(future: Future, reason: str):
+            # 线程无法强制终止：撤回尚未开始的尝试，并通过取消信号停止进行中的LLM请求等
+            _, _, token = running.pop(future)
+            future.cancel()
+            token.cancel(reason)
+
+        def skip_dependents(name: str):
+            for child in dependents[name]:
+                if records[child]['status'] == 'pending':
+                    records[child]['status'] = 'skipped'
+                    records[child]['error'] = f"依赖阶段 {name} 未成功"
+                    logger.info(f"⏭️ 阶段跳过: {child}（依赖 {name} 未成功）")
+                    skip_dependents(child)
+
+        def finish(name: str, status: str, error: Optional[str] = None):
+            record = records[name]
+            record['status'] = status
+            record['end'] = now()
+            record['duration'] = record['end'] - record['start']
+            record['error'] = error
+            if status == 'completed':
+                logger.info(f"✅ 阶段完成: {name}（{record['duration']:.2f}秒）")
+                for child in dependents[name]:
+                    remaining_deps[child].discard(name)
+                    if not remaining_deps[child] and records[child]['status'] == 'pending':
+                        records[child]['ready'] = now()
+                        submit(child)
+            elif status == 'cancelled':
+                logger.info(f"🛑 阶段取消: {name}")
+            else:
+                logger.error(f"{'⏰' if status == 'timed_out' else '❌'} 阶段{'超时' if status == 'timed_out' else '失败'}: {name}（{error}）")
+                skip_dependents(name)
+
+        try:
+            for name, deps in remaining_deps.items():
+                if not deps:
+                    records[name]['ready'] = 0.0
+                    submit(name)
+
+            while running:
+                deadlines = [attempt_deadline for _, attempt_deadline, _ in running.values() if attempt_deadline is not None]
+                if deadline is not None:
+                    deadlines.append(deadline)
+                wait_timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+                done, _ = wait(list(running) + [cancelled], timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future is cancelled:
+                        continue
+                    name, _, _ = running.pop(future)
+                    try:
+                        outputs[name] = future.result()
+                        finish(name, 'completed')
+                    except Cancelled as e:
+                        finish(name, 'cancelled', str(e))
+                    except TimeoutError as e:
+                        finish(name, 'timed_out', str(e) or "超过截止时间")
+                    except Exception as e:
+                        if records[name]['attempts'] <= self.stages[name].retries:
+                            logger.warning(f"🔄 阶段 {name} 异常，准备重试: {e}")
+                            submit(name)
+                        else:
+                            finish(name, 'failed', str(e))
+
+                # 已取消：放弃所有未完成的阶段
+                if cancelled.done():
+                    for name, record in records.items():
+                        if record['status'] == 'pending':
+                            record['status'] = 'cancelled'
+                            record['error'] = cancel.reason
+                    for future, (name, _, _) in list(running.items()):
+                        abandon(future, cancel.reason)
+                        finish(name, 'cancelled', cancel.reason)
+                    break
+
+                # 整图截止时间已到：放弃所有未完成的阶段
+                current = time.time()
+                if deadline is not None and current >= deadline:
+                    for name, record in records.items():
+                        if record['status'] == 'pending':
+                            record['status'] = 'timed_out'
+                            record['error'] = "超过整体截止时间，未启动"
+                    for future, (name, _, _) in list(running.items()):
+                        abandon(future, "超过整体截止时间")
+                        finish(name, 'timed_out', "超过整体截止时间")
+                    break
+
+                # 放弃已超过单阶段超时的尝试
+                for future, (name, attempt_deadline, _) in list(running.items()):
+                    if attempt_deadline is not None and current >= attempt_deadline and not future.done():
+                        abandon(future, f"阶段 {name} 超过 {self.stages[name].timeout} 秒")
+                        finish(name, 'timed_out', f"超过 {self.stages[name].timeout} 秒")
+        finally:
+            if cancel is not None:
+                cancel.remove_callback(cancel_handle)
+            # 不等待被放弃的线程（均已触发取消信号，会尽快结束）
+            executor.shutdown(wait=False)
+
+        total_time = now()
+        critical_path, critical_path_time = self._critical_path(records)
+        if critical_path:
+            logger.info(f"🧭 关键路径: {' → '.join(critical_path)}（{critical_path_time:.2f}秒）")
+
+        return {
+            'outputs': outputs,
+            'stages': records,
+            'critical_path': critical_path,
+            'critical_path_time': critical_path_time,
+            'total_time': total_time,
+            'timed_out': [name for name, record in records.items() if record['status'] == 'timed_out'],
+            'cancelled': [name for name, record in records.items() if record['status'] == 'cancelled']
+        }
+
+    def _critical_path(self, records: Dict[str, Dict[str, Any]]):
+        """
+        从最晚结束的阶段出发，沿最晚结束的依赖回溯得到关键路径
+
+        Args:
+            records: 阶段执行记录
+
+        Returns:
+            Tuple[List[str], float]: (关键路径阶段名称列表, 关键路径耗时)
+        """
+        finished = {name: record for name, record in records.items() if record['end'] is not None}
+        if not finished:
+            return [], 0.0
+
+        path = []
+        name = max(finished, key=lambda n: finished[n]['end'])
+        while name is not None:
+            path.append(name)
+            deps = [dep for dep in self.stages[name].deps if dep in finished]
+            name = max(deps, key=lambda n: finished[n]['end']) if deps else None
+
+        path.reverse()
+        return path, finished[path[-1]]['end']
@@ -4,11 +4,10 @@
 """
 
 import json
-import requests
 import logging
 from typing import List, Dict, Optional, Any
-import time
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL
+from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, LLM_OUTPUT_TOKEN_MARGIN
+from LLMClient import request_json_sync, DeadlineExceeded, parse_json_content, count_tokens, stage_settings
 
 class TitleMappingLLM:
     """标题映射LLM处理器"""
@@ -25,7 +24,8 @@ class TitleMappingLLM:
         # 写死的LLM配置
         self.api_url = api_url or DEEPSEEK_API_URL
         self.api_key = api_key or DEEPSEEK_API_KEY
-        self.model = model or DEEPSEEK_MODEL
+        self.settings = stage_settings('title_mapping')
+        self.model = model or self.settings['model']
         
         # 设置日志
         logging.basicConfig(level=logging.INFO)
@@ -69,52 +69,53 @@ Please strictly output your results according to the following concise structure
   "Conclusion": ["# 6. Conclusion"]
 }}"""
 
-    def _call_llm_api(self, messages: List[Dict[str, str]], max_retries: int = 3) -> Optional[str]:
+    def _output_max_tokens(self, title_list: List[str]) -> int:
         """
-        调用LLM API
+        按输出schema推导max_tokens：输出只是将输入标题分配到四个泳道，长度不超过标题本身加四个泳道键
         
         Args:
-            messages: 消息列表
-            max_retries: 最大重试次数
+            title_list: 原始标题列表
             
         Returns:
-            LLM响应内容
+            max_tokens（LLM_STAGE_CONFIG中配置了max_tokens时以配置为准）
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": 0.1,  # 低温度确保一致性
-            "max_tokens": 1000
-        }
+        configured = stage_settings('title_mapping', -1)['max_tokens']
+        if configured != -1:
+            return configured
+        title_tokens = sum(count_tokens(title) + 3 for title in title_list)
+        return int((title_tokens + 4 * 12 + 10) * LLM_OUTPUT_TOKEN_MARGIN)
+
+    def _call_llm_api(self, messages: List[Dict[str, str]], max_retries: int = 3,
+                      deadline: Optional[float] = None, max_tokens: Optional[int] = None) -> Optional[Dict[str, List[str]]]:
+        """
+        调用LLM API并解析映射结果
         
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    self.logger.warning(f"API调用失败，状态码: {response.status_code}, 响应: {response.text}")
-                    
-            except requests.exceptions.RequestException as e:
-                self.logger.warning(f"API调用异常 (尝试 {attempt + 1}/{max_retries}): {e}")
-                
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)  # 指数退避
-                
-        self.logger.error("LLM API调用失败，已达到最大重试次数")
-        return None
+        Args:
+            messages: 消息列表
+            max_retries: 最大尝试次数
+            deadline: 截止时间（time.time()时间戳），None表示不限
+            max_tokens: 最大输出token数，默认按阶段配置
+            
+        Returns:
+            解析后的映射字典，失败返回None
+            
+        Raises:
+            DeadlineExceeded: 截止时间已到
+        """
+        return request_json_sync(
+            messages,
+            validator=lambda result: result is not None,
+            max_retries=max_retries - 1,
+            deadline=deadline,
+            model=self.model,
+            max_tokens=max_tokens or self.settings['max_tokens'],
+            temperature=self.settings['temperature'],  # 低温度确保一致性
+            parser=self._parse_json_response,
+            label="TitleMapping",
+            api_url=self.api_url,
+            api_key=self.api_key,
+            json_mode=True
+        )
 
     def _parse_json_response(self, response: str) -> Optional[Dict[str, List[str]]]:
         """
@@ -127,8 +128,8 @@ Please strictly output your results according to the following concise structure
             解析后的字典，如果解析失败返回None
         """
         try:
-            # 尝试直接解析
-            result = json.loads(response)
+            # 解析失败时在本地修复代码块标记、尾逗号、截断等常见缺陷
+            result = parse_json_content(response)
             
             # 验证结构
             expected_keys = {
@@ -138,7 +139,7 @@ Please strictly output your results according to the following concise structure
                 "Conclusion"
             }
             
-            if not all(key in result for key in expected_keys):
+            if not isinstance(result, dict) or not all(key in result for key in expected_keys):
                 self.logger.warning("JSON结构不完整，缺少必要的键")
                 return None
                 
@@ -152,29 +153,15 @@ Please strictly output your results according to the following concise structure
             
         except json.JSONDecodeError as e:
             self.logger.warning(f"JSON解析失败: {e}")
-            
-            # 尝试提取JSON部分
-            try:
-                # 查找JSON开始和结束位置
-                start_idx = response.find('{')
-                end_idx = response.rfind('}')
-                
-                if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                    json_str = response[start_idx:end_idx + 1]
-                    result = json.loads(json_str)
-                    return result
-                    
-            except json.JSONDecodeError:
-                pass
-                
             return None
 
-    def map_titles(self, title_list: List[str]) -> Dict[str, List[str]]:
+    def map_titles(self, title_list: List[str], deadline: Optional[float] = None) -> Dict[str, List[str]]:
         """
         将标题列表映射到四个标准泳道
         
         Args:
             title_list: 原始标题列表
+            deadline: 截止时间（time.time()时间戳），None表示不限；到期时抛出DeadlineExceeded
             
         Returns:
             干净的映射结果字典
@@ -200,18 +187,11 @@ Please strictly output your results according to the following concise structure
             
             self.logger.info(f"开始处理 {len(title_list)} 个标题")
             
-            # 调用LLM API
-            response = self._call_llm_api(messages)
-            
-            if response is None:
-                self.logger.error("LLM API调用失败")
-                return {}
-            
-            # 解析响应
-            result = self._parse_json_response(response)
+            # 调用LLM API并解析响应
+            result = self._call_llm_api(messages, deadline=deadline, max_tokens=self._output_max_tokens(title_list))
             
             if result is None:
-                self.logger.error(f"LLM响应解析失败，原始响应: {response}")
+                self.logger.error("LLM API调用或响应解析失败")
                 return {}
             
             # 验证结果
@@ -220,6 +200,8 @@ Please strictly output your results according to the following concise structure
             
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"标题映射过程中发生异常: {e}")
             return {}
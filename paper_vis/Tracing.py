@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求级追踪与日志
+为单篇论文的处理过程记录带层级的时间区间（span），可导出为Chrome trace JSON，在chrome://tracing或Perfetto中查看
+
+功能：
+- Tracer：一篇论文一个追踪，trace_id贯穿日志与processing_info
+- span：上下文管理器，记录阶段、LLM请求、CPU子步骤的开始与结束时间、所在线程与父span
+- record_span：记录已计时的区间（如LLM请求在完成后才知道状态与token数）
+- configure_logging：按LOG_LEVEL配置日志，每行带时间、级别、线程与trace_id
+
+核心特性：
+- 追踪与当前span保存在上下文变量中，阶段线程（StageGraph在上下文副本中执行）与协程自动继承
+- 未绑定追踪时span不做任何记录，开销只有一次上下文变量读取
+- LLM请求导出为异步事件（同一线程中的并发请求不会错误地嵌套），其余区间导出为完整事件
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import LOG_LEVEL
+
+# 以异步事件导出的span类别
+ASYNC_CATEGORIES = {'llm'}
+
+
+class Tracer:
+    """单篇论文的追踪记录（线程安全）"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        """
+        初始化追踪
+
+        Args:
+            trace_id: 追踪ID，默认随机生成
+        """
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def new_span_id(self) -> int:
+        """分配span ID"""
+        with self._lock:
+            return next(self._ids)
+
+    def add_span(self, span: Dict[str, Any]):
+        """
+        记录一个已结束的span
+
+        Args:
+            span: {'id', 'parent', 'name', 'category', 'start', 'end', 'pid', 'tid', 'thread', 'args'}
+        """
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        导出为Chrome trace JSON（时间为相对追踪开始的微秒数）
+
+        Returns:
+            Dict[str, Any]: {'traceEvents': [...], 'displayTimeUnit': 'ms', 'otherData': {'trace_id'}}
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start'])
+
+        events = []
+        threads = {}
+        for span in spans:
+            threads[(span['pid'], span['tid'])] = span['thread']
+            ts = (span['start'] - self.start) * 1e6
+            dur = max(0.0, (span['end'] - span['start']) * 1e6)
+            args = {**span['args'], 'span_id': span['id'], 'parent_id': span['parent']}
+            if span['category'] in ASYNC_CATEGORIES:
+                base = {'name': span['name'], 'cat': span['category'], 'id': span['id'], 'pid': span['pid'], 'tid': span['tid']}
+                events.append({**base, 'ph': 'b', 'ts': ts, 'args': args})
+                events.append({**base, 'ph': 'e', 'ts': ts + dur})
+            else:
+                events.append({'name': span['name'], 'cat': span['category'], 'ph': 'X', 'ts': ts, 'dur': dur,
+                               'pid': span['pid'], 'tid': span['tid'], 'args': args})
+        for (pid, tid), thread in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'trace_id': self.trace_id}}
+
+    def export(self, directory: str) -> str:
+        """
+        将Chrome trace JSON写入目录
+
+        Args:
+            directory: 输出目录
+
+        Returns:
+            写入的文件路径
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.trace_id}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar('tracer', default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar('trace_span', default=None)
+
+
+@contextmanager
+def trace_scope(tracer: Tracer) -> Iterator[Tracer]:
+    """
+    在当前上下文中绑定追踪
+
+    Args:
+        tracer: 追踪记录
+    """
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def current_trace_id() -> Optional[str]:
+    """获取当前上下文的trace_id，未绑定追踪时返回None"""
+    tracer = _current_tracer.get()
+    return tracer.trace_id if tracer else None
+
+
+def _span_record(tracer: Tracer, span_id: int, parent: Optional[int], name: str, category: str,
+                 start: float, end: float, args: Dict[str, Any]) -> Dict[str, Any]:
+    """生成span记录"""
+    thread = threading.current_thread()
+    return {
+        'id': span_id,
+        'parent': parent,
+        'name': name,
+        'category': category,
+        'start': start,
+        'end': end,
+        'pid': os.getpid(),
+        'tid': threading.get_native_id(),
+        'thread': thread.name,
+        'args': args
+    }
+
+
+@contextmanager
+def span(name: str, category: str = 'stage', **attrs) -> Iterator[Dict[str, Any]]:
+    """
+    记录一个span，区间内开始的span以其为父span
+
+    Args:
+        name: span名称
+        category: 类别（paper、stage、llm、cpu）
+        **attrs: 附加属性
+
+    Yields:
+        Dict[str, Any]: 属性字典，区间内可继续补充（如结果数量）
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield attrs
+        return
+
+    span_id = tracer.new_span_id()
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.time()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.add_span(_span_record(tracer, span_id, parent, name, category, start, time.time(), attrs))
+
+
+def record_span(name: str, category: str, start: float, end: float, **attrs):
+    """
+    记录一个已计时的span（父span为当前span）
+
+    Args:
+        name: span名称
+        category: 类别
+        start: 开始时间（time.time()时间戳）
+        end: 结束时间（time.time()时间戳）
+        **attrs: 附加属性
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return
+    tracer.add_span(_span_record(tracer, tracer.new_span_id(), _current_span.get(), name, category, start, end, attrs))
+
+
+class TraceIdFilter(logging.Filter):
+    """为日志记录附加当前上下文的trace_id"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or '-'
+        return True
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    """
+    配置根日志：每行包含时间、级别、线程名与trace_id（服务与命令行入口调用）
+
+    Args:
+        level: 日志级别名称
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)s [%(threadName)s] [%(trace_id)s] %(name)s: %(message)s'
+    ))
+    handler.addFilter(TraceIdFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level, logging.INFO))
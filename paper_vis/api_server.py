@@ -4,17 +4,48 @@
 FastAPI 服务器 - 学术论文智能分析接口
 基于 MainScheduler 的完整论文处理系统
 
-唯一接口：
+接口：
 POST /paper_vis
 - 输入：上传PDF文件
-- 输出：MainScheduler的完整JSON结果
+- 输出：MainScheduler的完整JSON结果；同时上传的同一篇论文（PDF的SHA-256、优先级类别与处理时限都相同）只处理一次，
+  后到的请求等待进行中任务的结果（准入与LLM名额按首个请求的租户计算）
+- 客户端断开连接时返回499；等待同一篇论文的客户端全部断开后取消处理（排队、解析请求、阶段依赖图与LLM请求），
+  或在DETACH_ON_DISCONNECT开启时转入后台继续处理并缓存结果
+
+GET /admission
+- 输出：准入控制状态（按优先级类别的处理中任务数、已占用的估算内存、按租户的排队数与Retry-After估算）
+  与LLM并发名额状态
+
+GET /llm_usage
+- 输出：本进程启动以来按调用标签累计的LLM请求数、失败与校验失败次数、token用量与延迟
+
+GET /metrics
+- 输出：Prometheus文本格式的指标；多worker部署时设置PROMETHEUS_MULTIPROC_DIR以汇总所有进程
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import asyncio
+import hashlib
+import logging
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Header, Request, Response
+from typing import Any, Dict, Optional, Tuple
+import os
+import time
 import uvicorn
+from starlette.concurrency import run_in_threadpool
 
 # 导入主调度器
 from MainScheduler import MainScheduler
+from AdmissionControl import AdmissionController, AdmissionRejected, count_pdf_pages, estimate_job_memory
+from FairScheduler import JobClass, llm_slots, tenant_id
+from SingleFlight import Disconnected, TaskSingleFlight
+from Cancellation import CancelToken
+from config import DISCONNECT_POLL_SECONDS, PAPER_DEADLINE_SECONDS, PAPER_SINGLE_FLIGHT
+from FigureMapGenerator import shutdown_figure_process_pool
+from LLMClient import remaining_time, usage_counters
+from Metrics import QUEUE_DEPTH, metrics_payload, mark_process_dead
+from Tracing import configure_logging
+
+logger = logging.getLogger(__name__)
 
 
 # 创建FastAPI应用
@@ -24,20 +55,118 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# 准入控制：限制同时处理的论文数与估算内存，超出部分有界排队
+admission = AdmissionController()
+
+# 进行中论文的合并：同一篇论文同时只处理一次；等待方全部断开后取消或转入后台
+paper_flights = TaskSingleFlight('paper')
+
+# 客户端断开连接时的非标准状态码（nginx约定），只出现在访问日志中
+CLIENT_CLOSED_REQUEST = 499
+
+
+@app.on_event("startup")
+def setup_logging():
+    """按LOG_LEVEL配置日志（每行带线程名与trace_id）"""
+    configure_logging()
+
+
+@app.on_event("shutdown")
+def shutdown_process_pools():
+    """服务关闭时释放常驻图表进程池，并清理本进程的多进程指标"""
+    shutdown_figure_process_pool()
+    mark_process_dead(os.getpid())
+
+
+async def wait_for_disconnect(request: Request):
+    """轮询直到客户端断开连接"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+def inspect_upload(file_content: bytes) -> Tuple[str, int]:
+    """
+    计算上传文件的内容哈希与估算内存（解析PDF页数，需在线程池中调用）
+    
+    Args:
+        file_content: PDF文件内容
+    
+    Returns:
+        Tuple[str, int]: (sha256十六进制摘要, 估算内存字节数)
+    """
+    digest = hashlib.sha256(file_content).hexdigest()
+    return digest, estimate_job_memory(len(file_content), count_pdf_pages(file_content))
+
+
+async def process_paper(file_content: bytes, filename: str, memory: int, deadline: float, job: JobClass,
+                        profile: bool, cancel: CancelToken) -> Dict[str, Any]:
+    """
+    等待准入后在线程池中处理一篇论文
+    
+    Args:
+        file_content: PDF文件内容
+        filename: 文件名
+        memory: 估算内存（字节），见inspect_upload
+        deadline: 截止时间（time.time()时间戳），排队时间计入其中
+        job: 任务的优先级类别与租户
+        profile: 是否进行性能剖析
+        cancel: 取消信号（等待方全部断开连接时触发）
+    
+    Returns:
+        Dict[str, Any]: MainScheduler的完整JSON结果（处理中被取消时cancelled为True）
+    
+    Raises:
+        AdmissionRejected: 未被准入
+        Cancelled: 排队期间被取消
+    """
+    QUEUE_DEPTH.inc()
+    queued = True
+    try:
+        # 等待准入（排队时间计入截止时间）
+        async with admission.admit(memory, timeout=remaining_time(deadline), job=job, cancel=cancel):
+            # 创建主调度器实例
+            scheduler = MainScheduler(profile=profile, job=job, cancel=cancel)
+            QUEUE_DEPTH.dec()
+            queued = False
+            
+            # 执行完整的论文分析流程（直接使用文件内容，不保存到服务器）；在线程池中运行，不阻塞事件循环；
+            # 取消后线程尽快返回，名额在线程结束后才释放
+            return await run_in_threadpool(scheduler.process_uploaded_pdf, file_content, filename, deadline)
+    finally:
+        if queued:
+            QUEUE_DEPTH.dec()
+
 
 @app.post("/paper_vis")
-async def paper_vis(file: UploadFile = File(...)):
+async def paper_vis(request: Request, file: UploadFile = File(...), deadline_seconds: Optional[float] = Query(None, gt=0),
+                    profile: bool = Query(False), x_profile: Optional[str] = Header(None),
+                    priority: str = Query('interactive', pattern='^(interactive|batch)$'),
+                    x_tenant: Optional[str] = Header(None), x_api_key: Optional[str] = Header(None)):
     """
-    分析PDF论文 - 唯一接口
+    分析PDF论文
     
     输入：
     - file: 上传的PDF文件
+    - deadline_seconds: 可选，本次请求的处理时限（秒），默认使用PAPER_DEADLINE_SECONDS，均从请求到达时开始计算；
+      到期后返回已完成的部分结果，未完成的阶段列在timed_out中
+    - profile / X-Profile请求头: 可选，对本次请求进行性能剖析，结果目录见processing_info.profile
+    - priority: 可选，interactive（默认）或batch；batch只占用部分处理与LLM名额，排在interactive之后
+    - X-Tenant / X-API-Key请求头: 可选，租户标识；同一类别内按租户权重（TENANT_WEIGHTS）公平排队
     
     输出：
-    - MainScheduler的完整JSON结果
+    - MainScheduler的完整JSON结果；同一篇论文以相同的处理时限正在处理时（剖析请求除外）等待并返回同一结果，
+      该任务的准入与LLM名额计入首个请求的租户
+    - 排队已满时返回429，排队超过处理时限或ADMISSION_QUEUE_TIMEOUT时返回503，均带Retry-After请求头
+    - 客户端断开连接时返回499；没有其他客户端等待同一篇论文时处理随之取消
     """
+    # 截止时间从请求到达时开始计算（排队、准入与上传处理均计入其中）
+    budget = deadline_seconds or PAPER_DEADLINE_SECONDS
+    deadline = time.time() + budget
+    job = JobClass(priority, tenant_id(x_tenant, x_api_key))
+    profiling = profile or (x_profile or '').lower() in ('1', 'true', 'yes')
+    
     try:
-        print(f"🚀 开始处理PDF文件: {file.filename}")
+        logger.info(f"🚀 开始处理PDF文件: {file.filename}")
         
         # 检查文件类型
         if not file.filename.lower().endswith('.pdf'):
@@ -48,27 +177,91 @@ async def paper_vis(file: UploadFile = File(...)):
         
         # 读取上传的文件内容
         file_content = await file.read()
+        # 哈希与页数统计随文件大小增长，放到线程池中只计算一次
+        digest, memory = await run_in_threadpool(inspect_upload, file_content)
         
-        # 创建主调度器实例
-        scheduler = MainScheduler()
-        
-        # 执行完整的论文分析流程（直接使用文件内容，不保存到服务器）
-        result = scheduler.process_uploaded_pdf(file_content, file.filename)
+        # 同一篇论文同时只处理一次：按类别区分，interactive不会等待排在batch队列中的任务；
+        # 按处理时限区分，时限较长的请求不会拿到时限较短的任务的部分结果；剖析请求单独处理。
+        # 后到的请求沿用进行中任务的租户（公平份额计入首个请求的租户）
+        key = None
+        if PAPER_SINGLE_FLIGHT and not profiling:
+            key = f"{job.priority}:{budget:g}:{digest}"
+        result = await paper_flights.run(
+            key, lambda cancel: process_paper(file_content, file.filename, memory, deadline, job, profiling, cancel),
+            disconnected=wait_for_disconnect(request)
+        )
         
         return result
-            
+    
+    except Disconnected:
+        logger.info(f"🔌 客户端已断开连接，停止等待 {file.filename}（{job.priority}/{job.tenant}）")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except AdmissionRejected as e:
+        logger.warning(f"⚠️ 拒绝处理 {file.filename}（{job.priority}/{job.tenant}）: {e.reason}，建议 {e.retry_after} 秒后重试")
+        raise HTTPException(
+            status_code=429 if e.reason == 'queue_full' else 503,
+            detail="服务繁忙，请稍后重试" if e.reason == 'queue_full' else "排队超过处理时限，请稍后重试",
+            headers={'Retry-After': str(e.retry_after)}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ 服务器内部错误: {e}")
+        logger.error(f"❌ 服务器内部错误: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"服务器内部错误: {str(e)}"
         )
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus指标
+    
+    输出：
+    - 直方图：paper_vis_parse_seconds、paper_vis_llm_request_seconds、paper_vis_stage_seconds、
+      paper_vis_figure_cpu_seconds、paper_vis_end_to_end_seconds、paper_vis_admission_wait_seconds
+    - 仪表：paper_vis_inflight_jobs、paper_vis_queue_depth、paper_vis_reserved_memory_bytes、paper_vis_figure_pool_*
+    - 计数器：paper_vis_llm_requests/retries/rate_limited/failures/tokens/cache_hit_tokens、paper_vis_papers、
+      paper_vis_admission_rejections、paper_vis_single_flight_shared、paper_vis_abandoned_jobs
+    """
+    content, content_type = metrics_payload()
+    return Response(content=content, media_type=content_type)
+
+
+@app.get("/admission")
+async def admission_status():
+    """
+    准入控制与LLM并发名额状态（进程级）
+    
+    输出：
+    - inflight / max_inflight / class_limits: 按类别的处理中任务数、总上限与各类别上限
+    - reserved_mb / memory_budget_mb: 已准入任务的估算内存与上限
+    - queued / queue_limits / queued_mb: 按类别与租户的排队任务数、各类别上限与排队任务的估算内存
+    - queue_timeout: 单个任务最长排队秒数（另受请求截止时间约束）
+    - job_seconds / retry_after: 任务耗时滑动平均与各类别当前建议的重试等待秒数
+    - llm_slots: LLM并发名额上限、各类别占用与排队情况（max_slots为0表示不限）
+    """
+    return {**admission.snapshot(), 'llm_slots': llm_slots.snapshot()}
+
+
+@app.get("/llm_usage")
+async def llm_usage():
+    """
+    LLM用量累计计数器（进程级，多worker部署时每个worker各自计数）
+    
+    输出：
+    - by_label: {调用标签: {requests, failures, validation_failures, parse_failures,
+      prompt_tokens, completion_tokens, cache_hit_tokens, latency_seconds}}
+    - total: 全部标签合计
+    """
+    return usage_counters.snapshot()
+
+
 if __name__ == "__main__":
     print("🚀 启动学术论文智能分析API服务器...")
     print("📡 服务地址: http://10.3.35.21:8004")
-    print("📊 唯一接口: POST /paper_vis")
+    print("📊 接口: POST /paper_vis, GET /admission, GET /llm_usage, GET /metrics")
     print("=" * 60)
     
     # 启动服务器
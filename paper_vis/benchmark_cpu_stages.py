@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CPU阶段离线基准测试
+使用frontend/public/data中自带的示例论文（content_list、middle、origin_text），不调用解析服务与LLM，
+对标题规范化、章节切分、数据合并、引用提取、图表文本匹配与图表映射计时
+
+功能：
+- 规模变体：将示例论文按页复制为×10、×100（页码顺延，图片路径与标题加后缀保证唯一）；
+  --synthetic-pages另外测量指定页数的合成文档（synthetic_document.py），得到耗时随页数增长的曲线
+- 计时：准备数据不计时，每个用例重复执行，输出最小值、中位数与平均值
+- 结果：--output写出JSON；--baseline与基线对比，中位数慢于基线超过--threshold时以退出码1结束
+
+用法：
+    python benchmark_cpu_stages.py --output bench.json
+    python benchmark_cpu_stages.py --scales 1 10 --save-baseline baseline.json
+    python benchmark_cpu_stages.py --baseline baseline.json --threshold 0.2
+    python benchmark_cpu_stages.py --scales 1 --synthetic-pages 25 50 100 --only data_merger figure_text content_extractor
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from DocumentModel import DocumentModel
+from FigureMapGenerator import FigureMapGenerator
+from FigureReferenceExtractor import FigureReferenceExtractor
+from FigureTextMatchingPipeline import FigureTextMatchingPipeline
+from NormalizeHeadings import HeadingNormalizer
+from extractContentByHeading import ContentExtractor
+from merge_data import DataMerger
+from synthetic_document import SyntheticDocumentGenerator, render_markdown
+
+# 自带示例论文
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'public', 'data')
+FIXTURE_ID = '2e0a023273d5d4f247307b1ca1cd52f6'
+
+DEFAULT_SCALES = [1, 10, 100]
+SYNTHETIC_LANES = ['Context & Related Work', 'Methodology & Setup', 'Results & Analysis', 'Conclusion']
+DEFAULT_THRESHOLD = 0.2
+# 基线中位数低于该值（秒）的用例不参与回归判断，避免计时噪声误报
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def load_fixture(data_dir: str = FIXTURE_DIR) -> Dict[str, Any]:
+    """
+    读取示例论文
+
+    Args:
+        data_dir: 示例数据目录
+
+    Returns:
+        Dict[str, Any]: {'content_list', 'middle_data', 'content_by_lane'}
+    """
+    def read(name):
+        with open(os.path.join(data_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    return {
+        'content_list': read(f"{FIXTURE_ID}_content_list.json"),
+        'middle_data': read(f"{FIXTURE_ID}_middle.json"),
+        'content_by_lane': read('origin_text.json')
+    }
+
+
+def scale_fixture(fixture: Dict[str, Any], scale: int) -> Dict[str, Any]:
+    """
+    将示例论文按页复制scale份
+
+    第k份的页码顺延k个原文页数，一级标题追加 (Part k+1)，图片路径加前缀，
+    保证章节切分与图表定位在放大后的文档中仍然唯一。
+
+    Args:
+        fixture: load_fixture的结果
+        scale: 复制份数
+
+    Returns:
+        Dict[str, Any]: 同load_fixture，content_list与middle_data为放大后的数据
+    """
+    pages = fixture['middle_data']['pdf_info']
+    page_count = len(pages)
+
+    content_list = []
+    pdf_info = []
+    for k in range(scale):
+        offset = k * page_count
+        for item in fixture['content_list']:
+            item = copy.deepcopy(item)
+            item['page_idx'] = item.get('page_idx', 0) + offset
+            if k:
+                if item.get('text_level') and item.get('text'):
+                    item['text'] = f"{item['text'].strip()} (Part {k + 1}) "
+                if item.get('img_path'):
+                    directory, name = os.path.split(item['img_path'])
+                    item['img_path'] = os.path.join(directory, f"p{k + 1}_{name}")
+            content_list.append(item)
+        for array_idx, page in enumerate(pages):
+            page = copy.deepcopy(page)
+            page['page_idx'] = page.get('page_idx', array_idx) + offset
+            pdf_info.append(page)
+
+    return {
+        'content_list': content_list,
+        'middle_data': {**fixture['middle_data'], 'pdf_info': pdf_info},
+        'content_by_lane': fixture['content_by_lane']
+    }
+
+
+def lane_sections_by_position(document: DocumentModel, lanes: List[str]) -> List[Dict]:
+    """
+    不调用标题映射LLM，按一级章节的先后顺序将章节均分给各泳道
+
+    Args:
+        document: 文档模型
+        lanes: 泳道名称（按文中先后顺序）
+
+    Returns:
+        List[Dict]: [{'lane', 'heading', 'start', 'end'}, ...]
+    """
+    sections = document.sections
+    return [
+        {
+            'lane': lanes[min(i * len(lanes) // len(sections), len(lanes) - 1)],
+            'heading': section['heading'],
+            'start': section['start'],
+            'end': section['end']
+        }
+        for i, section in enumerate(sections)
+    ]
+
+
+def synthetic_fixture(pages: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成指定页数的合成文档（见synthetic_document.py），泳道内容按章节先后顺序均分
+
+    Args:
+        pages: 页数
+        seed: 随机种子
+
+    Returns:
+        Dict[str, Any]: {'content_list', 'middle_data', 'content_by_lane', 'md_content'}
+    """
+    bundle = SyntheticDocumentGenerator(pages=pages, seed=seed).generate()
+    content_list = json.loads(bundle['content_list'])
+    document = DocumentModel(bundle['md_content'], content_list)
+    content_by_lane = {lane: '' for lane in SYNTHETIC_LANES}
+    for section in lane_sections_by_position(document, SYNTHETIC_LANES):
+        content_by_lane[section['lane']] += bundle['md_content'][section['start']:section['end']]
+    return {
+        'content_list': content_list,
+        'middle_data': json.loads(bundle['middle_json']),
+        'content_by_lane': content_by_lane,
+        'md_content': bundle['md_content']
+    }
+
+
+def _merged_document(md_content: str, content_list: List[Dict], middle_data: Dict) -> DocumentModel:
+    """构建文档模型并合并middle位置信息（用例准备，不计时）"""
+    document = DocumentModel(md_content, content_list)
+    DataMerger().merge_document(document, middle_data)
+    return document
+
+
+def build_cases(data: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any], Callable[[Any], Any]]]:
+    """
+    构建基准用例
+
+    Args:
+        data: scale_fixture或synthetic_fixture的结果
+
+    Returns:
+        List[Tuple[str, Callable, Callable]]: [(用例名, 准备函数, 计时函数(准备结果)), ...]
+    """
+    content_list = data['content_list']
+    middle_data = data['middle_data']
+    content_by_lane = data['content_by_lane']
+    md_content = data.get('md_content') or render_markdown(content_list)
+    headings = HeadingNormalizer().process_markdown_content(md_content)
+    texts = [item['text'] for item in content_list if item.get('type') == 'text' and item.get('text')]
+    lanes = list(content_by_lane)
+
+    def figure_map_setup():
+        document = DocumentModel(md_content, content_list)
+        return document, lane_sections_by_position(document, lanes)
+
+    return [
+        ('heading_normalizer', lambda: None,
+         lambda _: HeadingNormalizer().process_markdown_content(md_content)),
+        ('content_extractor.section_index', lambda: None,
+         lambda _: ContentExtractor().buildSectionIndexFromContent(headings, md_content)),
+        ('content_extractor.by_heading', lambda: None,
+         lambda _: [ContentExtractor().extractContentByHeadingFromContent(headings, md_content, h) for h in headings]),
+        ('document_model', lambda: None,
+         lambda _: DocumentModel(md_content, content_list)),
+        ('data_merger.merge_data', lambda: None,
+         lambda _: DataMerger().merge_data(content_list, middle_data)),
+        ('figure_reference_extractor', lambda: FigureReferenceExtractor(),
+         lambda extractor: [extractor.extract_references(text) for text in texts]),
+        ('figure_text_matching', lambda: _merged_document(md_content, content_list, middle_data),
+         lambda document: FigureTextMatchingPipeline().process_document(document, 'benchmark')),
+        ('figure_map', figure_map_setup,
+         lambda prepared: FigureMapGenerator().build_lane_figure_map(prepared[0], middle_data, content_by_lane, prepared[1])),
+    ]
+
+
+def run_case(setup: Callable[[], Any], func: Callable[[Any], Any], repeats: int) -> Dict[str, Any]:
+    """
+    重复执行用例并统计耗时
+
+    Args:
+        setup: 准备函数，每次执行前调用，不计时
+        func: 计时函数
+        repeats: 重复次数
+
+    Returns:
+        Dict[str, Any]: {'runs', 'min', 'median', 'mean'}（秒）
+    """
+    timings = []
+    for _ in range(repeats):
+        prepared = setup()
+        start = time.perf_counter()
+        func(prepared)
+        timings.append(time.perf_counter() - start)
+    return {
+        'runs': timings,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings)
+    }
+
+
+def run_benchmarks(scales: List[int], repeats: int, data_dir: str = FIXTURE_DIR,
+                   only: Optional[List[str]] = None, synthetic_pages: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    执行全部规模下的基准用例
+
+    Args:
+        scales: 规模倍数列表
+        repeats: 每个用例的重复次数（×100规模与200页以上的合成文档只执行1次）
+        data_dir: 示例数据目录
+        only: 只执行名称包含其中任一子串的用例
+        synthetic_pages: 合成文档页数列表（结果键为 用例@p页数），用于测量耗时随页数的增长曲线
+
+    Returns:
+        Dict[str, Any]: {'meta': 运行环境, 'results': {'用例@x倍数' / '用例@p页数': {'scale', 'pages', 'blocks', 'runs', 'min', 'median', 'mean'}}}
+    """
+    fixture = load_fixture(data_dir)
+    variants = [(f"x{scale}", scale, lambda scale=scale: scale_fixture(fixture, scale), 1 if scale >= 100 else repeats)
+                for scale in scales]
+    variants += [(f"p{pages}", None, lambda pages=pages: synthetic_fixture(pages), 1 if pages >= 200 else repeats)
+                 for pages in synthetic_pages or []]
+
+    results = {}
+    for suffix, scale, load, case_repeats in variants:
+        data = load()
+        pages = len(data['middle_data']['pdf_info'])
+        print(f"📏 {'规模 ' + suffix if scale else '合成文档'}: {pages} 页, {len(data['content_list'])} 个块")
+        for name, setup, func in build_cases(data):
+            if only and not any(pattern in name for pattern in only):
+                continue
+            stats = run_case(setup, func, case_repeats)
+            results[f"{name}@{suffix}"] = {'scale': scale, 'pages': pages, 'blocks': len(data['content_list']), **stats}
+            print(f"   {name:<34} median {stats['median'] * 1000:10.1f} ms   min {stats['min'] * 1000:10.1f} ms")
+
+    return {
+        'meta': {
+            'fixture': FIXTURE_ID,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeats': repeats,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+
+def compare_with_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    与基线对比中位数耗时
+
+    Args:
+        results: run_benchmarks的结果
+        baseline: 之前保存的run_benchmarks结果
+        threshold: 允许的相对变慢比例（0.2表示慢20%以内不算回归）
+
+    Returns:
+        List[Dict[str, Any]]: 回归的用例 [{'case', 'baseline', 'current', 'ratio'}, ...]
+    """
+    regressions = []
+    for case, current in results['results'].items():
+        reference = baseline.get('results', {}).get(case)
+        if not reference or reference['median'] < NOISE_FLOOR_SECONDS:
+            continue
+        ratio = current['median'] / reference['median']
+        if ratio > 1 + threshold:
+            regressions.append({'case': case, 'baseline': reference['median'], 'current': current['median'], 'ratio': ratio})
+    return regressions
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='CPU阶段离线基准测试')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='规模倍数（默认 1 10 100）')
+    parser.add_argument('--repeats', type=int, default=5, help='每个用例的重复次数')
+    parser.add_argument('--synthetic-pages', type=int, nargs='*', default=[], help='额外测量的合成文档页数，如 50 100 300')
+    parser.add_argument('--only', nargs='+', help='只执行名称包含这些子串的用例')
+    parser.add_argument('--data-dir', default=FIXTURE_DIR, help='示例数据目录')
+    parser.add_argument('--output', help='结果JSON输出路径')
+    parser.add_argument('--baseline', help='基线JSON路径，存在回归时以退出码1结束')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='允许的中位数相对变慢比例')
+    parser.add_argument('--save-baseline', help='将本次结果另存为基线')
+    args = parser.parse_args()
+
+    # 计时期间屏蔽各阶段的日志输出
+    logging.disable(logging.WARNING)
+
+    report = run_benchmarks(args.scales, max(1, args.repeats), args.data_dir, args.only, args.synthetic_pages)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} 个用例慢于基线超过 {args.threshold:.0%}:")
+            for item in regressions:
+                print(f"   {item['case']}: {item['baseline'] * 1000:.1f} ms -> {item['current'] * 1000:.1f} ms (x{item['ratio']:.2f})")
+            sys.exit(1)
+        print(f"✅ 未发现超过 {args.threshold:.0%} 的回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 配置文件 - 存储API密钥和其他配置信息
 """
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -10,10 +11,107 @@ load_dotenv()
 
 # DeepSeek API配置
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "sk-apikey")
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
 DEEPSEEK_MODEL = "deepseek-chat"
 
+# PDF解析服务地址（本地压测时可指向mock_parser_server.py）
+PDF_PARSER_URL = os.getenv("PDF_PARSER_URL", "http://10.3.35.21:8003/file_parse_json")
+
 # 其他配置
 MAX_RETRIES = 2
 MAX_TOKENS = 1000
 TEMPERATURE = 0.1
+
+# 图表CPU阶段进程池配置（进程常驻，跨请求复用）
+FIGURE_POOL_WORKERS = int(os.getenv("FIGURE_POOL_WORKERS", "2"))
+
+# 阶段依赖图调度配置（阶段级重试次数与单次尝试超时秒数）
+STAGE_RETRIES = int(os.getenv("STAGE_RETRIES", "1"))
+STAGE_TIMEOUT = float(os.getenv("STAGE_TIMEOUT", "300"))
+
+# LLM请求超时与单篇论文截止时间（秒）
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+PAPER_DEADLINE_SECONDS = float(os.getenv("PAPER_DEADLINE_SECONDS", "300"))
+
+# LLM对冲请求：调用超过同类请求历史p90延迟仍未返回时发出一次重复请求，先返回有效JSON者胜出
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "5"))
+LLM_HEDGE_TOKEN_BUDGET = int(os.getenv("LLM_HEDGE_TOKEN_BUDGET", "20000"))  # 单篇论文对冲请求额外token上限（按估算计）
+
+# 请求JSON对象响应模式（response_format），服务端不支持时可关闭
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "true").lower() == "true"
+
+# 泳道输入压缩：启用的规则（逗号分隔，为空时全部启用）与每个泳道送入LLM的估算token预算
+LANE_COMPACTION_RULES = [rule.strip() for rule in os.getenv("LANE_COMPACTION_RULES", "").split(",") if rule.strip()]
+LANE_TOKEN_BUDGET = int(os.getenv("LANE_TOKEN_BUDGET", "12000"))
+LANE_TOKEN_BUDGETS = json.loads(os.getenv("LANE_TOKEN_BUDGETS", "{}"))  # 例如 {"Results & Analysis": 16000}
+
+# 超长泳道Map-Reduce：超过阈值（估算token）时按块并发总结后归约
+LANE_MAP_REDUCE_THRESHOLD = int(os.getenv("LANE_MAP_REDUCE_THRESHOLD", "6000"))
+LANE_MAP_CHUNK_TOKENS = int(os.getenv("LANE_MAP_CHUNK_TOKENS", "2500"))
+LANE_MAP_CONCURRENCY = int(os.getenv("LANE_MAP_CONCURRENCY", "4"))
+
+# 四大泳道合并调用：一次请求分析四个泳道（仅当压缩后总token不超过LANE_FUSED_MAX_TOKENS时启用）
+LANE_FUSED_MODE = os.getenv("LANE_FUSED_MODE", "false").lower() == "true"
+LANE_FUSED_MAX_TOKENS = int(os.getenv("LANE_FUSED_MAX_TOKENS", "8000"))
+
+# 流式响应：边生成边扫描JSON，JSON开始前允许的非空白字符数
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+LLM_STREAM_PREAMBLE_LIMIT = int(os.getenv("LLM_STREAM_PREAMBLE_LIMIT", "200"))
+
+# 各调用阶段的模型、最大输出token与温度：未配置的max_tokens按阶段输出schema推导（条目数 × 词数上限），
+# 未配置的模型与温度使用全局默认；结构化任务（标题映射、Map块总结）默认使用LLM_STRUCTURAL_MODEL
+# LLM_STAGE_CONFIG可用JSON覆盖，例如 {"title_mapping": {"model": "deepseek-chat", "max_tokens": 300}}
+LLM_STRUCTURAL_MODEL = os.getenv("LLM_STRUCTURAL_MODEL", DEEPSEEK_MODEL)
+LLM_OUTPUT_TOKEN_MARGIN = float(os.getenv("LLM_OUTPUT_TOKEN_MARGIN", "1.5"))
+LLM_STAGE_CONFIG = {
+    'abstract': {},
+    'title_mapping': {'model': LLM_STRUCTURAL_MODEL, 'temperature': 0.1},
+    'lane': {},
+    'lane_map': {'model': LLM_STRUCTURAL_MODEL},
+    'fused_lanes': {},
+    'innovation': {},
+}
+for _stage, _overrides in json.loads(os.getenv("LLM_STAGE_CONFIG", "{}")).items():
+    LLM_STAGE_CONFIG.setdefault(_stage, {}).update(_overrides)
+
+# 日志级别与追踪导出：设置TRACE_EXPORT_DIR时每篇论文的追踪以Chrome trace JSON写入该目录
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+TRACE_EXPORT_DIR = os.getenv("TRACE_EXPORT_DIR", "")
+
+# 单请求性能剖析（按请求开启）：结果目录与调用栈采样间隔（秒）
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# 准入控制：同时处理的论文数、处理中任务的估算内存总和上限（MB）与排队上限（超出返回429）
+MAX_INFLIGHT_JOBS = int(os.getenv("MAX_INFLIGHT_JOBS", "2"))
+ADMISSION_MEMORY_BUDGET_MB = float(os.getenv("ADMISSION_MEMORY_BUDGET_MB", "4096"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "16"))
+# batch类别（如夜间批量重跑）：最多同时处理的论文数（其余名额留给interactive）与排队上限
+ADMISSION_BATCH_MAX_INFLIGHT = int(os.getenv("ADMISSION_BATCH_MAX_INFLIGHT", str(max(1, MAX_INFLIGHT_JOBS - 1))))
+ADMISSION_BATCH_QUEUE_SIZE = int(os.getenv("ADMISSION_BATCH_QUEUE_SIZE", "64"))
+ADMISSION_DEFAULT_JOB_SECONDS = float(os.getenv("ADMISSION_DEFAULT_JOB_SECONDS", "90"))  # 用于估算Retry-After
+# 单个任务最长排队秒数（同时受请求截止时间约束，超出返回503）；0表示只受截止时间约束
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "120"))
+# 单篇论文内存估算：固定开销（泳道进程池等）+ 每页解析结果 + 每MB PDF（图片base64等）
+JOB_MEMORY_BASE_MB = float(os.getenv("JOB_MEMORY_BASE_MB", "400"))
+JOB_MEMORY_PER_PAGE_MB = float(os.getenv("JOB_MEMORY_PER_PAGE_MB", "4"))
+JOB_MEMORY_PER_PDF_MB = float(os.getenv("JOB_MEMORY_PER_PDF_MB", "3"))
+
+# 租户加权公平：租户权重（未列出的租户权重为1），例如 {"frontend": 4, "nightly": 1}
+TENANT_WEIGHTS = json.loads(os.getenv("TENANT_WEIGHTS", "{}"))
+# 进程级LLM并发名额（0表示不限）与batch类别最多占用的名额数
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "0"))
+LLM_BATCH_MAX_SLOTS = int(os.getenv("LLM_BATCH_MAX_SLOTS", str(max(1, LLM_MAX_CONCURRENCY * 3 // 4))))
+
+# 进行中任务合并（single-flight）：同时上传的同一篇论文（按PDF的SHA-256）只处理一次；同一时刻的相同LLM请求只发送一次
+PAPER_SINGLE_FLIGHT = os.getenv("PAPER_SINGLE_FLIGHT", "true").lower() == "true"
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() == "true"
+
+# 客户端断开连接：检测间隔（秒）；所有等待方都断开后默认取消处理，
+# DETACH_ON_DISCONNECT为true时转入后台继续处理，结果缓存DETACHED_RESULT_TTL秒（最多DETACHED_RESULT_MAX篇）供重新上传时直接返回
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "1"))
+DETACH_ON_DISCONNECT = os.getenv("DETACH_ON_DISCONNECT", "false").lower() == "true"
+DETACHED_RESULT_TTL = float(os.getenv("DETACHED_RESULT_TTL", "600"))
+DETACHED_RESULT_MAX = int(os.getenv("DETACHED_RESULT_MAX", "32"))
@@ -8,10 +8,13 @@
 - 支持处理最后一个标题的情况（提取到文件结束）
 """
 
+import logging
 import os
 import re
 from typing import List, Optional
 
+logger = logging.getLogger(__name__)
+
 
 class ContentExtractor:
     """根据标题提取Markdown文件内容的类"""
@@ -226,6 +229,51 @@ class ContentExtractor:
         except Exception as e:
             return f"错误：处理内容时发生异常 - {str(e)}"
     
+    def buildSectionIndexFromContent(self, headingList: List[str], markdownContent: str) -> List[dict]:
+        """
+        构建一级标题的章节区间索引（字符偏移），与extractContentByHeadingFromContent的切分规则一致
+
+        Args:
+            headingList: 标题列表，例如 ['# Abstract', '# 1. Introduction', '# 2. Methods']
+            markdownContent: Markdown内容字符串
+
+        Returns:
+            List[dict]: 按headingList顺序排列的章节区间，每项包含index、heading、start、end；
+                        在内容中未找到的标题不会出现在结果中
+        """
+        lines = markdownContent.split('\n')
+
+        # 一次遍历记录每行的起始偏移，以及每个干净标题首次出现的行号
+        lineOffsets = []
+        firstLineByWords = {}
+        offset = 0
+        for i, line in enumerate(lines):
+            lineOffsets.append(offset)
+            offset += len(line) + 1
+            cleanWords = self._extractCleanWords(line)
+            if cleanWords and cleanWords not in firstLineByWords:
+                firstLineByWords[cleanWords] = i
+        lineOffsets.append(len(markdownContent))
+
+        headingLines = [firstLineByWords.get(self._extractCleanWords(h), -1) for h in headingList]
+
+        sections = []
+        for i, heading in enumerate(headingList):
+            startLine = headingLines[i]
+            if startLine == -1:
+                continue
+            endLine = len(lines) if i == len(headingList) - 1 else headingLines[i + 1]
+            if endLine == -1:
+                continue
+            sections.append({
+                'index': i,
+                'heading': heading,
+                'start': lineOffsets[startLine],
+                'end': lineOffsets[endLine]
+            })
+
+        return sections
+
     def _findHeadingIndex(self, headingList: List[str], targetHeading: str) -> int:
         """
         在标题列表中找到目标标题的索引（支持灵活匹配）
@@ -364,29 +412,27 @@ class ContentExtractor:
 #     filePath = "/Users/xiaokong/task/2025/paper_vis/vis/md/2dbbabd2678ba74fcd9b08aadae975ae.md"
 #     targetHeading = "# 5. Conclusion"
     
-#     print("=== 测试内容提取功能 ===")
-#     print(f"目标标题: {targetHeading}")
-#     print(f"文件路径: {filePath}")
-#     print()
+#     logger.info("=== 测试内容提取功能 ===")
+#     logger.info(f"目标标题: {targetHeading}")
+#     logger.info(f"文件路径: {filePath}")
     
 #     # 测试基本功能
 #     content = extractor.extractContentByHeading(headingList, filePath, targetHeading)
-#     print("=== 提取的内容 ===")
-#     print(content)
-#     print()
+#     logger.info("=== 提取的内容 ===")
+#     logger.info(content)
     
 #     # 测试调试功能
 #     debugResult = extractor.extractContentByHeadingWithDebug(headingList, filePath, targetHeading)
-#     print("=== 调试信息 ===")
-#     print(f"成功: {debugResult['success']}")
-#     print(f"目标标题: {debugResult['debug_info']['target_heading']}")
-#     print(f"目标索引: {debugResult['debug_info']['target_index']}")
-#     print(f"下一个标题: {debugResult['debug_info']['next_heading']}")
-#     print(f"开始行: {debugResult['debug_info']['start_line']}")
-#     print(f"结束行: {debugResult['debug_info']['end_line']}")
-#     print(f"总行数: {debugResult['debug_info']['total_lines']}")
+#     logger.info("=== 调试信息 ===")
+#     logger.info(f"成功: {debugResult['success']}")
+#     logger.info(f"目标标题: {debugResult['debug_info']['target_heading']}")
+#     logger.info(f"目标索引: {debugResult['debug_info']['target_index']}")
+#     logger.info(f"下一个标题: {debugResult['debug_info']['next_heading']}")
+#     logger.info(f"开始行: {debugResult['debug_info']['start_line']}")
+#     logger.info(f"结束行: {debugResult['debug_info']['end_line']}")
+#     logger.info(f"总行数: {debugResult['debug_info']['total_lines']}")
 #     if debugResult['debug_info']['error']:
-#         print(f"错误: {debugResult['debug_info']['error']}")
+#         logger.info(f"错误: {debugResult['debug_info']['error']}")
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端延迟测试
+启动本地模拟LLM服务与模拟解析服务，按指定并发驱动MainScheduler或/paper_vis接口，
+报告吞吐量、端到端延迟分位数（p50/p95/p99）、各阶段耗时与关键路径，用于离线衡量并发相关改动
+
+模式：
+- scheduler：在本进程中用线程并发调用MainScheduler.process_uploaded_pdf
+- api：向/paper_vis并发上传PDF；未指定--api-url时以子进程启动api_server（环境变量指向模拟服务）
+
+用法：
+    python latency_harness.py --requests 20 --concurrency 4
+    python latency_harness.py --mode api --requests 50 --concurrency 10 \\
+        --llm-args "--latency lognormal:2,0.5 --rate-429 0.05" --parser-args "--latency uniform:5,10 --max-concurrent 2"
+"""
+
+import argparse
+import glob
+import json
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PDF_GLOB = os.path.join(BASE_DIR, '..', 'uploads', 'papers', '*', '*.pdf')
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    线性插值分位数
+
+    Args:
+        values: 样本
+        q: 分位（0-100）
+
+    Returns:
+        分位数，无样本时返回None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """样本的均值、分位数与最大值"""
+    return {
+        'count': len(values),
+        'mean': statistics.fmean(values) if values else None,
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else None
+    }
+
+
+def _free_port() -> int:
+    """获取一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60.0):
+    """
+    等待子进程开始监听端口
+
+    Raises:
+        RuntimeError: 子进程退出或超时
+    """
+    end = time.time() + timeout
+    while time.time() < end:
+        if process.poll() is not None:
+            raise RuntimeError(f"子进程已退出（退出码 {process.returncode}）: {' '.join(process.args)}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"等待端口 {port} 超时")
+
+
+def start_process(args: List[str], port: int, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """
+    在paper_vis目录下启动子进程并等待其监听端口
+
+    Args:
+        args: 命令行参数
+        port: 监听端口
+        env: 环境变量
+
+    Returns:
+        subprocess.Popen: 子进程
+    """
+    process = subprocess.Popen(args, cwd=BASE_DIR, env=env)
+    _wait_for_port(port, process)
+    return process
+
+
+def run_request(mode: str, pdf_path: str, api_url: str, deadline_seconds: Optional[float]) -> Dict[str, Any]:
+    """
+    处理一篇论文并记录客户端视角的延迟
+
+    Args:
+        mode: scheduler或api
+        pdf_path: PDF路径
+        api_url: /paper_vis地址（api模式）
+        deadline_seconds: 单篇论文处理时限
+
+    Returns:
+        Dict[str, Any]: {'pdf', 'latency', 'outcome', 'result', 'error'}
+    """
+    with open(pdf_path, 'rb') as f:
+        content = f.read()
+    filename = os.path.basename(pdf_path)
+
+    start = time.time()
+    result, error = None, None
+    try:
+        if mode == 'scheduler':
+            from MainScheduler import MainScheduler
+            deadline = time.time() + deadline_seconds if deadline_seconds else None
+            result = MainScheduler().process_uploaded_pdf(content, filename, deadline)
+        else:
+            params = {'deadline_seconds': deadline_seconds} if deadline_seconds else None
+            response = requests.post(api_url, files={'file': (filename, content, 'application/pdf')}, params=params)
+            if response.status_code == 200:
+                result = response.json()
+            else:
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    latency = time.time() - start
+
+    if result is None:
+        outcome = 'error'
+    elif not result.get('success'):
+        outcome = 'failed'
+    else:
+        outcome = 'partial' if result.get('partial') else 'success'
+    return {'pdf': filename, 'latency': latency, 'outcome': outcome, 'result': result, 'error': error}
+
+
+def build_report(records: List[Dict[str, Any]], wall_time: float, llm_stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总测试结果
+
+    Args:
+        records: run_request的结果列表
+        wall_time: 全部请求的总墙钟时间（秒）
+        llm_stats: 模拟LLM服务的/stats
+
+    Returns:
+        Dict[str, Any]: {'requests', 'wall_time', 'throughput', 'outcomes', 'latency', 'stages',
+                         'critical_paths', 'critical_path_time', 'outside_stage_graph', 'errors', 'mock_llm'}
+    """
+    completed = [r for r in records if r['result'] is not None]
+    stage_durations = defaultdict(list)
+    critical_paths = Counter()
+    critical_path_times = []
+    outside_graph = []
+    for record in completed:
+        info = record['result'].get('processing_info', {})
+        for name, stage in (info.get('stages') or {}).items():
+            if stage.get('start') is not None and stage.get('end') is not None:
+                stage_durations[name].append(stage['duration'])
+        if info.get('critical_path'):
+            critical_paths[' → '.join(info['critical_path'])] += 1
+            critical_path_times.append(info.get('critical_path_time', 0))
+            # 阶段依赖图之外的耗时：PDF解析、文档模型构建、最终JSON组装（api模式另含传输）
+            outside_graph.append(max(0.0, record['latency'] - info.get('critical_path_time', 0)))
+
+    return {
+        'requests': len(records),
+        'wall_time': wall_time,
+        'throughput': len(completed) / wall_time if wall_time else 0.0,
+        'outcomes': dict(Counter(r['outcome'] for r in records)),
+        'latency': summarize([r['latency'] for r in records]),
+        'stages': {name: summarize(values) for name, values in sorted(stage_durations.items())},
+        'critical_paths': [{'path': path, 'count': count} for path, count in critical_paths.most_common()],
+        'critical_path_time': summarize(critical_path_times),
+        'outside_stage_graph': summarize(outside_graph),
+        'errors': [r['error'] for r in records if r['error']][:20],
+        'mock_llm': llm_stats
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """打印测试报告"""
+    def ms(value):
+        return f"{value:8.2f}s" if value is not None else '       -'
+
+    latency = report['latency']
+    print("\n📊 端到端延迟测试结果")
+    print(f"   - 请求数: {report['requests']}，总耗时: {report['wall_time']:.2f}秒，吞吐量: {report['throughput'] * 60:.2f} 篇/分钟")
+    print(f"   - 结果: {report['outcomes']}")
+    print(f"   - 延迟: p50 {ms(latency['p50'])}  p95 {ms(latency['p95'])}  p99 {ms(latency['p99'])}  max {ms(latency['max'])}")
+    print(f"   - 阶段依赖图外（解析、组装与传输）: p50 {ms(report['outside_stage_graph']['p50'])}")
+    print(f"   - 关键路径耗时: p50 {ms(report['critical_path_time']['p50'])}  p95 {ms(report['critical_path_time']['p95'])}")
+    for item in report['critical_paths'][:3]:
+        print(f"     {item['count']:>4} × {item['path']}")
+    print("   - 阶段耗时:")
+    for name, stats in report['stages'].items():
+        print(f"     {name:<32} p50 {ms(stats['p50'])}  p95 {ms(stats['p95'])}")
+    for error in report['errors'][:5]:
+        print(f"   ❌ {error}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='端到端延迟测试（本地模拟LLM与解析服务）')
+    parser.add_argument('--mode', choices=['scheduler', 'api'], default='scheduler')
+    parser.add_argument('--requests', type=int, default=10, help='请求总数')
+    parser.add_argument('--concurrency', type=int, default=2, help='并发请求数')
+    parser.add_argument('--pdf', nargs='+', help='轮流上传的PDF（默认使用uploads/papers下自带的论文）')
+    parser.add_argument('--deadline-seconds', type=float, default=None, help='单篇论文处理时限')
+    parser.add_argument('--llm-args', default='', help='传给mock_llm_server.py的参数')
+    parser.add_argument('--parser-args', default='', help='传给mock_parser_server.py的参数')
+    parser.add_argument('--api-url', help='已运行的/paper_vis地址（api模式，需自行将其指向模拟服务）')
+    parser.add_argument('--output', help='结果JSON输出路径')
+    parser.add_argument('--log-level', default='WARNING', help='scheduler模式下的日志级别')
+    args = parser.parse_args()
+
+    pdfs = args.pdf or sorted(glob.glob(DEFAULT_PDF_GLOB))
+    if not pdfs:
+        print("❌ 没有可上传的PDF")
+        sys.exit(1)
+
+    llm_port, parser_port = _free_port(), _free_port()
+    llm_url = f"http://127.0.0.1:{llm_port}/v1/chat/completions"
+    env = {
+        **os.environ,
+        'DEEPSEEK_API_URL': llm_url,
+        'DEEPSEEK_API_KEY': os.environ.get('DEEPSEEK_API_KEY', 'sk-mock'),
+        'PDF_PARSER_URL': f"http://127.0.0.1:{parser_port}/file_parse_json",
+        'LOG_LEVEL': args.log_level
+    }
+    # scheduler模式在本进程中导入配置，需在导入MainScheduler之前设置
+    os.environ.update(env)
+
+    processes = []
+    try:
+        processes.append(start_process([sys.executable, 'mock_llm_server.py', '--port', str(llm_port)]
+                                       + shlex.split(args.llm_args), llm_port))
+        processes.append(start_process([sys.executable, 'mock_parser_server.py', '--port', str(parser_port)]
+                                       + shlex.split(args.parser_args), parser_port))
+
+        api_url = args.api_url
+        if args.mode == 'api' and not api_url:
+            api_port = _free_port()
+            processes.append(start_process([sys.executable, '-m', 'uvicorn', 'api_server:app', '--port', str(api_port),
+                                            '--log-level', 'warning'], api_port, env))
+            api_url = f"http://127.0.0.1:{api_port}/paper_vis"
+        elif args.mode == 'scheduler':
+            from Tracing import configure_logging
+            configure_logging(args.log_level.upper())
+
+        print(f"🚀 {args.mode}模式: {args.requests} 个请求，并发 {args.concurrency}，{len(pdfs)} 篇PDF轮流上传")
+        done = 0
+        lock = threading.Lock()
+
+        def task(i):
+            nonlocal done
+            record = run_request(args.mode, pdfs[i % len(pdfs)], api_url, args.deadline_seconds)
+            with lock:
+                done += 1
+                print(f"   [{done}/{args.requests}] {record['pdf']}: {record['latency']:.2f}秒 {record['outcome']}")
+            return record
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            records = list(executor.map(task, range(args.requests)))
+        wall_time = time.time() - start
+
+        try:
+            llm_stats = requests.get(f"http://127.0.0.1:{llm_port}/stats", timeout=5).json()
+        except (requests.RequestException, ValueError):
+            llm_stats = None
+        report = build_report(records, wall_time, llm_stats)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if args.mode == 'scheduler':
+            from FigureMapGenerator import shutdown_figure_process_pool
+            shutdown_figure_process_pool()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import json
+import logging
 import os
 from typing import Dict, List, Optional
 from difflib import SequenceMatcher
 
+logger = logging.getLogger(__name__)
+
 class DataMerger:
     def __init__(self):
         self.similarity_threshold = 0.6  # 文本相似度阈值
@@ -18,10 +21,10 @@ class DataMerger:
         Returns:
             List[Dict]: 合并后的数据列表
         """
-        print("正在处理数据...")
+        logger.info("正在处理数据...")
         
-        print(f"content_list: {len(content_list)} 条记录")
-        print(f"middle_data: {len(middle_data['pdf_info'])} 页数据")
+        logger.info(f"content_list: {len(content_list)} 条记录")
+        logger.info(f"middle_data: {len(middle_data['pdf_info'])} 页数据")
         
         # 构建middle数据索引
         middle_index = self._build_middle_index(middle_data)
@@ -48,7 +51,7 @@ class DataMerger:
             if bbox_info:
                 merged_item.update(bbox_info)
                 matched_count += 1
-                print(f"✅ 匹配成功: {item.get('type')} - {bbox_info.get('match_method')} - 置信度: {bbox_info.get('match_confidence', 0):.3f}")
+                logger.debug(f"✅ 匹配成功: {item.get('type')} - {bbox_info.get('match_method')} - 置信度: {bbox_info.get('match_confidence', 0):.3f}")
             else:
                 # 未匹配到bbox信息，添加空的位置信息
                 merged_item.update({
@@ -57,32 +60,105 @@ class DataMerger:
                     'match_confidence': 0.0,
                     'match_method': 'no_match'
                 })
-                print(f"❌ 未匹配: {item.get('type')} - 页面: {item.get('page_idx')} - 内容: {str(item.get('img_caption', item.get('text', '')))[:50]}...")
+                logger.debug(f"❌ 未匹配: {item.get('type')} - 页面: {item.get('page_idx')} - 内容: {str(item.get('img_caption', item.get('text', '')))[:50]}...")
             
             merged_data.append(merged_item)
         
-        print(f"✅ 数据合并完成!")
-        print(f"   - 总记录数: {len(merged_data)}")
-        print(f"   - 成功匹配: {matched_count}")
-        print(f"   - 匹配率: {matched_count/len(merged_data)*100:.1f}%")
-        print(f"调试: merged_data前3项类型: {[type(item) for item in merged_data[:3]]}")
+        logger.info(f"✅ 数据合并完成!")
+        logger.info(f"   - 总记录数: {len(merged_data)}")
+        logger.info(f"   - 成功匹配: {matched_count}")
+        logger.info(f"   - 匹配率: {matched_count/len(merged_data)*100:.1f}%")
+        logger.debug(f"调试: merged_data前3项类型: {[type(item) for item in merged_data[:3]]}")
         
         return merged_data
     
+    def merge_document(self, document, middle_data: Dict):
+        """
+        将middle数据中的位置信息合并到文档模型的块记录中（不复制content_list条目）
+        
+        Args:
+            document: DocumentModel文档模型
+            middle_data: middle数据字典
+        
+        Returns:
+            DocumentModel: 写入位置信息后的同一文档模型
+        """
+        logger.info(f"正在合并文档模型: {len(document.blocks)} 个块, {len(middle_data['pdf_info'])} 页middle数据")
+        
+        middle_index = self._build_middle_index(middle_data)
+        
+        matched_count = 0
+        for block in document.blocks:
+            bbox_info = self._find_matching_bbox(block.source, middle_index)
+            if bbox_info:
+                block.apply_match(bbox_info)
+                matched_count += 1
+        
+        total = len(document.blocks)
+        logger.info(f"✅ 文档模型合并完成: 成功匹配 {matched_count}/{total}"
+              + (f" ({matched_count/total*100:.1f}%)" if total else ""))
+        
+        return document
+    
+    @staticmethod
+    def compact_middle_data(middle_data: Dict) -> Dict:
+        """
+        裁剪middle数据，只保留merge_data实际读取的字段（用于跨进程传递）
+        
+        保留每页的page_idx，以及preproc_blocks/para_blocks中block的type、bbox、
+        lines[].spans[]的content（仅首个span保留bbox），和blocks内的image_caption/table_caption子块。
+        
+        Args:
+            middle_data: middle数据字典
+        
+        Returns:
+            Dict: 与merge_data兼容的精简middle数据
+        """
+        def compact_block(block: Dict) -> Dict:
+            lines = [
+                {'spans': [{'content': span.get('content', '')} for span in line.get('spans', [])]}
+                for line in block.get('lines', [])
+            ]
+            if lines and lines[0]['spans']:
+                lines[0]['spans'][0]['bbox'] = block['lines'][0]['spans'][0].get('bbox')
+            compact = {
+                'type': block.get('type'),
+                'bbox': block.get('bbox'),
+                'lines': lines
+            }
+            caption_blocks = [compact_block(sub_block) for sub_block in block.get('blocks', [])
+                              if sub_block.get('type') in ['image_caption', 'table_caption']]
+            if caption_blocks:
+                compact['blocks'] = caption_blocks
+            return compact
+        
+        pages = []
+        for array_idx, page_info in enumerate(middle_data.get('pdf_info', [])):
+            if not isinstance(page_info, dict):
+                pages.append(page_info)
+                continue
+            pages.append({
+                'page_idx': page_info.get('page_idx', array_idx),
+                'preproc_blocks': [compact_block(b) for b in page_info.get('preproc_blocks', [])],
+                'para_blocks': [compact_block(b) for b in page_info.get('para_blocks', [])]
+            })
+        
+        return {'pdf_info': pages}
+    
     def _build_middle_index(self, middle_data: Dict) -> Dict:
         """构建middle数据的索引结构"""
         index = {}
         
-        print(f"构建索引: 共 {len(middle_data['pdf_info'])} 页数据")
+        logger.debug(f"构建索引: 共 {len(middle_data['pdf_info'])} 页数据")
         
         for array_idx, page_info in enumerate(middle_data['pdf_info']):
-            print(f"调试: page_info类型: {type(page_info)}")
+            logger.debug(f"调试: page_info类型: {type(page_info)}")
             if isinstance(page_info, str):
-                print(f"警告: page_info是字符串，跳过处理")
+                logger.warning(f"警告: page_info是字符串，跳过处理")
                 continue
             # 获取实际页面号，优先使用page_idx字段，否则用数组索引
             actual_page_idx = page_info.get('page_idx', array_idx)
-            print(f"  处理页面: 数组索引={array_idx}, 实际页面={actual_page_idx}")
+            logger.debug(f"  处理页面: 数组索引={array_idx}, 实际页面={actual_page_idx}")
             
             index[actual_page_idx] = {
                 'preproc_blocks': [],
@@ -111,10 +187,10 @@ class DataMerger:
                     elif sub_block.get('type') == 'table_caption':
                         para_table_captions += 1
             
-            print(f"    - preproc_blocks中的image_caption: {preproc_captions}个")
-            print(f"    - para_blocks中的image_caption: {para_captions}个")
-            print(f"    - preproc_blocks中的table_caption: {preproc_table_captions}个")
-            print(f"    - para_blocks中的table_caption: {para_table_captions}个")
+            logger.debug(f"    - preproc_blocks中的image_caption: {preproc_captions}个")
+            logger.debug(f"    - para_blocks中的image_caption: {para_captions}个")
+            logger.debug(f"    - preproc_blocks中的table_caption: {preproc_table_captions}个")
+            logger.debug(f"    - para_blocks中的table_caption: {para_table_captions}个")
             
             # 索引preproc_blocks - 修复：查找blocks内的image_caption
             for block in page_info.get('preproc_blocks', []):
@@ -223,20 +299,20 @@ class DataMerger:
         
         # 特殊处理图片类型 - 使用img_caption匹配
         if content_type == 'image':
-            print(f"\n🖼️ 处理图片: 页面 {page_idx}")
+            logger.debug(f"🖼️ 处理图片: 页面 {page_idx}")
             if page_idx in middle_index:
                 return self._find_image_caption_bbox(content_item, middle_index[page_idx])
             else:
-                print(f"  ❌ 页面 {page_idx} 在middle_index中不存在")
+                logger.debug(f"  ❌ 页面 {page_idx} 在middle_index中不存在")
                 return None
         
         # 特殊处理表格类型 - 使用table_caption匹配
         if content_type == 'table':
-            print(f"\n📊 处理表格: 页面 {page_idx}")
+            logger.debug(f"📊 处理表格: 页面 {page_idx}")
             if page_idx in middle_index:
                 return self._find_table_caption_bbox(content_item, middle_index[page_idx])
             else:
-                print(f"  ❌ 页面 {page_idx} 在middle_index中不存在")
+                logger.debug(f"  ❌ 页面 {page_idx} 在middle_index中不存在")
                 return None
         
         page_data = middle_index[page_idx]
@@ -279,10 +355,10 @@ class DataMerger:
             caption_text = str(img_caption)
         
         if not caption_text.strip():
-            print(f"  - 图片caption为空，跳过")
+            logger.debug(f"  - 图片caption为空，跳过")
             return None
         
-        print(f"  - 查找图片caption: {caption_text[:100]}...")
+        logger.debug(f"  - 查找图片caption: {caption_text[:100]}...")
         
         best_match = None
         best_score = 0
@@ -297,7 +373,7 @@ class DataMerger:
                     similarity = self._calculate_similarity(caption_text, block['content'])
                     candidates.append((block, similarity, block_source))
                     
-                    print(f"    - 候选: {block['content'][:80]}... 相似度: {similarity:.3f}")
+                    logger.debug(f"    - 候选: {block['content'][:80]}... 相似度: {similarity:.3f}")
                     
                     if similarity > best_score and similarity > 0.2:  # 降低到0.2，开头匹配策略下更宽松
                         best_score = similarity
@@ -312,11 +388,11 @@ class DataMerger:
                         }
         
         if best_match:
-            print(f"  ✅ 找到最佳匹配: {best_score:.3f}")
+            logger.debug(f"  ✅ 找到最佳匹配: {best_score:.3f}")
         else:
-            print(f"  ❌ 未找到匹配 (共检查了 {len(candidates)} 个候选)")
+            logger.debug(f"  ❌ 未找到匹配 (共检查了 {len(candidates)} 个候选)")
             # 如果没有找到，尝试更宽松的匹配：只要包含Figure关键字
-            print(f"  🔄 尝试宽松匹配...")
+            logger.debug(f"  🔄 尝试宽松匹配...")
             for block_source in search_order:
                 for block in page_data[block_source]:
                     if (block['type'] == 'image_caption' and 
@@ -330,7 +406,7 @@ class DataMerger:
                         block_nums = re.findall(fig_num_pattern, block['content'].lower())
                         
                         if caption_nums and block_nums and caption_nums[0] == block_nums[0]:
-                            print(f"    💡 图号匹配: Figure {caption_nums[0]}")
+                            logger.debug(f"    💡 图号匹配: Figure {caption_nums[0]}")
                             best_match = {
                                 'bbox': block['bbox'],
                                 'first_span_bbox': block['first_span_bbox'],
@@ -340,7 +416,7 @@ class DataMerger:
                                 'match_method': f'figure_number_{block_source}',
                                 'type_matched': True
                             }
-                            print(f"  ✅ 图号匹配成功: {caption_nums[0]}")
+                            logger.debug(f"  ✅ 图号匹配成功: {caption_nums[0]}")
                             break
                 if best_match:
                     break
@@ -356,10 +432,10 @@ class DataMerger:
             caption_text = str(table_caption)
         
         if not caption_text.strip():
-            print(f"  - 表格caption为空，跳过")
+            logger.debug(f"  - 表格caption为空，跳过")
             return None
         
-        print(f"  - 查找表格caption: {caption_text[:100]}...")
+        logger.debug(f"  - 查找表格caption: {caption_text[:100]}...")
         
         best_match = None
         best_score = 0
@@ -374,7 +450,7 @@ class DataMerger:
                     similarity = self._calculate_similarity(caption_text, block['content'])
                     candidates.append((block, similarity, block_source))
                     
-                    print(f"    - 候选: {block['content'][:80]}... 相似度: {similarity:.3f}")
+                    logger.debug(f"    - 候选: {block['content'][:80]}... 相似度: {similarity:.3f}")
                     
                     if similarity > best_score and similarity > 0.2:  # 降低到0.2，开头匹配策略下更宽松
                         best_score = similarity
@@ -389,11 +465,11 @@ class DataMerger:
                         }
         
         if best_match:
-            print(f"  ✅ 找到最佳匹配: {best_score:.3f}")
+            logger.debug(f"  ✅ 找到最佳匹配: {best_score:.3f}")
         else:
-            print(f"  ❌ 未找到匹配 (共检查了 {len(candidates)} 个候选)")
+            logger.debug(f"  ❌ 未找到匹配 (共检查了 {len(candidates)} 个候选)")
             # 如果没有找到，尝试更宽松的匹配：只要包含Table关键字
-            print(f"  🔄 尝试宽松匹配...")
+            logger.debug(f"  🔄 尝试宽松匹配...")
             for block_source in search_order:
                 for block in page_data[block_source]:
                     if (block['type'] == 'table_caption' and 
@@ -407,7 +483,7 @@ class DataMerger:
                         block_nums = re.findall(table_num_pattern, block['content'].lower())
                         
                         if caption_nums and block_nums and caption_nums[0] == block_nums[0]:
-                            print(f"    💡 表号匹配: Table {caption_nums[0]}")
+                            logger.debug(f"    💡 表号匹配: Table {caption_nums[0]}")
                             best_match = {
                                 'bbox': block['bbox'],
                                 'first_span_bbox': block['first_span_bbox'],
@@ -417,7 +493,7 @@ class DataMerger:
                                 'match_method': f'table_number_{block_source}',
                                 'type_matched': True
                             }
-                            print(f"  ✅ 表号匹配成功: {caption_nums[0]}")
+                            logger.debug(f"  ✅ 表号匹配成功: {caption_nums[0]}")
                             break
                 if best_match:
                     break
@@ -493,6 +569,7 @@ class DataMerger:
 
 def main():
     """主函数示例"""
+    logging.basicConfig(level=logging.INFO)
     merger = DataMerger()
     
     # 示例用法
@@ -502,18 +579,18 @@ def main():
     
     # 检查文件是否存在
     if not os.path.exists(content_list_path):
-        print(f"错误: 找不到文件 {content_list_path}")
+        logger.error(f"错误: 找不到文件 {content_list_path}")
         return
         
     if not os.path.exists(middle_path):
-        print(f"错误: 找不到文件 {middle_path}")
+        logger.error(f"错误: 找不到文件 {middle_path}")
         return
     
     # 执行合并
     try:
         merged_data = merger.merge_data(content_list_path, middle_path, output_path)
     except Exception as e:
-        print(f"❌ 合并过程中出错: {e}")
+        logger.error(f"❌ 合并过程中出错: {e}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟LLM服务
+实现DeepSeek /v1/chat/completions接口，供压测与端到端延迟测试使用，不消耗真实token
+
+功能：
+- 按提示词识别调用类型（摘要语步、标题映射、四大泳道、合并泳道、Map块总结、创新发现），返回符合各阶段schema的JSON
+- 延迟：首token延迟按可配置分布采样（fixed、uniform、normal、lognormal），之后按固定间隔分块输出
+- 故障注入：按比例返回429（带Retry-After）与500；按调用类型或泳道名返回无效JSON（截断或不符合schema）
+- 支持流式（SSE，stream_options.include_usage时附带usage块）与非流式响应
+- GET /stats：按调用类型统计请求数与注入的故障数
+
+用法：
+    python mock_llm_server.py --port 8101 --latency lognormal:2,0.5 --rate-429 0.05 --invalid "Results & Analysis=0.3"
+    DEEPSEEK_API_URL=http://127.0.0.1:8101/v1/chat/completions python MainScheduler.py paper.pdf
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 标题映射时丢弃的边界标题
+SKIPPED_TITLE_KEYWORDS = ('abstract', 'reference', 'acknowledg', 'appendix', 'bibliography')
+LANES = ['Context & Related Work', 'Methodology & Setup', 'Results & Analysis', 'Conclusion']
+
+_WORDS = ('model data method result analysis system performance evaluation baseline experiment dataset accuracy '
+          'latency storage network training inference design approach framework benchmark improvement limitation '
+          'future work signal pipeline module efficient robust scalable proposed novel significant').split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    解析延迟分布
+
+    Args:
+        spec: fixed:秒、uniform:最小,最大、normal:均值,标准差、lognormal:中位数,sigma
+
+    Returns:
+        Callable[[random.Random], float]: 采样函数（秒，不小于0）
+
+    Raises:
+        ValueError: 无法识别的分布
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(',') if value.strip()] if params else []
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(0.0, values[1]) * values[0]
+    raise ValueError(f"无法识别的延迟分布: {spec}")
+
+
+def classify_request(messages: List[Dict[str, str]]) -> Tuple[str, Optional[str]]:
+    """
+    按提示词识别调用类型
+
+    Args:
+        messages: 请求消息列表
+
+    Returns:
+        Tuple[str, Optional[str]]: (调用类型, 泳道名)，调用类型为abstract、title_mapping、fused_lanes、
+            lane_map、innovation、lane或unknown
+    """
+    system = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+    user = next((m.get('content', '') for m in messages if m.get('role') == 'user'), '')
+    text = system + '\n' + user
+
+    if 'abstract rhetorical steps' in text:
+        return 'abstract', None
+    if 'Swimlane' in system or 'raw title list' in user:
+        return 'title_mapping', None
+    if 'Multi-Lane Mode' in system:
+        return 'fused_lanes', None
+    match = re.search(r'excerpt of the "([^"]+)" part', system)
+    if match:
+        return 'lane_map', match.group(1)
+    if 'innovation opportunities' in text:
+        return 'innovation', None
+    match = re.search(r'task for the \*\*(.+?)\*\* lane', user)
+    if match:
+        return 'lane', match.group(1)
+    return 'unknown', None
+
+
+class CannedResponder:
+    """生成各调用类型的模拟输出"""
+
+    def __init__(self, rng: random.Random):
+        """
+        初始化
+
+        Args:
+            rng: 随机数生成器
+        """
+        self.rng = rng
+
+    def _sentence(self, words: int) -> str:
+        """生成指定词数的英文句子"""
+        return ' '.join(self.rng.choice(_WORDS) for _ in range(words)).capitalize() + '.'
+
+    def _key_points(self, count: int = 4, words: int = 40) -> Dict[str, str]:
+        """泳道关键点：{标题: 摘要}"""
+        return {f"Key Point {i + 1}": self._sentence(words) for i in range(count)}
+
+    def build(self, kind: str, lane: Optional[str], messages: List[Dict[str, str]]) -> Any:
+        """
+        生成符合schema的输出
+
+        Args:
+            kind: 调用类型
+            lane: 泳道名
+            messages: 请求消息列表
+
+        Returns:
+            Any: JSON对象
+        """
+        user = next((m.get('content', '') for m in messages if m.get('role') == 'user'), '')
+        if kind == 'abstract':
+            return [
+                'Mock Paper Title',
+                ['Alice Mock', 'Bob Mock'],
+                {step: self._sentence(30) for step in
+                 ('Background/Problem', 'Method/Approach', 'Innovation', 'Limitation/Future Work')}
+            ]
+        if kind == 'title_mapping':
+            return self._map_titles(user)
+        if kind == 'fused_lanes':
+            lanes = re.findall(r'\*\*\[Section Text for the (.+?) Lane\]\*\*', user)
+            return {name: self._key_points() for name in lanes}
+        if kind == 'lane_map':
+            return {'notes': [self._sentence(25) for _ in range(5)]}
+        if kind == 'innovation':
+            return {
+                'Limitation Breakthrough': self._sentence(60),
+                'Methodological Improvement': self._sentence(60),
+                'Application Expansion': self._sentence(60),
+                'Adaptive Storage Policies': self._sentence(60),
+                'Cross Domain Transfer': self._sentence(60)
+            }
+        return self._key_points()
+
+    @staticmethod
+    def _map_titles(user: str) -> Dict[str, List[str]]:
+        """从提示词的标题列表中按先后顺序把正文章节均分给四个泳道（每个泳道至多2个）"""
+        block = user.split('**[Title List to be Processed]**', 1)[-1].split('**[Example', 1)[0]
+        titles = [line.strip()[1:-1] for line in block.splitlines()
+                  if len(line.strip()) > 2 and line.strip()[0] == line.strip()[-1] == "'"]
+        # 第一个标题通常是论文题目
+        body = [t for t in titles[1:] if not any(keyword in t.lower() for keyword in SKIPPED_TITLE_KEYWORDS)]
+        mapping = {lane: [] for lane in LANES}
+        for i, title in enumerate(body):
+            lane = LANES[min(i * len(LANES) // len(body), len(LANES) - 1)]
+            if len(mapping[lane]) < 2:
+                mapping[lane].append(title)
+        return mapping
+
+
+class MockLLMSettings:
+    """模拟LLM服务配置"""
+
+    def __init__(self, latency: str = 'lognormal:1.5,0.4', chunk_interval: float = 0.01, chunk_chars: int = 24,
+                 rate_429: float = 0.0, rate_500: float = 0.0, invalid_rate: float = 0.0,
+                 invalid: Optional[Dict[str, float]] = None, retry_after: int = 1, seed: Optional[int] = None):
+        """
+        Args:
+            latency: 首token延迟分布（见parse_latency）
+            chunk_interval: 流式分块间隔（秒）
+            chunk_chars: 每块字符数
+            rate_429: 返回429的比例
+            rate_500: 返回500的比例
+            invalid_rate: 返回无效JSON的默认比例
+            invalid: 按调用类型或泳道名覆盖无效JSON比例，例如 {"Results & Analysis": 0.3, "title_mapping": 0.1}
+            retry_after: 429响应的Retry-After秒数
+            seed: 随机种子
+        """
+        self.latency = parse_latency(latency)
+        self.chunk_interval = chunk_interval
+        self.chunk_chars = chunk_chars
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.invalid_rate = invalid_rate
+        self.invalid = invalid or {}
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+
+    def invalid_rate_for(self, kind: str, lane: Optional[str]) -> float:
+        """调用类型/泳道对应的无效JSON比例"""
+        if lane and lane in self.invalid:
+            return self.invalid[lane]
+        return self.invalid.get(kind, self.invalid_rate)
+
+
+def _estimate_tokens(text: str) -> int:
+    """按4字符1个token估算"""
+    return max(1, len(text) // 4)
+
+
+def create_app(settings: MockLLMSettings) -> FastAPI:
+    """
+    创建模拟LLM服务
+
+    Args:
+        settings: 服务配置
+
+    Returns:
+        FastAPI: 应用
+    """
+    app = FastAPI(title="模拟LLM服务")
+    responder = CannedResponder(settings.rng)
+    lock = threading.Lock()
+    counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def count(kind: str, outcome: str):
+        with lock:
+            counters[kind][outcome] += 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        messages = payload.get('messages', [])
+        kind, lane = classify_request(messages)
+        key = f"{kind}:{lane}" if lane else kind
+
+        with lock:
+            roll = settings.rng.random()
+            latency = settings.latency(settings.rng)
+            invalid = settings.rng.random() < settings.invalid_rate_for(kind, lane)
+            malformed = settings.rng.random() < 0.5
+
+        if roll < settings.rate_429:
+            count(key, 'status_429')
+            await asyncio.sleep(min(latency, 0.2))
+            return JSONResponse({'error': {'message': 'Rate limit reached'}}, status_code=429,
+                                headers={'Retry-After': str(settings.retry_after)})
+        if roll < settings.rate_429 + settings.rate_500:
+            count(key, 'status_500')
+            await asyncio.sleep(latency)
+            return JSONResponse({'error': {'message': 'Internal server error'}}, status_code=500)
+
+        result = responder.build(kind, lane, messages)
+        content = json.dumps(result, ensure_ascii=False)
+        if invalid:
+            # 截断的JSON或结构不符合schema的JSON各占一半
+            content = content[:len(content) // 2] if malformed else json.dumps({'Only Key': 'N/A'})
+        count(key, 'invalid' if invalid else 'ok')
+
+        usage = {
+            'prompt_tokens': sum(_estimate_tokens(m.get('content', '')) for m in messages),
+            'completion_tokens': _estimate_tokens(content),
+            'prompt_cache_hit_tokens': 0
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        created = int(time.time())
+        base = {'id': f"mock-{created}", 'object': 'chat.completion.chunk', 'created': created,
+                'model': payload.get('model', 'mock')}
+        chunks = [content[i:i + settings.chunk_chars] for i in range(0, len(content), settings.chunk_chars)]
+
+        if not payload.get('stream'):
+            await asyncio.sleep(latency + settings.chunk_interval * len(chunks))
+            return {
+                **base,
+                'object': 'chat.completion',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': usage
+            }
+
+        include_usage = (payload.get('stream_options') or {}).get('include_usage')
+
+        async def stream():
+            await asyncio.sleep(latency)
+            for chunk in chunks:
+                data = {**base, 'choices': [{'index': 0, 'delta': {'content': chunk}, 'finish_reason': None}]}
+                yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(settings.chunk_interval)
+            yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+            if include_usage:
+                yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type='text/event-stream')
+
+    @app.get("/stats")
+    async def stats():
+        with lock:
+            return {key: dict(outcomes) for key, outcomes in counters.items()}
+
+    return app
+
+
+def _parse_invalid_overrides(items: List[str]) -> Dict[str, float]:
+    """解析 名称=比例 形式的无效JSON比例覆盖"""
+    overrides = {}
+    for item in items or []:
+        name, _, rate = item.rpartition('=')
+        overrides[name.strip()] = float(rate)
+    return overrides
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='本地模拟LLM服务（/v1/chat/completions）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8101)
+    parser.add_argument('--latency', default='lognormal:1.5,0.4', help='首token延迟分布，如 fixed:1、uniform:0.5,3、lognormal:1.5,0.4')
+    parser.add_argument('--chunk-interval', type=float, default=0.01, help='流式分块间隔（秒）')
+    parser.add_argument('--chunk-chars', type=int, default=24, help='每块字符数')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='返回429的比例')
+    parser.add_argument('--rate-500', type=float, default=0.0, help='返回500的比例')
+    parser.add_argument('--invalid-rate', type=float, default=0.0, help='返回无效JSON的默认比例')
+    parser.add_argument('--invalid', nargs='*', default=[], help='按调用类型或泳道名覆盖无效JSON比例，如 "Results & Analysis=0.3" title_mapping=0.1')
+    parser.add_argument('--retry-after', type=int, default=1, help='429响应的Retry-After秒数')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockLLMSettings(
+        latency=args.latency, chunk_interval=args.chunk_interval, chunk_chars=args.chunk_chars,
+        rate_429=args.rate_429, rate_500=args.rate_500, invalid_rate=args.invalid_rate,
+        invalid=_parse_invalid_overrides(args.invalid), retry_after=args.retry_after, seed=args.seed
+    )
+    print(f"🤖 模拟LLM服务: http://{args.host}:{args.port}/v1/chat/completions")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
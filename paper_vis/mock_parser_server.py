@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟PDF解析服务
+实现 /file_parse_json 接口，回放已保存的解析结果，供压测与端到端延迟测试使用，不占用共享解析服务器
+
+解析结果包（bundle）：
+- 论文目录（如 uploads/papers/<uuid>/）：<id>.md、<id>_content_list.json、<id>_middle.json，
+  图片位于目录或其images/子目录，可选<id>.pdf用于按内容匹配
+- JSON文件：已保存的 /file_parse_json 响应（md_content、middle_json、content_list、figure_dict）
+
+功能：
+- 按上传PDF的SHA-256匹配bundle中的PDF，其次按文件名匹配bundle ID，否则轮流返回
+- 解析延迟 = 分布采样（同mock_llm_server的--latency）+ 页数 × --seconds-per-page
+- --max-concurrent限制同时解析的请求数，模拟解析服务器的处理能力
+
+用法：
+    python mock_parser_server.py --port 8102 --latency uniform:5,15 --max-concurrent 2
+    PDF_PARSER_URL=http://127.0.0.1:8102/file_parse_json python MainScheduler.py paper.pdf
+"""
+
+import argparse
+import asyncio
+import base64
+import glob
+import hashlib
+import itertools
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, File, Form, UploadFile
+from fastapi.responses import Response
+
+from mock_llm_server import parse_latency
+
+# 默认回放的解析结果目录
+DEFAULT_BUNDLE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uploads', 'papers')
+
+
+def load_bundle_dir(directory: str) -> Optional[Dict[str, Any]]:
+    """
+    读取论文目录中的解析结果
+
+    Args:
+        directory: 论文目录
+
+    Returns:
+        Dict[str, Any]: {'id', 'response', 'pages', 'pdf_sha256'}，目录中没有完整解析结果时返回None
+    """
+    content_lists = glob.glob(os.path.join(directory, '*_content_list.json'))
+    if not content_lists:
+        return None
+    bundle_id = os.path.basename(content_lists[0])[:-len('_content_list.json')]
+    md_path = os.path.join(directory, f"{bundle_id}.md")
+    middle_path = os.path.join(directory, f"{bundle_id}_middle.json")
+    if not os.path.exists(md_path) or not os.path.exists(middle_path):
+        return None
+
+    with open(md_path, 'r', encoding='utf-8') as f:
+        md_content = f.read()
+    with open(content_lists[0], 'r', encoding='utf-8') as f:
+        content_list_str = f.read()
+    with open(middle_path, 'r', encoding='utf-8') as f:
+        middle_json_str = f.read()
+
+    # 图片以不带扩展名的文件名为键（与DocumentBlock.figure_id一致）
+    figure_dict = {}
+    for pattern in ('*.jpg', '*.jpeg', '*.png', os.path.join('images', '*')):
+        for path in glob.glob(os.path.join(directory, pattern)):
+            with open(path, 'rb') as f:
+                figure_dict[os.path.splitext(os.path.basename(path))[0]] = base64.b64encode(f.read()).decode('ascii')
+
+    pdf_path = os.path.join(directory, f"{bundle_id}.pdf")
+    pdf_sha256 = None
+    if os.path.exists(pdf_path):
+        with open(pdf_path, 'rb') as f:
+            pdf_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    response = {
+        'filename': bundle_id,
+        'md_content': md_content,
+        'middle_json': middle_json_str,
+        'content_list': content_list_str,
+        'figure_dict': figure_dict,
+        'backend': 'pipeline',
+        'version': 'mock'
+    }
+    return {'id': bundle_id, 'response': response, 'pages': _page_count(middle_json_str), 'pdf_sha256': pdf_sha256}
+
+
+def load_bundle_file(path: str) -> Dict[str, Any]:
+    """
+    读取已保存的 /file_parse_json 响应
+
+    Args:
+        path: JSON文件路径
+
+    Returns:
+        Dict[str, Any]: {'id', 'response', 'pages', 'pdf_sha256'}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        response = json.load(f)
+    for field in ('middle_json', 'content_list'):
+        if not isinstance(response.get(field), str):
+            response[field] = json.dumps(response.get(field) or ({} if field == 'middle_json' else []), ensure_ascii=False)
+    bundle_id = response.get('filename') or os.path.splitext(os.path.basename(path))[0]
+    return {'id': bundle_id, 'response': response, 'pages': _page_count(response['middle_json']), 'pdf_sha256': None}
+
+
+def _page_count(middle_json_str: str) -> int:
+    """middle数据的页数"""
+    try:
+        return len(json.loads(middle_json_str).get('pdf_info', []))
+    except (ValueError, AttributeError):
+        return 0
+
+
+def load_bundles(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    读取解析结果包：路径可以是论文目录、JSON文件，或包含多个论文目录的上级目录
+
+    Args:
+        paths: 路径列表
+
+    Returns:
+        List[Dict[str, Any]]: bundle列表
+    """
+    bundles = []
+    for path in paths:
+        if os.path.isfile(path):
+            bundles.append(load_bundle_file(path))
+            continue
+        bundle = load_bundle_dir(path)
+        if bundle:
+            bundles.append(bundle)
+            continue
+        for child in sorted(os.listdir(path)):
+            child_path = os.path.join(path, child)
+            if os.path.isdir(child_path):
+                bundle = load_bundle_dir(child_path)
+                if bundle:
+                    bundles.append(bundle)
+    return bundles
+
+
+def create_app(bundles: List[Dict[str, Any]], latency: str = 'fixed:0', seconds_per_page: float = 0.0,
+               max_concurrent: int = 0, seed: Optional[int] = None) -> FastAPI:
+    """
+    创建模拟解析服务
+
+    Args:
+        bundles: load_bundles的结果
+        latency: 解析延迟分布（见mock_llm_server.parse_latency）
+        seconds_per_page: 每页额外延迟（秒）
+        max_concurrent: 同时解析的请求数上限，0表示不限
+        seed: 随机种子
+
+    Returns:
+        FastAPI: 应用
+
+    Raises:
+        ValueError: 没有可回放的bundle
+    """
+    if not bundles:
+        raise ValueError("没有可回放的解析结果")
+
+    app = FastAPI(title="模拟PDF解析服务")
+    sample_latency = parse_latency(latency)
+    rng = random.Random(seed)
+    # 预先序列化，回放时不占用CPU
+    encoded = [json.dumps(bundle['response'], ensure_ascii=False).encode('utf-8') for bundle in bundles]
+    by_sha256 = {bundle['pdf_sha256']: i for i, bundle in enumerate(bundles) if bundle['pdf_sha256']}
+    by_id = {bundle['id']: i for i, bundle in enumerate(bundles)}
+    round_robin = itertools.cycle(range(len(bundles)))
+    semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+
+    async def parse(index: int) -> Response:
+        await asyncio.sleep(sample_latency(rng) + bundles[index]['pages'] * seconds_per_page)
+        return Response(content=encoded[index], media_type='application/json')
+
+    @app.post("/file_parse_json")
+    async def file_parse_json(file: UploadFile = File(...), backend: str = Form('pipeline')):
+        content = await file.read()
+        stem = os.path.splitext(os.path.basename(file.filename or ''))[0]
+        index = by_sha256.get(hashlib.sha256(content).hexdigest())
+        if index is None:
+            index = by_id.get(stem)
+        if index is None:
+            index = next(round_robin)
+        if semaphore is None:
+            return await parse(index)
+        async with semaphore:
+            return await parse(index)
+
+    return app
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='本地模拟PDF解析服务（/file_parse_json）')
+    parser.add_argument('bundles', nargs='*', default=[DEFAULT_BUNDLE_ROOT], help='论文目录、解析结果JSON或其上级目录')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8102)
+    parser.add_argument('--latency', default='fixed:0', help='解析延迟分布，如 fixed:10、uniform:5,15')
+    parser.add_argument('--seconds-per-page', type=float, default=0.0, help='每页额外延迟（秒）')
+    parser.add_argument('--max-concurrent', type=int, default=0, help='同时解析的请求数上限，0表示不限')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    bundles = load_bundles(args.bundles)
+    print(f"📄 模拟解析服务: http://{args.host}:{args.port}/file_parse_json（{len(bundles)} 个解析结果）")
+    for bundle in bundles:
+        print(f"   - {bundle['id']}: {bundle['pages']} 页, {len(bundle['response']['figure_dict'])} 张图片")
+    app = create_app(bundles, args.latency, args.seconds_per_page, args.max_concurrent, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 import requests
 import os
 import json
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import PDF_PARSER_URL
+
+# 可取消的解析请求在此线程池中发出；取消时不再等待，已发出的请求结束后结果被丢弃
+_request_executor = ThreadPoolExecutor(thread_name_prefix='pdf_parse')
 
 class PDFParserClient:
     """
@@ -17,11 +23,32 @@ class PDFParserClient:
         "version": "2.5.4"
     }
     """
-    def __init__(self, server_url="http://10.3.35.21:8003/file_parse_json", backend='pipeline'):
-        self.server_url = server_url
+    def __init__(self, server_url=None, backend='pipeline'):
+        self.server_url = server_url or PDF_PARSER_URL
         self.backend = backend
 
-    def upload_pdf(self, pdf_file_path):
+    def _post(self, files, data, timeout=None, cancel=None):
+        """
+        发送解析请求；传入取消信号时在后台线程中发送，取消后立即返回
+
+        Raises:
+            Cancelled: 请求完成前已取消
+        """
+        if cancel is None:
+            return requests.post(self.server_url, files=files, data=data, timeout=timeout)
+        cancel.raise_if_cancelled("PDF解析")
+        future = _request_executor.submit(requests.post, self.server_url, files=files, data=data, timeout=timeout)
+        cancelled = Future()
+        handle = cancel.add_callback(lambda: cancelled.done() or cancelled.set_result(None))
+        try:
+            wait([future, cancelled], return_when=FIRST_COMPLETED)
+        finally:
+            cancel.remove_callback(handle)
+        if not future.done():
+            cancel.raise_if_cancelled("PDF解析")
+        return future.result()
+
+    def upload_pdf(self, pdf_file_path, timeout=None, cancel=None):
         if not os.path.exists(pdf_file_path):
             raise FileNotFoundError(f"找不到要上传的文件: {pdf_file_path}")
 
@@ -31,10 +58,12 @@ class PDFParserClient:
 
         with open(pdf_file_path, 'rb') as f:
             files_to_upload = {
-                'file': (os.path.basename(pdf_file_path), f, 'application/pdf')
+                'file': (os.path.basename(pdf_file_path), f.read(), 'application/pdf')
             }
             try:
-                response = requests.post(self.server_url, files=files_to_upload, data=form_data)
+                response = self._post(files_to_upload, form_data, timeout, cancel)
+            except requests.exceptions.Timeout:
+                raise TimeoutError(f"PDF解析超过 {timeout:.0f} 秒未完成")
             except requests.exceptions.ConnectionError:
                 raise ConnectionError(f"连接被拒绝。请确保服务端正在 {self.server_url} 运行。")
 
@@ -47,16 +76,21 @@ class PDFParserClient:
         else:
             raise RuntimeError(f"请求失败, 状态码: {response.status_code}, 错误信息: {response.text}")
 
-    def upload_pdf_from_content(self, file_content, filename):
+    def upload_pdf_from_content(self, file_content, filename, timeout=None, cancel=None):
         """
         从文件内容上传PDF（用于处理上传的文件流）
         
         Args:
             file_content: PDF文件内容（字节流）
             filename: 文件名
+            timeout: 请求超时秒数，None表示不限
+            cancel: 可选的取消信号（Cancellation.CancelToken），取消后不再等待解析结果
         
         Returns:
             dict: 解析结果
+        
+        Raises:
+            Cancelled: 解析完成前已取消
         """
         form_data = {
             'backend': self.backend
@@ -67,7 +101,9 @@ class PDFParserClient:
         }
         
         try:
-            response = requests.post(self.server_url, files=files_to_upload, data=form_data)
+            response = self._post(files_to_upload, form_data, timeout, cancel)
+        except requests.exceptions.Timeout:
+            raise TimeoutError(f"PDF解析超过 {timeout:.0f} 秒未完成")
         except requests.exceptions.ConnectionError:
             raise ConnectionError(f"连接被拒绝。请确保服务端正在 {self.server_url} 运行。")
 
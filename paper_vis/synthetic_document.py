@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成大文档生成器
+以frontend/public/data中的示例论文为素材（句子、图表标题、表格HTML、图片），生成任意页数且相互一致的解析结果包
+（md_content、content_list、middle_json、figure_dict），用于300页学位论文、会议论文集等规模的压测
+
+可配置：
+- 页数、每页段落数、标题层级深度（1 / 1.1 / 1.1.1）与每章页数
+- 图片、表格密度（每页期望个数）
+- 引用密度（每段期望的 Figure N / Fig. N / Table N 引用数，引用对象位于前后几页内）
+
+输出与 /file_parse_json 响应一致，可直接交给mock_parser_server.py回放，或由benchmark_cpu_stages.py --synthetic-pages
+测量DataMerger、FigureTextMatchingPipeline、ContentExtractor随页数增长的耗时曲线
+
+用法：
+    python synthetic_document.py --pages 300 --output-dir ../uploads/synthetic/thesis300
+    python synthetic_document.py --pages 120 --figures-per-page 1.5 --references-per-paragraph 2 --json bundle.json
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional
+
+# 素材来源：自带示例论文
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'public', 'data')
+SEED_ID = '2e0a023273d5d4f247307b1ca1cd52f6'
+
+PAGE_SIZE = [612.0, 792.0]
+MARGIN_TOP, MARGIN_BOTTOM, MARGIN_LEFT, MARGIN_RIGHT = 72, 720, 106, 506
+LINE_HEIGHT = 11
+CHARS_PER_LINE = 95
+
+CHAPTER_TITLES = [
+    'Introduction', 'Background and Motivation', 'Related Work', 'System Design', 'Methodology',
+    'Implementation', 'Experimental Setup', 'Evaluation', 'Results', 'Analysis', 'Discussion',
+    'Case Study', 'Limitations', 'Future Work', 'Conclusion'
+]
+SUBSECTION_TITLES = [
+    'Overview', 'Problem Formulation', 'Design Goals', 'Data Collection', 'Model Architecture',
+    'Training Procedure', 'Baselines', 'Metrics', 'Main Results', 'Ablation Study', 'Sensitivity Analysis',
+    'Scalability', 'Energy Efficiency', 'Error Analysis', 'Threats to Validity', 'Summary'
+]
+REFERENCE_TEMPLATES = [
+    'As shown in Figure {n}, {sentence}',
+    'Fig. {n} illustrates that {sentence}',
+    '{sentence} (see Figure {n}).',
+    'Table {t} summarizes the results: {sentence}',
+    '{sentence} as reported in Table {t}.',
+]
+
+
+def render_markdown(content_list: List[Dict]) -> str:
+    """
+    按解析服务的渲染规则由content_list生成Markdown
+
+    Args:
+        content_list: content_list数据
+
+    Returns:
+        str: Markdown内容
+    """
+    parts = []
+    for item in content_list:
+        item_type = item.get('type')
+        if item_type == 'text':
+            text = (item.get('text') or '').strip()
+            if text:
+                parts.append(f"# {text}" if item.get('text_level') else text)
+        elif item_type == 'image':
+            parts.append(f"![]({item.get('img_path', '')})")
+            parts.extend(caption.strip() for caption in item.get('img_caption', []) if caption.strip())
+        elif item_type == 'table':
+            parts.extend(caption.strip() for caption in item.get('table_caption', []) if caption.strip())
+            parts.append((item.get('table_body') or f"![]({item.get('img_path', '')})").strip())
+            parts.extend(note.strip() for note in item.get('table_footnote', []) if note.strip())
+        elif item_type == 'equation':
+            text = (item.get('text') or '').strip()
+            if text:
+                parts.append(text)
+    return '\n\n'.join(parts) + '\n'
+
+
+def _wrap(text: str, width: int = CHARS_PER_LINE) -> List[str]:
+    """按词边界折行（模拟PDF中的行）"""
+    lines, current = [], ''
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines or ['']
+
+
+def _text_block(block_type: str, text: str, top: int) -> Dict[str, Any]:
+    """生成middle中的文本/标题块（每行一个span）"""
+    lines = []
+    for i, line in enumerate(_wrap(text)):
+        y = top + i * LINE_HEIGHT
+        bbox = [MARGIN_LEFT, y, MARGIN_RIGHT, y + LINE_HEIGHT]
+        lines.append({'bbox': bbox, 'spans': [{'bbox': bbox, 'score': 1.0, 'content': line, 'type': 'text'}]})
+    return {'type': block_type, 'bbox': [MARGIN_LEFT, top, MARGIN_RIGHT, top + len(lines) * LINE_HEIGHT], 'lines': lines}
+
+
+class SyntheticDocumentGenerator:
+    """合成解析结果包生成器"""
+
+    def __init__(self, pages: int = 100, paragraphs_per_page: int = 6, heading_depth: int = 3,
+                 pages_per_chapter: int = 12, figures_per_page: float = 0.5, tables_per_page: float = 0.2,
+                 references_per_paragraph: float = 0.5, seed: int = 0, seed_dir: str = SEED_DIR):
+        """
+        初始化生成器
+
+        Args:
+            pages: 页数
+            paragraphs_per_page: 每页段落数
+            heading_depth: 标题层级深度（1-3）
+            pages_per_chapter: 平均每个一级章节的页数
+            figures_per_page: 每页期望图片数
+            tables_per_page: 每页期望表格数
+            references_per_paragraph: 每段期望的图表引用数
+            seed: 随机种子（相同参数与种子生成相同结果）
+            seed_dir: 素材目录
+        """
+        self.pages = pages
+        self.paragraphs_per_page = paragraphs_per_page
+        self.heading_depth = max(1, min(3, heading_depth))
+        self.pages_per_chapter = max(1, pages_per_chapter)
+        self.figures_per_page = figures_per_page
+        self.tables_per_page = tables_per_page
+        self.references_per_paragraph = references_per_paragraph
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._load_corpus(seed_dir)
+
+    def _load_corpus(self, seed_dir: str):
+        """从示例论文中收集句子、图表标题、表格HTML与图片"""
+        with open(os.path.join(seed_dir, f"{SEED_ID}_content_list.json"), 'r', encoding='utf-8') as f:
+            content_list = json.load(f)
+
+        self.sentences = []
+        self.image_captions = []
+        self.table_captions = []
+        self.table_bodies = []
+        in_references = False
+        for item in content_list:
+            if item.get('text_level'):
+                # 参考文献条目不作为正文素材
+                in_references = 'reference' in item.get('text', '').lower()
+            if in_references:
+                continue
+            if item.get('type') == 'text' and not item.get('text_level'):
+                # 去掉原文中的图表编号引用，编号由生成器统一分配
+                text = re.sub(r'\b(?:Fig(?:ure)?s?\.?|Tables?)\s*\d+\w*', 'the data', item.get('text', ''))
+                self.sentences.extend(s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.split()) >= 6)
+            elif item.get('type') == 'image':
+                self.image_captions.extend(re.sub(r'^\s*Fig(?:ure)?\.?\s*\d+\s*[:.]?\s*', '', c).strip()
+                                           for c in item.get('img_caption', []) if c.strip())
+            elif item.get('type') == 'table':
+                captions = item.get('table_caption') or item.get('table_footnote') or []
+                self.table_captions.extend(re.sub(r'^\s*Table\s*\d+\s*[:.]?\s*', '', c).strip() for c in captions if c.strip())
+                if item.get('table_body'):
+                    self.table_bodies.append(item['table_body'].strip())
+
+        self.image_payloads = []
+        for path in sorted(glob.glob(os.path.join(seed_dir, '*.jpg'))):
+            with open(path, 'rb') as f:
+                self.image_payloads.append(base64.b64encode(f.read()).decode('ascii'))
+
+        self.image_captions = self.image_captions or ['Overview of the proposed system.']
+        self.table_captions = self.table_captions or ['Summary of experimental results.']
+        self.table_bodies = self.table_bodies or ['<html><body><table><tr><td>a</td><td>b</td></tr></table></body></html>']
+
+    def _count(self, expected: float) -> int:
+        """期望值为expected的非负整数（整数部分 + 按小数部分概率加1）"""
+        whole = int(expected)
+        return whole + (1 if self.rng.random() < expected - whole else 0)
+
+    def _paragraph(self, figure_count: int, table_count: int, page_figures: List[int], page_tables: List[int]) -> str:
+        """生成一段正文，按引用密度插入对前后几页图表的引用"""
+        sentences = [self.rng.choice(self.sentences) for _ in range(self.rng.randint(3, 6))]
+        for _ in range(self._count(self.references_per_paragraph)):
+            template = self.rng.choice(REFERENCE_TEMPLATES)
+            # 优先引用本页及附近页的图表，尚未出现时引用已有编号
+            if 'Table' in template:
+                if not page_tables and not table_count:
+                    continue
+                number = self.rng.choice(page_tables) if page_tables else self.rng.randint(max(1, table_count - 2), table_count)
+            else:
+                if not page_figures and not figure_count:
+                    continue
+                number = self.rng.choice(page_figures) if page_figures else self.rng.randint(max(1, figure_count - 2), figure_count)
+            sentence = self.rng.choice(self.sentences)
+            sentence = sentence[0].lower() + sentence[1:]
+            position = self.rng.randint(0, len(sentences))
+            sentences.insert(position, template.format(n=number, t=number, sentence=sentence))
+        return ' '.join(sentences)
+
+    def _asset_name(self, kind: str, number: int) -> str:
+        """图表文件名（稳定的伪哈希）"""
+        return hashlib.sha256(f"{self.seed}-{kind}-{number}".encode('utf-8')).hexdigest() + '.jpg'
+
+    def generate(self) -> Dict[str, Any]:
+        """
+        生成解析结果包
+
+        Returns:
+            Dict[str, Any]: 与 /file_parse_json 响应相同的结构：
+                {'filename', 'md_content', 'middle_json'(str), 'content_list'(str), 'figure_dict', 'backend', 'version'}
+        """
+        content_list: List[Dict[str, Any]] = []
+        pdf_info: List[Dict[str, Any]] = []
+        figure_dict: Dict[str, str] = {}
+        chapter_count = max(1, round(self.pages / self.pages_per_chapter))
+        chapter_starts = sorted(self.rng.sample(range(1, self.pages), min(chapter_count - 1, max(0, self.pages - 1))))
+        chapter_starts = [0] + chapter_starts
+        numbering = [0, 0, 0]
+        figure_count = table_count = 0
+
+        title = f"Synthetic Study of {self.rng.choice(CHAPTER_TITLES)} at Scale"
+        filename = f"synthetic_{self.pages}p_{self.seed}"
+
+        for page_idx in range(self.pages):
+            blocks: List[Dict[str, Any]] = []
+            top = MARGIN_TOP
+
+            def add_text(text: str, level: Optional[int] = None):
+                nonlocal top
+                block = _text_block('title' if level else 'text', text, top)
+                top = block['bbox'][3] + 6
+                blocks.append(block)
+                item = {'type': 'text', 'text': text, 'page_idx': page_idx}
+                if level:
+                    item['text_level'] = 1
+                content_list.append(item)
+
+            if page_idx == 0:
+                add_text(title, level=1)
+                add_text('Abstract', level=1)
+                add_text(self._paragraph(0, 0, [], []))
+
+            # 一级章节从随机选出的页开始，二三级标题按层级深度在章节内穿插
+            if page_idx in chapter_starts:
+                numbering = [numbering[0] + 1, 0, 0]
+                chapter_title = CHAPTER_TITLES[(numbering[0] - 1) % len(CHAPTER_TITLES)]
+                add_text(f"{numbering[0]} {chapter_title}", level=1)
+
+            # 本页新增的图表，正文优先引用它们
+            page_figures = [figure_count + i + 1 for i in range(self._count(self.figures_per_page))]
+            page_tables = [table_count + i + 1 for i in range(self._count(self.tables_per_page))]
+            slots = sorted(self.rng.sample(range(self.paragraphs_per_page + 1), min(len(page_figures) + len(page_tables), self.paragraphs_per_page + 1))) \
+                if page_figures or page_tables else []
+            assets = [('image', n) for n in page_figures] + [('table', n) for n in page_tables]
+            self.rng.shuffle(assets)
+            placements = dict(zip(slots, assets))
+            extra_assets = assets[len(slots):]
+
+            for paragraph in range(self.paragraphs_per_page + 1):
+                if paragraph in placements:
+                    kind, number = placements[paragraph]
+                    top = self._add_asset(kind, number, page_idx, top, blocks, content_list, figure_dict)
+                    if kind == 'image':
+                        figure_count = max(figure_count, number)
+                    else:
+                        table_count = max(table_count, number)
+                if paragraph == self.paragraphs_per_page:
+                    break
+                if self.heading_depth >= 2 and self.rng.random() < 0.12:
+                    depth = 3 if self.heading_depth >= 3 and numbering[1] and self.rng.random() < 0.4 else 2
+                    if depth == 2:
+                        numbering[1], numbering[2] = numbering[1] + 1, 0
+                    else:
+                        numbering[2] += 1
+                    number = '.'.join(str(n) for n in numbering[:depth])
+                    add_text(f"{number} {self.rng.choice(SUBSECTION_TITLES)}", level=depth)
+                add_text(self._paragraph(figure_count, table_count, page_figures, page_tables))
+
+            for kind, number in extra_assets:
+                top = self._add_asset(kind, number, page_idx, top, blocks, content_list, figure_dict)
+            figure_count = max([figure_count] + page_figures)
+            table_count = max([table_count] + page_tables)
+
+            pdf_info.append({
+                'preproc_blocks': blocks,
+                'page_idx': page_idx,
+                'page_size': PAGE_SIZE,
+                'images': [],
+                'tables': [],
+                'interline_equations': [],
+                'discarded_blocks': [],
+                'para_blocks': blocks
+            })
+
+        # 参考文献章节
+        references_page = self.pages - 1
+        content_list.append({'type': 'text', 'text': 'References', 'text_level': 1, 'page_idx': references_page})
+        pdf_info[-1]['para_blocks'].append(_text_block('title', 'References', MARGIN_BOTTOM))
+
+        middle_data = {'pdf_info': pdf_info, '_parse_type': 'txt', '_version_name': 'synthetic'}
+        return {
+            'filename': filename,
+            'md_content': render_markdown(content_list),
+            'middle_json': json.dumps(middle_data, ensure_ascii=False),
+            'content_list': json.dumps(content_list, ensure_ascii=False),
+            'figure_dict': figure_dict,
+            'backend': 'pipeline',
+            'version': 'synthetic'
+        }
+
+    def _add_asset(self, kind: str, number: int, page_idx: int, top: int, blocks: List[Dict], content_list: List[Dict],
+                   figure_dict: Dict[str, str]) -> int:
+        """在页面中放置一张图片或一个表格（middle块、content_list条目与图片数据），返回下一个块的纵坐标"""
+        name = self._asset_name(kind, number)
+        height = 150
+        body_bbox = [MARGIN_LEFT + 60, top, MARGIN_RIGHT - 60, top + height]
+        if kind == 'image':
+            caption = f"Figure {number}: {self.rng.choice(self.image_captions)}"
+        else:
+            caption = f"Table {number}: {self.rng.choice(self.table_captions)}"
+
+        if kind == 'image':
+            sub_blocks = [
+                {'type': 'image_body', 'bbox': body_bbox,
+                 'lines': [{'bbox': body_bbox, 'spans': [{'bbox': body_bbox, 'score': 0.97, 'type': 'image', 'image_path': name}]}]},
+                _text_block('image_caption', caption, body_bbox[3] + 4)
+            ]
+            content_list.append({'type': 'image', 'img_path': f"images/{name}", 'img_caption': [caption],
+                                 'img_footnote': [], 'page_idx': page_idx})
+        else:
+            # 表格标题在表体上方
+            table_body = self.rng.choice(self.table_bodies)
+            caption_block = _text_block('table_caption', caption, top)
+            body_bbox = [body_bbox[0], caption_block['bbox'][3] + 4, body_bbox[2], caption_block['bbox'][3] + 4 + height]
+            sub_blocks = [
+                caption_block,
+                {'type': 'table_body', 'bbox': body_bbox,
+                 'lines': [{'bbox': body_bbox, 'spans': [{'bbox': body_bbox, 'score': 0.98, 'type': 'table',
+                                                          'html': table_body, 'image_path': name}]}]}
+            ]
+            content_list.append({'type': 'table', 'img_path': f"images/{name}", 'table_caption': [caption],
+                                 'table_footnote': [], 'table_body': table_body, 'page_idx': page_idx})
+
+        bottom = max(sub_block['bbox'][3] for sub_block in sub_blocks)
+        blocks.append({'type': kind, 'bbox': [body_bbox[0], top, body_bbox[2], bottom], 'blocks': sub_blocks})
+        if self.image_payloads:
+            figure_dict[os.path.splitext(name)[0]] = self.image_payloads[number % len(self.image_payloads)]
+        return bottom + 6
+
+
+def write_bundle(bundle: Dict[str, Any], directory: str) -> str:
+    """
+    将解析结果包写成论文目录（<id>.md、<id>_content_list.json、<id>_middle.json、images/），可由mock_parser_server.py回放
+
+    Args:
+        bundle: generate的结果
+        directory: 输出目录
+
+    Returns:
+        str: 输出目录
+    """
+    bundle_id = bundle['filename']
+    os.makedirs(os.path.join(directory, 'images'), exist_ok=True)
+    with open(os.path.join(directory, f"{bundle_id}.md"), 'w', encoding='utf-8') as f:
+        f.write(bundle['md_content'])
+    with open(os.path.join(directory, f"{bundle_id}_content_list.json"), 'w', encoding='utf-8') as f:
+        f.write(bundle['content_list'])
+    with open(os.path.join(directory, f"{bundle_id}_middle.json"), 'w', encoding='utf-8') as f:
+        f.write(bundle['middle_json'])
+    for figure_id, payload in bundle['figure_dict'].items():
+        with open(os.path.join(directory, 'images', f"{figure_id}.jpg"), 'wb') as f:
+            f.write(base64.b64decode(payload))
+    return directory
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='合成大文档生成器')
+    parser.add_argument('--pages', type=int, default=300, help='页数')
+    parser.add_argument('--paragraphs-per-page', type=int, default=6, help='每页段落数')
+    parser.add_argument('--heading-depth', type=int, default=3, help='标题层级深度（1-3）')
+    parser.add_argument('--pages-per-chapter', type=int, default=12, help='平均每个一级章节的页数')
+    parser.add_argument('--figures-per-page', type=float, default=0.5, help='每页期望图片数')
+    parser.add_argument('--tables-per-page', type=float, default=0.2, help='每页期望表格数')
+    parser.add_argument('--references-per-paragraph', type=float, default=0.5, help='每段期望的图表引用数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--output-dir', help='写出论文目录（可由mock_parser_server.py回放）')
+    parser.add_argument('--json', help='写出 /file_parse_json 响应格式的JSON')
+    args = parser.parse_args()
+
+    generator = SyntheticDocumentGenerator(
+        pages=args.pages, paragraphs_per_page=args.paragraphs_per_page, heading_depth=args.heading_depth,
+        pages_per_chapter=args.pages_per_chapter, figures_per_page=args.figures_per_page,
+        tables_per_page=args.tables_per_page, references_per_paragraph=args.references_per_paragraph, seed=args.seed
+    )
+    bundle = generator.generate()
+    content_list = json.loads(bundle['content_list'])
+    print(f"✅ 已生成 {args.pages} 页合成文档: {len(content_list)} 个块, {len(bundle['md_content'])} 字符Markdown, "
+          f"{sum(1 for item in content_list if item['type'] == 'image')} 张图片, "
+          f"{sum(1 for item in content_list if item['type'] == 'table')} 个表格")
+
+    if args.output_dir:
+        print(f"💾 论文目录: {write_bundle(bundle, args.output_dir)}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(bundle, f, ensure_ascii=False)
+        print(f"💾 解析结果JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLMClient.repair_json_text 的截断修复测试
+被截断的字符串不能被当作完整的值返回，只保留最后一个完整的成员
+"""
+
+import json
+
+import pytest
+
+from LLMClient import parse_json_content, repair_json_text
+
+
+TRUNCATED_CONCLUSION = (
+    '{"Main Contribution": "A unified segmentation backbone.", '
+    '"Key Result": "The model achieves 12.4% higher mIoU on ADE'
+)
+
+
+def test_truncated_string_is_not_accepted_as_value():
+    result = json.loads(repair_json_text(TRUNCATED_CONCLUSION))
+    assert result == {"Main Contribution": "A unified segmentation backbone."}
+
+
+def test_truncated_first_member_is_not_repaired():
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_content('{"Key Result": "The model achieves 12.4% higher mIoU on ADE')
+
+
+def test_truncated_number_is_dropped():
+    result = json.loads(repair_json_text('{"a": "x", "b": 12'))
+    assert result == {"a": "x"}
+
+
+def test_complete_members_are_closed():
+    result = json.loads(repair_json_text('{"a": "x", "b": ["y", "z"]'))
+    assert result == {"a": "x", "b": ["y", "z"]}